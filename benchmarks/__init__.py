@@ -0,0 +1,5 @@
+"""Performance benchmarks, run as modules from the repository root.
+
+They use the database configured by DATABASE_URL (dms.db by default), so
+point it at a copy when measuring anything that writes.
+"""
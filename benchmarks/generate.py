@@ -0,0 +1,176 @@
+"""Seeded data generator for throwaway benchmark databases.
+
+    python -m benchmarks.generate --database /tmp/bench.db \\
+        --children 10000 --programs 20 --fields 8 --entries 100000
+
+The same seed always produces the same data, so results from different
+versions of the app are comparable.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+FIRST_NAMES = ['Amina', 'Brian', 'Cynthia', 'David', 'Esther', 'Faith', 'George', 'Halima',
+               'Ian', 'Joy', 'Kevin', 'Lucy', 'Moses', 'Njeri', 'Otieno', 'Purity', 'Ruth',
+               'Samuel', 'Tabitha', 'Wanjiru']
+LAST_NAMES = ['Achieng', 'Barasa', 'Chebet', 'Kamau', 'Kariuki', 'Mutua', 'Njoroge', 'Ochieng',
+              'Omondi', 'Wafula', 'Wambui', 'Wanjala']
+STATUSES = ['Active', 'Reintegrated', 'Transferred', 'Graduated']
+CASES = ['Abandonment', 'Neglect', 'Abuse', 'Orphaned', 'Street connected']
+
+# Rows per executemany while generating
+BATCH_SIZE = 5000
+
+# Entries are spread over this many days before today
+HISTORY_DAYS = 3 * 365
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _random_day(rng, today, days=HISTORY_DAYS):
+    return today - timedelta(days=rng.randrange(days))
+
+
+def children_rows(rng, count, today):
+    for _ in range(count):
+        yield {
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'date_of_birth': date(rng.randint(2005, 2020), rng.randint(1, 12), rng.randint(1, 28)),
+            'gender': rng.choice(['Male', 'Female']),
+            'guardian_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'guardian_contact': f'07{rng.randrange(10 ** 8):08d}',
+            'address': f'P.O. Box {rng.randint(1, 9999)}',
+            'date_of_admission': _random_day(rng, today),
+            'nature_of_case': rng.choice(CASES),
+            'status': rng.choice(STATUSES),
+        }
+
+
+def indicator_rows(rng, count, field_names, today):
+    for _ in range(count):
+        row = {name: rng.randint(0, 20) for name in field_names}
+        row['date_column'] = _random_day(rng, today)
+        yield row
+
+
+def children_csv(count, seed=0):
+    """CSV upload body in the import_csv format, for import benchmarks."""
+    rng = random.Random(seed)
+    lines = ['name,date_of_birth,gender,guardian_name,guardian_contact,address,'
+             'date_of_admission,nature_of_case,status']
+    for row in children_rows(rng, count, date.today()):
+        lines.append(','.join(str(row[key]) for key in (
+            'name', 'date_of_birth', 'gender', 'guardian_name', 'guardian_contact',
+            'address', 'date_of_admission', 'nature_of_case', 'status')))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def generate(children=1000, programs=5, fields=5, entries=10000, indicators=None, seed=0):
+    """Fill the app's configured database; returns a summary of what was written.
+
+    Must run inside an app context. Creates the schema first, so it can
+    start from an empty file.
+    """
+    from extensions import db, passwords
+    from models import (
+        Children, EducationSupportIndicators, FamilySupportProgramIndicators,
+        ProgramData, ProgramDefinition, ProgramField, ProgramDailyRollup, User,
+        EDUCATION_INDICATOR_FIELDS, FAMILY_INDICATOR_FIELDS,
+    )
+    from utils import migrations, rollup
+
+    rng = random.Random(seed)
+    today = date.today()
+    indicators = children // 10 if indicators is None else indicators
+    started = time.perf_counter()
+
+    migrations.upgrade_schema(db)
+
+    if User.query.filter_by(username='admin').first() is None:
+        db.session.add(User(username='admin', password=passwords.hash('admin'), role='admin'))
+
+    for batch in _batches(children_rows(rng, children, today)):
+        db.session.execute(Children.__table__.insert(), batch)
+    for model, names in ((EducationSupportIndicators, EDUCATION_INDICATOR_FIELDS),
+                         (FamilySupportProgramIndicators, FAMILY_INDICATOR_FIELDS)):
+        for batch in _batches(indicator_rows(rng, indicators, names, today)):
+            db.session.execute(model.__table__.insert(), batch)
+
+    program_ids = []
+    for number in range(programs):
+        program = ProgramDefinition(name=f'Benchmark program {number + 1}', description='Generated')
+        db.session.add(program)
+        db.session.flush()
+        program_ids.append(program.id)
+        db.session.add(ProgramField(program_id=program.id, field_name='date_column',
+                                    field_label='Date', field_type='date', is_required=True, order=0))
+        for index in range(fields):
+            db.session.add(ProgramField(program_id=program.id, field_name=f'value_{index + 1}',
+                                        field_label=f'Value {index + 1}', field_type='number',
+                                        is_required=False, order=index + 1))
+    db.session.flush()
+
+    def entry_rows():
+        created_at = datetime.utcnow()
+        for _ in range(entries):
+            day = _random_day(rng, today)
+            data = {'date_column': day.isoformat()}
+            data.update({f'value_{index + 1}': rng.randint(0, 100) for index in range(fields)})
+            yield {
+                'program_id': rng.choice(program_ids),
+                'data': data,
+                'entry_date': day,
+                'created_at': created_at,
+            }
+
+    if program_ids:
+        for batch in _batches(entry_rows()):
+            db.session.execute(ProgramData.__table__.insert(), batch)
+        rollup.rebuild(db.session, ProgramData, ProgramField, ProgramDailyRollup)
+    db.session.commit()
+
+    return {
+        'children': children,
+        'programs': programs,
+        'fields': fields,
+        'entries': entries if program_ids else 0,
+        'indicators': indicators,
+        'seed': seed,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True, help='SQLite file to create or extend')
+    parser.add_argument('--children', type=int, default=1000)
+    parser.add_argument('--programs', type=int, default=5)
+    parser.add_argument('--fields', type=int, default=5, help='numeric fields per program')
+    parser.add_argument('--entries', type=int, default=10000, help='ProgramData rows in total')
+    parser.add_argument('--indicators', type=int, help='rows per indicator table (default children/10)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Must be set before the app is imported
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(args.database)
+    from app import app
+
+    with app.app_context():
+        summary = generate(args.children, args.programs, args.fields, args.entries,
+                           args.indicators, args.seed)
+    print(', '.join(f'{key}={value}' for key, value in summary.items()))
+
+
+if __name__ == '__main__':
+    main()
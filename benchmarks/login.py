@@ -0,0 +1,132 @@
+"""Password hashing cost and login throughput, for choosing PASSWORD_HASH_METHOD.
+
+    python -m benchmarks.login [--methods scrypt:32768:8:1,pbkdf2:sha256:600000]
+                               [--threads 1,4] [--seconds 2] [--logins 20]
+
+For each method this prints the time for one verification and how many
+verifications per second a single process sustains with several threads
+(hashlib releases the GIL, so threads scale up to the cores available).
+It then signs in repeatedly through the app's /login against a
+throwaway database, under the configured policy, and times the one-off
+cost of upgrading an outdated hash.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+PASSWORD = 'correct horse battery staple'
+
+
+def verify_ms(stored_hash, samples=5):
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        check_password_hash(stored_hash, PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def verifies_per_second(stored_hash, threads, seconds):
+    """Verifications per second with `threads` threads checking for `seconds`."""
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def work(slot):
+        while time.perf_counter() < deadline:
+            check_password_hash(stored_hash, PASSWORD)
+            counts[slot] += 1
+
+    workers = [threading.Thread(target=work, args=(slot,)) for slot in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / (time.perf_counter() - started)
+
+
+def measure_methods(methods, thread_counts, seconds):
+    print(f"{'method':24} {'ms/verify':>10} " + ' '.join(f'{f"{t} thr/s":>10}' for t in thread_counts))
+    for method in methods:
+        stored_hash = generate_password_hash(PASSWORD, method=method)
+        rates = [verifies_per_second(stored_hash, threads, seconds) for threads in thread_counts]
+        print(f"{method:24} {verify_ms(stored_hash):10.1f} " + ' '.join(f'{rate:10.1f}' for rate in rates))
+
+
+def measure_app_logins(logins):
+    # Must be set before the app is imported
+    workdir = tempfile.mkdtemp(prefix='dms-bench-login-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'login.db')
+    os.environ.setdefault('RESULT_CACHE_DIR', os.path.join(workdir, 'cache'))
+    from app import app
+    from extensions import db, passwords
+    from models import User
+    from utils import migrations
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        migrations.upgrade_schema(db)
+        db.session.add(User(username='bench', password=passwords.hash(PASSWORD), role='user'))
+        db.session.commit()
+
+    client = app.test_client()
+
+    def login():
+        started = time.perf_counter()
+        response = client.post('/login', data={'username': 'bench', 'password': PASSWORD})
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 302:
+            raise SystemExit(f'Login failed with status {response.status_code}')
+        client.get('/logout')
+        return elapsed
+
+    timings = sorted(login() for _ in range(logins))
+
+    # A hash made under some other policy is replaced on the next login
+    outdated = 'pbkdf2:sha256:260000' if not passwords.method.startswith('pbkdf2') else 'scrypt:16384:8:1'
+    with app.app_context():
+        user = User.query.filter_by(username='bench').first()
+        user.password = generate_password_hash(PASSWORD, method=outdated)
+        db.session.commit()
+    upgrade_ms = login()
+    with app.app_context():
+        upgraded = not passwords.needs_rehash(User.query.filter_by(username='bench').first().password)
+
+    print(f"\nPOST /login under {passwords.method} ({logins} sign-ins, one worker thread)")
+    print(f"  median {statistics.median(timings):.1f} ms, max {timings[-1]:.1f} ms, "
+          f"{1000 / statistics.mean(timings):.1f} logins/s")
+    print(f"  first login with a {outdated} hash: {upgrade_ms:.1f} ms "
+          f"({'upgraded' if upgraded else 'NOT upgraded'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--methods', default=','.join(DEFAULT_METHODS),
+                        help='comma-separated Werkzeug hash methods')
+    parser.add_argument('--threads', default=f'1,{os.cpu_count() or 1}',
+                        help='comma-separated thread counts for the throughput columns')
+    parser.add_argument('--seconds', type=float, default=2, help='duration of each throughput run')
+    parser.add_argument('--logins', type=int, default=20, help='sign-ins through the app')
+    args = parser.parse_args()
+
+    methods = [method.strip() for method in args.methods.split(',') if method.strip()]
+    thread_counts = sorted({int(count) for count in args.threads.split(',') if count.strip()})
+    measure_methods(methods, thread_counts, args.seconds)
+    measure_app_logins(args.logins)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""Route benchmarks at several data sizes, written out as JSON.
+
+    python -m benchmarks.run [--sizes small,medium] [--repeat 20] [--output results.json]
+
+Each size runs in its own process against a freshly generated throwaway
+SQLite database, so sizes don't share caches or memory. For every route
+the runner records latency percentiles, SQL statements per request and
+the peak Python memory allocated while serving one request. Compare two
+result files to spot regressions between versions.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# children, programs, numeric fields per program, program entries
+SIZES = {
+    'small': {'children': 1000, 'programs': 5, 'fields': 5, 'entries': 10000},
+    'medium': {'children': 10000, 'programs': 20, 'fields': 8, 'entries': 100000},
+    'large': {'children': 50000, 'programs': 50, 'fields': 10, 'entries': 500000},
+}
+
+# Rows in the CSV posted to import_csv
+IMPORT_ROWS = 1000
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def routes(program_id):
+    """(name, method, url, form data factory) for each benchmarked route."""
+    from benchmarks.generate import children_csv
+    import io
+
+    year = {'filter-period': 'this-year'}
+    return [
+        ('data_display', 'GET', '/data_display', None),
+        ('data_display_search', 'GET', '/data_display?search=wan', None),
+        ('dashboard', 'POST', '/dashboard', lambda: dict(year)),
+        ('programs_dashboard', 'GET', '/programs/dashboard?filter-period=this-year', None),
+        ('program_chart', 'GET', f'/programs/{program_id}/dashboard.json?filter-period=this-year', None),
+        ('program_series', 'GET',
+         f'/programs/{program_id}/series.json?field=value_1&filter-period=custom&downsample=lttb&max_points=120',
+         None),
+        ('reports', 'POST', '/reports',
+         lambda: {'custom_program_id': str(program_id), 'period': 'this-year'}),
+        ('indicators', 'GET', '/indicators', None),
+        ('indicator_rows', 'GET', '/indicators/education.json', None),
+        ('program_entries', 'GET', f'/programs/{program_id}/entries.json', None),
+        # Last, as every run adds rows
+        ('import_csv', 'POST', '/import_csv',
+         lambda: {'csv_file': (io.BytesIO(children_csv(IMPORT_ROWS)), 'children.csv')}),
+    ]
+
+
+def measure_route(client, counter, method, url, data_factory, repeat):
+    def call():
+        kwargs = {}
+        if data_factory is not None:
+            kwargs['data'] = data_factory()
+            kwargs['content_type'] = 'multipart/form-data'
+        return client.open(url, method=method, **kwargs)
+
+    result = {'method': method, 'url': url}
+    try:
+        response = call()  # Warm-up
+        result['status'] = response.status_code
+
+        timings = []
+        queries = []
+        for _ in range(repeat):
+            counter[0] = 0
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(counter[0])
+
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    except Exception as e:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        result['error'] = f'{type(e).__name__}: {e}'
+        return result
+
+    timings.sort()
+    queries.sort()
+    result.update({
+        'requests': repeat,
+        'latency_ms': {
+            'min': round(timings[0], 3),
+            'p50': round(percentile(timings, 0.50), 3),
+            'p90': round(percentile(timings, 0.90), 3),
+            'p95': round(percentile(timings, 0.95), 3),
+            'p99': round(percentile(timings, 0.99), 3),
+            'max': round(timings[-1], 3),
+            'mean': round(sum(timings) / len(timings), 3),
+        },
+        'queries': {'p50': percentile(queries, 0.50), 'max': queries[-1]},
+        'peak_memory_kb': round(peak / 1024, 1),
+    })
+    return result
+
+
+def run_size(size, database, repeat):
+    """Generate data and benchmark every route; runs in a worker process."""
+    from sqlalchemy import event
+
+    from app import app
+    from extensions import db
+    from models import ProgramDefinition, User
+    from benchmarks.generate import generate
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    # Report a failing route's own exception rather than the error page's
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    with app.app_context():
+        counts = generate(**SIZES[size])
+        program_id = db.session.query(db.func.min(ProgramDefinition.id)).scalar()
+        user_id = User.query.filter_by(username='admin').first().id
+
+        counter = [0]
+
+        def count_statement(*args):
+            counter[0] += 1
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    results = {}
+    for name, method, url, data_factory in routes(program_id):
+        results[name] = measure_route(client, counter, method, url, data_factory, repeat)
+    return {'data': counts, 'database_bytes': os.path.getsize(database), 'routes': results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(results):
+    for size, outcome in results['sizes'].items():
+        print(f"\n{size}: {outcome.get('data')}")
+        if 'error' in outcome:
+            print(f"  failed: {outcome['error']}")
+            continue
+        print(f"  {'route':22} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'peak KiB':>9}")
+        for name, route in outcome['routes'].items():
+            if 'error' in route:
+                print(f"  {name:22} {route.get('status', '-'):>6} {route['error'][:60]}")
+                continue
+            print(f"  {name:22} {route['status']:>6} {route['latency_ms']['p50']:9.2f} "
+                  f"{route['latency_ms']['p95']:9.2f} {route['queries']['p50']:8} "
+                  f"{route['peak_memory_kb']:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='small,medium',
+                        help=f"comma-separated, from: {', '.join(SIZES)}")
+    parser.add_argument('--repeat', type=int, default=20, help='timed requests per route')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--cache', action='store_true',
+                        help='leave the result cache on (default: measure uncached work)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        outcome = run_size(args.worker, args.database, args.repeat)
+        with open(args.result_file, 'w') as f:
+            json.dump(outcome, f)
+        return
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    results = {
+        'started_at': datetime.utcnow().isoformat() + 'Z',
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'result_cache': args.cache,
+        'sizes': {},
+    }
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix=f'dms-bench-{size}-') as workdir:
+            database = os.path.join(workdir, 'bench.db')
+            result_file = os.path.join(workdir, 'result.json')
+            env = dict(os.environ,
+                       DATABASE_URL='sqlite:///' + database,
+                       RESULT_CACHE_DIR=os.path.join(workdir, 'cache'))
+            if not args.cache:
+                env['RESULT_CACHE'] = 'none'
+            print(f'Running {size}...', file=sys.stderr)
+            process = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.run', '--worker', size, '--database', database,
+                 '--repeat', str(args.repeat), '--result-file', result_file],
+                env=env, capture_output=True, text=True,
+            )
+            if process.returncode != 0 or not os.path.exists(result_file):
+                results['sizes'][size] = {'data': SIZES[size], 'error': process.stderr.strip()[-2000:]}
+                continue
+            with open(result_file) as f:
+                results['sizes'][size] = json.load(f)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print_summary(results)
+    print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Cold-start cost of importing the app, as each gunicorn worker or helper script pays it.
+
+    python -m benchmarks.startup [--runs 7] [--module app] [--top 10]
+
+Every run is a fresh interpreter, so nothing is cached between runs
+beyond the OS page cache. It reports the wall time of `import <module>`,
+the database connections and SQL statements made while importing, and,
+with --top, the slowest modules according to `python -X importtime`.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+connections = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+event.listen(Engine, 'connect', lambda *args: connections.append(1))
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'statements': len(statements), 'connections': len(connections)}}))
+"""
+
+
+def probe(module):
+    process = subprocess.run([sys.executable, '-c', PROBE.format(module=module)],
+                             capture_output=True, text=True, check=True)
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module, top):
+    """[(cumulative microseconds, module name), ...] from -X importtime."""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             capture_output=True, text=True, check=True)
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=0, help='also list the N slowest imports')
+    args = parser.parse_args()
+
+    probe(args.module)  # Warm the page cache and any bytecode compilation
+    results = [probe(args.module) for _ in range(args.runs)]
+    timings = sorted(result['seconds'] * 1000 for result in results)
+    print(f"import {args.module}: median {statistics.median(timings):.1f} ms, "
+          f"min {timings[0]:.1f} ms, max {timings[-1]:.1f} ms over {args.runs} runs")
+    print(f"Database connections opened during import: {results[-1]['connections']}, "
+          f"SQL statements: {results[-1]['statements']}")
+
+    if args.top:
+        print(f"\n{'cumulative ms':>13} {'self ms':>8}  module")
+        for cumulative_us, self_us, name in slowest_imports(args.module, args.top):
+            print(f"{cumulative_us / 1000:13.1f} {self_us / 1000:8.1f}  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Per-request cost of the Flask-Login user loader, with and without the user cache.
+
+    python -m benchmarks.user_loader [--requests 2000]
+"""
+import argparse
+import time
+
+from app import app
+from extensions import db, user_cache
+from models import load_user, User
+
+
+def time_calls(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6  # Microseconds per call
+
+
+def measure(count, ttl, user_id):
+    user_cache.ttl = ttl
+    user_cache.invalidate()
+
+    with app.test_request_context():
+        loader_us = time_calls(lambda: load_user(str(user_id)), count)
+        db.session.remove()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    request_us = time_calls(lambda: client.get('/help'), count)
+    return loader_us, request_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        user = User.query.first()
+        if user is None:
+            raise SystemExit('No users in the database; run init_admin.py first')
+        user_id = user.id
+
+    configured_ttl = user_cache.ttl or 60
+    results = {
+        'uncached': measure(args.requests, 0, user_id),
+        'cached': measure(args.requests, configured_ttl, user_id),
+    }
+    user_cache.ttl = configured_ttl
+
+    print(f"{args.requests} calls each; microseconds per call")
+    print(f"{'':10} {'load_user':>10} {'GET /help':>10}")
+    for name, (loader_us, request_us) in results.items():
+        print(f"{name:10} {loader_us:10.1f} {request_us:10.1f}")
+    saving = results['uncached'][1] - results['cached'][1]
+    print(f"Saving per request: {saving:.1f} us "
+          f"({saving / results['uncached'][1]:.0%} of an uncached /help)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
-from app import app, db, User
-from werkzeug.security import generate_password_hash
+from app import app
+from extensions import db, passwords
+from models import User
 
 def check_and_update_users():
     with app.app_context():
@@ -12,7 +13,7 @@ def check_and_update_users():
         # Update admin password
         admin = User.query.filter_by(username='admin').first()
         if admin:
-            admin.password = generate_password_hash('admin', method='pbkdf2:sha256')
+            admin.password = passwords.hash('admin')
             try:
                 db.session.commit()
                 print("\nAdmin password has been updated!")
@@ -1,20 +1,21 @@
-import sqlite3
-from werkzeug.security import generate_password_hash
+from app import app
+from extensions import db, passwords
+from models import User
 
-conn = sqlite3.connect('dms.db')
-cursor = conn.cursor()
+def create_user():
+    username = input("Enter username: ")
+    password = input("Enter password: ")
+    role = input("Enter role (admin or user): ")
 
-username = input("Enter username: ")
-password = input("Enter password: ")
-role = input("Enter role (admin or user): ")
+    with app.app_context():
+        if User.query.filter_by(username=username).first():
+            print(f"Error: user '{username}' already exists")
+            return
 
-hashed_password = generate_password_hash(password)
+        # Hashed under the configured PASSWORD_HASH_METHOD
+        db.session.add(User(username=username, password=passwords.hash(password), role=role))
+        db.session.commit()
+        print("User created successfully!")
 
-try:
-    cursor.execute("INSERT INTO user (username, password, role) VALUES (?, ?, ?)", (username, hashed_password, role))
-    conn.commit()
-    print("User created successfully!")
-except sqlite3.IntegrityError as e:
-    print(f"Error: {e}")
-
-conn.close()
+if __name__ == '__main__':
+    create_user()
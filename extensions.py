@@ -0,0 +1,50 @@
+"""Extension instances shared by the models and views, bound to an app by create_app().
+
+Importing this module has no side effects; nothing touches the database,
+the filesystem or a Flask app until init_app() is called.
+"""
+from flask_login import LoginManager
+from flask_sqlalchemy import SQLAlchemy
+from flask_wtf.csrf import CSRFProtect
+
+from utils.cache import ResultCache
+from utils.jobs import JobRunner
+from utils.metrics import RequestMetrics
+from utils.passwords import PasswordService
+from utils.photos import PhotoStore
+from utils.program_schema import ProgramSchemaRegistry
+from utils.query_budget import QueryTracker
+from utils.user_cache import UserCache
+
+# Initialize SQLAlchemy
+db = SQLAlchemy()
+
+# Initialize Flask-Login
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
+
+csrf = CSRFProtect()
+
+# Background job runner, bound to the app once the Job model exists
+jobs = JobRunner()
+
+# Dashboard and report figures, invalidated by commits to their tables
+result_cache = ResultCache()
+
+# Lightweight user records for the Flask-Login user loader
+user_cache = UserCache()
+
+# Compiled program schemas used to validate every ProgramData write
+program_schemas = ProgramSchemaRegistry()
+
+# Per-endpoint latency and SQL metrics for /metrics (off unless METRICS_ENABLED)
+metrics = RequestMetrics()
+
+# Query budgets and N+1 detection (warns in development, off in production)
+query_tracker = QueryTracker()
+
+# Password hashing under the configured policy
+passwords = PasswordService()
+
+# Child photos, stored under their content hash in UPLOAD_FOLDER
+photo_store = PhotoStore()
@@ -0,0 +1,218 @@
+"""Application factory.
+
+create_app() builds a configured app from the environment. Calling it
+does not connect to the database, create tables or start threads, so it
+is safe to run in a gunicorn master with --preload and in helper
+scripts. Tables are created and migrated by `flask --app app upgrade-db`.
+"""
+import logging
+import os
+from logging.handlers import RotatingFileHandler
+
+from flask import Flask, render_template, request
+
+from extensions import csrf, db, jobs, login_manager, metrics, passwords, photo_store, program_schemas, query_tracker, result_cache, user_cache
+from models import Job, ProgramDefinition, ProgramField
+import views
+from utils import db_profiles
+from utils.config_manager import config_manager
+
+logger = logging.getLogger('dms')
+
+# Startup reports about the database engine, printed to the console at INFO
+db_logger = logging.getLogger('dms.db')
+
+# Absolute path to current directory
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def create_app(config=None):
+    """Build the app; `config` overrides settings before extensions are bound."""
+    app = Flask(__name__)
+
+    # Load configuration
+    app.config.from_object(config_manager._config)
+
+    # Database URL (DATABASE_URL, else the bundled dms.db) and engine profile
+    settings = config_manager.get_config()
+    app.config['SQLALCHEMY_DATABASE_URI'] = settings['SQLALCHEMY_DATABASE_URI']
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DB_PROFILE'] = settings['DB_PROFILE']
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_profiles.engine_options(
+        app.config['DB_PROFILE'], app.config['SQLALCHEMY_DATABASE_URI']
+    )
+
+    # Set secret key for CSRF protection
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+
+    # Child photo uploads, relative to the project unless absolute; created on first upload
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'static/uploads')
+
+    # Default number of children per page in the listing
+    app.config['CHILDREN_PER_PAGE'] = int(os.environ.get('CHILDREN_PER_PAGE', 50))
+
+    # Rows per executemany batch when importing CSV files
+    app.config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+
+    # Rejected-row reports and spooled uploads of CSV imports; each new
+    # import removes the ones older than IMPORT_REPORT_MAX_AGE seconds
+    app.config['IMPORT_REPORT_FOLDER'] = os.environ.get('IMPORT_REPORT_FOLDER', os.path.join(basedir, 'import_reports'))
+    app.config['IMPORT_REPORT_MAX_AGE'] = int(os.environ.get('IMPORT_REPORT_MAX_AGE', 24 * 60 * 60))
+
+    # Records per insert/commit when syncing program submissions through the API
+    app.config['PROGRAM_DATA_BATCH_SIZE'] = int(os.environ.get('PROGRAM_DATA_BATCH_SIZE', 500))
+
+    # Threads available to background jobs in each worker process
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+
+    # Result cache for dashboards and reports: 'memory' (entries per worker,
+    # invalidations passed on through marker files in RESULT_CACHE_DIR),
+    # 'disk' (shared by the workers on this host) or 'none'
+    app.config['RESULT_CACHE'] = os.environ.get('RESULT_CACHE', 'memory')
+    app.config['RESULT_CACHE_TTL'] = int(os.environ.get('RESULT_CACHE_TTL', 300))
+    app.config['RESULT_CACHE_MAX_ENTRIES'] = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 256))
+    app.config['RESULT_CACHE_DIR'] = os.environ.get('RESULT_CACHE_DIR', os.path.join(basedir, 'cache'))
+
+    # Users loaded per request are cached this long (0 disables); the marker
+    # file tells every worker when a user has changed
+    app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+    app.config['USER_CACHE_MAX_ENTRIES'] = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 1024))
+    app.config['USER_CACHE_MARKER'] = os.path.join(app.config['RESULT_CACHE_DIR'], 'users.generation')
+    app.config['PROGRAM_SCHEMA_MARKER'] = os.path.join(app.config['RESULT_CACHE_DIR'], 'program_schemas.generation')
+
+    # Request/SQL instrumentation served on /metrics. Statements slower than
+    # SLOW_QUERY_MS go to logs/slow_queries.log. Scrapers can authenticate
+    # with METRICS_TOKEN as a bearer token instead of an admin session.
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    app.config['SLOW_QUERY_MS'] = int(os.environ.get('SLOW_QUERY_MS', 200))
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Field devices syncing through POST /api/programs/<id>/data may send
+    # SYNC_TOKEN as a bearer token instead of signing in
+    app.config['SYNC_TOKEN'] = os.environ.get('SYNC_TOKEN')
+
+    # Per-request query tracking: 'off', 'warn' or 'raise' (for tests). A
+    # statement repeated N_PLUS_ONE_THRESHOLD times with different parameters
+    # is reported as N+1; QUERY_BUDGET_DEFAULT applies to undecorated views.
+    app.config['QUERY_TRACKING'] = os.environ.get(
+        'QUERY_TRACKING', 'warn' if app.config['DB_PROFILE'] == 'development' else 'off'
+    )
+    app.config['QUERY_BUDGET_DEFAULT'] = int(os.environ.get('QUERY_BUDGET_DEFAULT', 0))
+    app.config['N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+
+    # Target password hash (Werkzeug method syntax); older hashes are replaced
+    # at login. With PASSWORD_HASH_CONCURRENCY > 0 each worker runs at most
+    # that many hashes at once, and at most PASSWORD_HASH_QUEUE more may wait
+    # up to PASSWORD_HASH_TIMEOUT seconds.
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_CONCURRENCY'] = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 0))
+    app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 16))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
+
+    if config:
+        app.config.update(config)
+
+    configure_logging(app)
+
+    # Add error handlers
+    @app.errorhandler(404)
+    def not_found_error(error):
+        logger.error(f'Page not found: {request.url}')
+        return render_template('errors/404.html'), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        logger.error(f'Server Error: {error}')
+        db.session.rollback()
+        return render_template('errors/500.html'), 500
+
+    # Initialize extensions
+    db.init_app(app)
+    login_manager.init_app(app)
+    csrf.init_app(app)
+    result_cache.init_app(app)
+    user_cache.init_app(app)
+    metrics.init_app(app, db)
+    query_tracker.init_app(app, db)
+    passwords.init_app(app)
+    photo_store.init_app(app)
+    program_schemas.init_app(app, db, ProgramDefinition, ProgramField)
+    jobs.init_app(app, db, Job)
+
+    app.register_blueprint(views.bp)
+
+    with app.app_context():
+        # Registers a listener only; the engine connects on first use
+        db_profiles.install_pragmas(db.engine, app.config['DB_PROFILE'])
+        db_logger.info(
+            f"Database profile '{app.config['DB_PROFILE']}' on "
+            f"{db.engine.url.render_as_string(hide_password=True)} "
+            f"({type(db.engine.pool).__name__})"
+        )
+
+    return app
+
+
+def configure_logging(app):
+    """Attach the file handlers once per process, however many apps are created.
+
+    The logs directory and files are created when the first record is
+    written rather than up front.
+    """
+    logs_dir = os.path.join(basedir, 'logs')
+
+    logging.basicConfig(
+        level=logging.ERROR,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logger.setLevel(logging.ERROR)
+
+    # The engine report goes to the console only. Letting it reach dms.log
+    # would create the log file on every import, CLI call and worker boot.
+    db_logger.setLevel(logging.INFO)
+    db_logger.propagate = False
+    if not db_logger.handlers:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+        db_logger.addHandler(console_handler)
+
+    # Query budget and N+1 reports from the query tracker
+    logging.getLogger('dms.queries').setLevel(logging.WARNING)
+    # Stored validation rules that are skipped when a program schema is compiled
+    logging.getLogger('dms.schema').setLevel(logging.WARNING)
+
+    # Set up file handler for local logging
+    file_handler = _rotating_handler(logger, os.path.join(logs_dir, 'dms.log'), backupCount=10)
+    if file_handler:
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+
+    if app.config['METRICS_ENABLED']:
+        slow_query_logger = logging.getLogger('dms.slow_query')
+        slow_query_logger.setLevel(logging.WARNING)
+        slow_query_logger.propagate = False
+        slow_query_handler = _rotating_handler(slow_query_logger, os.path.join(logs_dir, 'slow_queries.log'),
+                                               backupCount=5)
+        if slow_query_handler:
+            slow_query_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that creates its directory when the file is first opened."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+def _rotating_handler(target, path, backupCount):
+    """Add a RotatingFileHandler for `path` to `target`; None if it already has one."""
+    path = os.path.abspath(path)
+    if any(getattr(handler, 'baseFilename', None) == path for handler in target.handlers):
+        return None
+    handler = LazyRotatingFileHandler(path, maxBytes=1024 * 1024, backupCount=backupCount, delay=True)
+    target.addHandler(handler)
+    return handler
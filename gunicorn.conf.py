@@ -0,0 +1,23 @@
+"""Gunicorn settings, read automatically by `gunicorn app:app`.
+
+The app is imported once in the master and forked into the workers.
+create_app() opens no database connections, and the job and password
+thread pools start their threads on first use, so the workers inherit
+no connections or threads from the master. The engine pool is still
+reset after the fork in case a hook touched the database first.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+preload_app = True
+
+
+def post_fork(server, worker):
+    from app import app
+    from extensions import db
+
+    with app.app_context():
+        # Drop pooled connections inherited from the master without closing
+        # them, which would also close the master's sockets
+        db.engine.dispose(close=False)
@@ -1,22 +1,24 @@
-from app import app, db, User
-from werkzeug.security import generate_password_hash
+from app import app
+from extensions import db, passwords
+from models import User
+from utils import migrations
 
 def init_admin():
     with app.app_context():
-        # Create tables if they don't exist
-        db.create_all()
+        # Create missing tables and apply migrations, as `flask upgrade-db` does
+        migrations.upgrade_schema(db)
         
         # Check if admin user exists
         admin = User.query.filter_by(username='admin').first()
         if admin:
             # Update admin password
-            admin.password = generate_password_hash('admin', method='pbkdf2:sha256')
+            admin.password = passwords.hash('admin')
             admin.role = 'admin'
         else:
             # Create new admin user
             admin = User(
                 username='admin',
-                password=generate_password_hash('admin', method='pbkdf2:sha256'),
+                password=passwords.hash('admin'),
                 role='admin'
             )
             db.session.add(admin)
@@ -1,7 +1,9 @@
 import mysql.connector
 import os
-from app import app, db, User
-from werkzeug.security import generate_password_hash
+from app import app
+from extensions import db, passwords
+from models import User
+from utils import migrations
 
 def create_database():
     # MySQL connection parameters
@@ -40,15 +42,15 @@ def initialize_database():
     # Create tables and admin user
     with app.app_context():
         try:
-            # Create all tables
-            db.create_all()
+            # Create all tables and apply migrations, as `flask upgrade-db` does
+            migrations.upgrade_schema(db)
             
             # Create admin user if not exists
             admin = User.query.filter_by(username='admin').first()
             if not admin:
                 admin = User(
                     username='admin',
-                    password=generate_password_hash('admin123', method='pbkdf2:sha256'),
+                    password=passwords.hash('admin123'),
                     role='admin'
                 )
                 db.session.add(admin)
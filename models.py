@@ -0,0 +1,215 @@
+"""Database models, and the cache invalidation that hangs off their tables."""
+from datetime import datetime
+
+from flask_login import UserMixin
+
+from extensions import db, login_manager, result_cache, user_cache
+from utils.versions import track_versions
+
+@login_manager.user_loader
+def load_user(user_id):
+    return user_cache.get(int(user_id), lambda user_id: db.session.get(User, user_id))
+
+# Database Models
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    role = db.Column(db.String(20), nullable=False, default='user')
+
+    def __repr__(self):
+        return f'<User {self.username}>'
+
+user_cache.watch(db.session, User.__tablename__)
+
+class ProgramDefinition(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    fields = db.relationship('ProgramField', backref='program', lazy=True, cascade='all, delete-orphan')
+    data = db.relationship('ProgramData', backref='program', lazy=True, cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<Program {self.name}>'
+
+class ProgramField(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    program_id = db.Column(db.Integer, db.ForeignKey('program_definition.id'), nullable=False)
+    field_name = db.Column(db.String(50), nullable=False)
+    field_label = db.Column(db.String(100), nullable=False)
+    field_type = db.Column(db.String(20), nullable=False)
+    is_required = db.Column(db.Boolean, default=False)
+    validation_rules = db.Column(db.Text)
+    order = db.Column(db.Integer, default=0)
+
+    def __repr__(self):
+        return f'<ProgramField {self.field_name}>'
+
+class ProgramData(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    program_id = db.Column(db.Integer, db.ForeignKey('program_definition.id'), nullable=False)
+    data = db.Column(db.JSON, nullable=False)
+    entry_date = db.Column(db.Date)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+
+    __table_args__ = (
+        db.Index('ix_program_data_program_entry_date', 'program_id', 'entry_date'),
+        db.Index('ix_program_data_program_created_at', 'program_id', 'created_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<ProgramData {self.id}>'
+
+class ProgramDailyRollup(db.Model):
+    program_id = db.Column(db.Integer, db.ForeignKey('program_definition.id'), primary_key=True)
+    field_name = db.Column(db.String(50), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    value_sum = db.Column(db.Float, nullable=False, default=0)
+    value_count = db.Column(db.Integer, nullable=False, default=0)
+    value_min = db.Column(db.Float)
+    value_max = db.Column(db.Float)
+
+    def __repr__(self):
+        return f'<ProgramDailyRollup {self.program_id} {self.field_name} {self.day}>'
+
+class Children(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    date_of_birth = db.Column(db.Date, nullable=False)
+    gender = db.Column(db.String(10), nullable=False, index=True)
+    guardian_name = db.Column(db.String(100), nullable=False)
+    guardian_contact = db.Column(db.String(20), nullable=False)
+    address = db.Column(db.String(200), nullable=False)
+    date_of_admission = db.Column(db.Date, nullable=False, index=True)
+    nature_of_case = db.Column(db.String(200), nullable=False, index=True)
+    status = db.Column(db.String(50), nullable=False, index=True)
+    photo = db.Column(db.String(200), index=True)
+
+    def __repr__(self):
+        return f'<Children {self.name}>'
+
+class EducationSupportIndicators(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    enrolled_in_high_school = db.Column(db.Integer, default=0)
+    enrolled_in_college = db.Column(db.Integer, default=0)
+    continued_scholarship_support = db.Column(db.Integer, default=0)
+    supported_with_transport = db.Column(db.Integer, default=0)
+    supported_with_upkeep = db.Column(db.Integer, default=0)
+    supported_with_scholastic_materials = db.Column(db.Integer, default=0)
+    supported_with_pocket_money = db.Column(db.Integer, default=0)
+    supported_with_tuition = db.Column(db.Integer, default=0)
+    date_column = db.Column(db.Date, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_education_support_indicators_date_column', 'date_column', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<EducationSupportIndicators {self.id}>'
+
+class FamilySupportProgramIndicators(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    financial_support = db.Column(db.Integer, default=0)
+    housing_support = db.Column(db.Integer, default=0)
+    healthcare_support = db.Column(db.Integer, default=0)
+    food_support = db.Column(db.Integer, default=0)
+    educational_support = db.Column(db.Integer, default=0)
+    employment_support = db.Column(db.Integer, default=0)
+    emotional_support = db.Column(db.Integer, default=0)
+    legal_support = db.Column(db.Integer, default=0)
+    date_column = db.Column(db.Date, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_family_support_program_indicators_date_column', 'date_column', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<FamilySupportProgramIndicators {self.id}>'
+
+class DataVersion(db.Model):
+    """Write counter of one table, for ETags that must change with every write."""
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DataVersion {self.table_name} {self.version}>'
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    message = db.Column(db.String(200))
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+# Tables the cached dashboard and report figures are computed from
+INDICATOR_TABLES = {
+    EducationSupportIndicators.__tablename__,
+    FamilySupportProgramIndicators.__tablename__,
+}
+PROGRAM_TABLES = {
+    ProgramDefinition.__tablename__,
+    ProgramField.__tablename__,
+    ProgramData.__tablename__,
+    ProgramDailyRollup.__tablename__,
+}
+result_cache.watch(db.session, INDICATOR_TABLES | PROGRAM_TABLES)
+
+# Tables the programs API ETags are computed from
+PROGRAM_SCHEMA_TABLES = (ProgramDefinition.__tablename__, ProgramField.__tablename__)
+track_versions(db.session, DataVersion, PROGRAM_SCHEMA_TABLES)
+
+EDUCATION_INDICATOR_FIELDS = [
+    'enrolled_in_high_school',
+    'enrolled_in_college',
+    'continued_scholarship_support',
+    'supported_with_transport',
+    'supported_with_upkeep',
+    'supported_with_scholastic_materials',
+    'supported_with_pocket_money',
+    'supported_with_tuition',
+]
+
+FAMILY_INDICATOR_FIELDS = [
+    'financial_support',
+    'housing_support',
+    'healthcare_support',
+    'food_support',
+    'educational_support',
+    'employment_support',
+    'emotional_support',
+    'legal_support',
+]
+
+# Indicator tables by the name used in URLs
+INDICATOR_PROGRAMS = {
+    'education': (EducationSupportIndicators, EDUCATION_INDICATOR_FIELDS),
+    'family': (FamilySupportProgramIndicators, FAMILY_INDICATOR_FIELDS),
+}
@@ -2,8 +2,10 @@ import os
 import sys
 import shutil
 import subprocess
-from app import app, db, User
-from werkzeug.security import generate_password_hash
+from app import app
+from extensions import db, passwords
+from models import User
+from utils import migrations
 
 def initialize_database():
     print("Initializing database...")
@@ -13,14 +15,14 @@ def initialize_database():
     
     db_path = os.path.join(instance_path, 'children.db')
     with app.app_context():
-        db.create_all()
+        migrations.upgrade_schema(db)
         
         # Create admin user if not exists
         admin = User.query.filter_by(username='admin').first()
         if not admin:
             admin = User(
                 username='admin',
-                password=generate_password_hash('admin123'),
+                password=passwords.hash('admin123'),
                 role='admin'
             )
             db.session.add(admin)
@@ -0,0 +1,78 @@
+import pytest
+
+from extensions import db, passwords
+from factory import create_app
+from models import User
+from utils import migrations
+
+
+@pytest.fixture
+def app_config():
+    """Settings a test module overrides by defining its own app_config fixture."""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, app_config):
+    """An app on a throwaway SQLite database, migrated the way upgrade-db does it."""
+    # Read by create_app() to place the cache marker files
+    monkeypatch.setenv('RESULT_CACHE_DIR', str(tmp_path / 'cache'))
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'dms.db'),
+        'WTF_CSRF_ENABLED': False,
+        'SESSION_COOKIE_SECURE': False,
+        'RESULT_CACHE': 'memory',
+        'QUERY_TRACKING': 'off',
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'IMPORT_REPORT_FOLDER': str(tmp_path / 'import_reports'),
+        # Cheap hashes keep logins fast; tests of the policy set their own
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        **app_config,
+    })
+    with app.app_context():
+        migrations.upgrade_schema(db)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """make_user(username, password='secret', role='user') -> user id."""
+    def make(username, password='secret', role='user'):
+        with app.app_context():
+            user = User(username=username, password=passwords.hash(password), role=role)
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+
+@pytest.fixture
+def login(client):
+    """login(username, password='secret') signs `client` in through /login."""
+    def sign_in(username, password='secret'):
+        response = client.post('/login', data={'username': username, 'password': password})
+        assert response.status_code == 302
+        return response
+    return sign_in
+
+
+@pytest.fixture
+def admin_client(client, make_user, login):
+    make_user('admin', role='admin')
+    login('admin')
+    return client
+
+
+@pytest.fixture
+def user_client(client, make_user, login):
+    make_user('user')
+    login('user')
+    return client
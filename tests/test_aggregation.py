@@ -0,0 +1,121 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models import (
+    EDUCATION_INDICATOR_FIELDS,
+    FAMILY_INDICATOR_FIELDS,
+    EducationSupportIndicators,
+    FamilySupportProgramIndicators,
+    ProgramData,
+    ProgramDefinition,
+    ProgramField,
+)
+from utils import migrations
+from utils.aggregation import entry_date_from_data, numeric_field_stats
+from views import indicator_totals
+
+START = date(2024, 3, 1)
+END = date(2024, 6, 30)
+
+
+def python_totals(model, field_names, start_date=None, end_date=None):
+    """The per-row loop indicator_totals() replaced."""
+    query = model.query
+    if start_date and end_date:
+        query = query.filter(model.date_column.between(start_date, end_date))
+    sums = {f'total_{name}': 0 for name in field_names}
+    for record in query.all():
+        for name in field_names:
+            sums[f'total_{name}'] += getattr(record, name) or 0
+    return sums
+
+
+def seed_indicators(rng, model, field_names, count=120):
+    for _ in range(count):
+        values = {name: rng.choice([None, 0, rng.randint(1, 500)]) for name in field_names}
+        db.session.add(model(date_column=date(2024, 1, 1) + timedelta(days=rng.randint(0, 240)), **values))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('model, field_names', [
+    (EducationSupportIndicators, EDUCATION_INDICATOR_FIELDS),
+    (FamilySupportProgramIndicators, FAMILY_INDICATOR_FIELDS),
+])
+def test_indicator_totals_match_python_sums(app, model, field_names):
+    with app.app_context():
+        seed_indicators(random.Random(1), model, field_names)
+
+        assert indicator_totals(model, field_names) == python_totals(model, field_names)
+        in_range = indicator_totals(model, field_names, START, END)
+        assert in_range == python_totals(model, field_names, START, END)
+        assert in_range != indicator_totals(model, field_names)
+
+
+def test_indicator_totals_are_zero_without_rows(app):
+    with app.app_context():
+        totals = indicator_totals(EducationSupportIndicators, EDUCATION_INDICATOR_FIELDS, START, END)
+        assert totals == {f'total_{name}': 0 for name in EDUCATION_INDICATOR_FIELDS}
+
+
+def test_numeric_field_stats_match_python_sums(app):
+    rng = random.Random(2)
+    with app.app_context():
+        program = ProgramDefinition(name='Outreach')
+        db.session.add(program)
+        db.session.flush()
+        for order, (name, field_type) in enumerate([('date_column', 'date'), ('visits', 'number'),
+                                                    ('meals', 'number'), ('notes', 'text')]):
+            db.session.add(ProgramField(program_id=program.id, field_name=name, field_label=name,
+                                        field_type=field_type, order=order))
+
+        entries = []
+        for _ in range(200):
+            data = {'notes': 'x'}
+            for name in ('visits', 'meals'):
+                value = rng.choice([None, '', 0, rng.randint(1, 50), rng.uniform(0, 10), str(rng.randint(1, 9))])
+                if value is not None or rng.random() < 0.5:
+                    data[name] = value
+            if rng.random() < 0.8:
+                data['date_column'] = (date(2024, 1, 1) + timedelta(days=rng.randint(0, 240))).isoformat()
+            created_at = datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 240))
+            entries.append(ProgramData(program_id=program.id, data=data, created_at=created_at,
+                                       entry_date=entry_date_from_data(data, created_at)))
+        db.session.add_all(entries)
+        db.session.commit()
+
+        stats = numeric_field_stats(db.session, ProgramData, ProgramField,
+                                    start_date=START, end_date=END)[program.id]
+
+        in_range = [entry for entry in entries if START <= entry.entry_date <= END]
+        assert set(stats) == {'visits', 'meals'}
+        for name in ('visits', 'meals'):
+            # What the dashboard computed in Python before the grouped query
+            expected_sum = sum(float(entry.data.get(name, 0) or 0) for entry in in_range)
+            values = [float(entry.data[name] or 0) for entry in in_range if entry.data.get(name) is not None]
+            assert stats[name]['sum'] == pytest.approx(expected_sum)
+            assert stats[name]['count'] == len(values)
+            assert stats[name]['min'] == pytest.approx(min(values))
+            assert stats[name]['max'] == pytest.approx(max(values))
+
+
+@pytest.mark.parametrize('value', [
+    '2024-01-05', '2024-01-05T10:30:00', '2024-1-5', '2024-02-29', '2024-02-30',
+    '2023-02-29', '2024-13-01', '20240105', ' 2024-01-05', '', 'now', 2460000, None,
+])
+def test_entry_date_backfill_matches_write_path(app, value):
+    created_at = datetime(2020, 5, 5, 12)
+    data = {'visits': 1} if value is None else {'date_column': value}
+    with app.app_context():
+        program = ProgramDefinition(name='Dates')
+        db.session.add(program)
+        db.session.flush()
+        entry = ProgramData(program_id=program.id, data=data, created_at=created_at)
+        db.session.add(entry)
+        db.session.commit()
+
+        migrations.upgrade(db.engine, db.metadata)  # Backfills the NULL entry_date in SQL
+        db.session.refresh(entry)
+        assert entry.entry_date == entry_date_from_data(data, created_at)
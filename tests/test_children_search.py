@@ -0,0 +1,38 @@
+from datetime import date
+
+import pytest
+
+from extensions import db
+from models import Children
+
+
+@pytest.fixture
+def children(app):
+    with app.app_context():
+        for name in ('Amina Otieno', 'Brian Otieno', 'Carol C++ Wanjiru'):
+            db.session.add(Children(
+                name=name, date_of_birth=date(2012, 1, 1), gender='F', guardian_name='G',
+                guardian_contact='0700', address='Nairobi', date_of_admission=date(2020, 1, 1),
+                nature_of_case='Neglect', status='Active',
+            ))
+        db.session.commit()
+
+
+def names(client, search):
+    response = client.get('/api/children', query_string={'search': search})
+    assert response.status_code == 200
+    return sorted(child['name'] for child in response.get_json()['children'])
+
+
+def test_search_matches_words_through_the_index(user_client, children):
+    assert names(user_client, 'otieno') == ['Amina Otieno', 'Brian Otieno']
+    assert names(user_client, 'bri oti') == ['Brian Otieno']
+
+
+def test_search_without_words_falls_back_to_name_substring(user_client, children):
+    assert names(user_client, '++') == ['Carol C++ Wanjiru']
+    assert names(user_client, '%%--') == []
+
+
+def test_empty_search_lists_everyone(user_client, children):
+    assert len(names(user_client, '  ')) == 3
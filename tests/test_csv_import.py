@@ -0,0 +1,119 @@
+import csv
+import io
+import os
+import time
+from datetime import date
+
+import pytest
+
+from models import Children
+from utils.csv_import import CHILDREN_CSV_COLUMNS, parse_children_row, remove_expired_files
+
+VALID = ['Amina', '2012-01-31', 'F', 'Grace', '0700', 'Nairobi', '01/15/2020', 'Neglect', 'Active']
+
+
+def csv_upload(*rows):
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(CHILDREN_CSV_COLUMNS)
+    writer.writerows(rows)
+    return io.BytesIO(text.getvalue().encode('utf-8'))
+
+
+def post_import(client, *rows, dry_run=False):
+    data = {'csv_file': (csv_upload(*rows), 'children.csv')}
+    if dry_run:
+        data['dry_run'] = 'on'
+    return client.post('/import_csv', data=data, content_type='multipart/form-data')
+
+
+def report_files(app):
+    folder = app.config['IMPORT_REPORT_FOLDER']
+    return sorted(name for name in os.listdir(folder) if name.endswith('.csv')) if os.path.isdir(folder) else []
+
+
+def children(app):
+    with app.app_context():
+        return [row.name for row in Children.query.order_by(Children.id)]
+
+
+def test_parse_children_row_accepts_each_date_format():
+    record = parse_children_row([' Amina '] + VALID[1:6] + ['31/01/2020'] + VALID[7:])
+    assert record['name'] == 'Amina'
+    assert record['date_of_birth'] == date(2012, 1, 31)
+    assert record['date_of_admission'] == date(2020, 1, 31)
+
+
+@pytest.mark.parametrize('row, message', [
+    (VALID[:5], 'Expected 9 columns, found 5'),
+    ([''] + VALID[1:], 'Name is required'),
+    (VALID[:1] + ['yesterday'] + VALID[2:], "Date 'yesterday' does not match"),
+])
+def test_parse_children_row_rejects(row, message):
+    with pytest.raises(ValueError, match=message):
+        parse_children_row(row)
+
+
+def test_valid_file_is_imported(app, admin_client):
+    response = post_import(admin_client, VALID, ['Baraka'] + VALID[1:])
+    assert response.status_code == 302
+    assert children(app) == ['Amina', 'Baraka']
+    assert report_files(app) == []
+
+
+def test_dry_run_validates_without_importing(app, admin_client):
+    response = post_import(admin_client, VALID, [''] + VALID[1:], dry_run=True)
+    assert response.status_code == 200
+    assert b'Validation Results' in response.data
+    assert b'Valid rows: 1' in response.data and b'Rows rejected: 1' in response.data
+    assert children(app) == []
+    assert len(report_files(app)) == 1
+
+
+def test_rejected_rows_are_reported_and_the_rest_imported(app, admin_client):
+    response = post_import(admin_client, VALID, [], VALID[:1] + ['31-01-2012'] + VALID[2:], VALID[:3])
+    assert response.status_code == 200
+    assert b'Rows imported: 1' in response.data and b'Rows rejected: 2' in response.data
+    assert children(app) == ['Amina']
+
+    token = report_files(app)[0][:-len('.csv')]
+    download = admin_client.get(f'/import_csv/report/{token}')
+    assert download.status_code == 200
+    assert 'import_errors.csv' in download.headers['Content-Disposition']
+    rows = list(csv.reader(io.StringIO(download.get_data(as_text=True))))
+    assert rows[0] == ['row', 'reason'] + CHILDREN_CSV_COLUMNS
+    assert [row[0] for row in rows[1:]] == ['2', '3']  # Blank lines are not counted
+    assert "Date '31-01-2012'" in rows[1][1]
+    assert rows[2][1] == 'Expected 9 columns, found 3'
+
+
+def test_import_removes_expired_reports(app, admin_client):
+    post_import(admin_client, [''] + VALID[1:])
+    post_import(admin_client, [''] + VALID[1:])
+    old, recent = report_files(app)
+    folder = app.config['IMPORT_REPORT_FOLDER']
+    expired = time.time() - app.config['IMPORT_REPORT_MAX_AGE'] - 60
+    os.utime(os.path.join(folder, old), (expired, expired))
+
+    post_import(admin_client, VALID)
+    assert report_files(app) == [recent]
+
+    response = admin_client.get(f"/import_csv/report/{old[:-len('.csv')]}")
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/import_csv')
+
+
+def test_remove_expired_files_only_touches_import_files(tmp_path):
+    for name in ('old.csv', 'old.upload', 'old.txt', 'new.csv'):
+        (tmp_path / name).write_text('x')
+    for name in ('old.csv', 'old.upload', 'old.txt'):
+        os.utime(tmp_path / name, (0, 0))
+    assert remove_expired_files(str(tmp_path), 3600) == 2
+    assert sorted(os.listdir(tmp_path)) == ['new.csv', 'old.txt']
+    assert remove_expired_files(str(tmp_path / 'missing'), 3600) == 0
+
+
+def test_import_needs_an_admin(app, user_client):
+    response = post_import(user_client, VALID)
+    assert response.status_code == 302
+    assert children(app) == []
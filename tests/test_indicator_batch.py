@@ -0,0 +1,126 @@
+from datetime import date
+
+import pytest
+
+from extensions import db, result_cache
+from models import (
+    EDUCATION_INDICATOR_FIELDS,
+    FAMILY_INDICATOR_FIELDS,
+    EducationSupportIndicators,
+    FamilySupportProgramIndicators,
+    INDICATOR_TABLES,
+    PROGRAM_TABLES,
+)
+from views import dashboard_figures, indicator_totals
+
+
+@pytest.fixture
+def rows(app):
+    """{'education': [ids], 'family': [ids]}; family ids start past the education ones."""
+    with app.app_context():
+        education = [EducationSupportIndicators(date_column=date(2024, 1, day), enrolled_in_college=day,
+                                                supported_with_transport=10 * day)
+                     for day in range(1, 4)]
+        db.session.add_all(education)
+        db.session.flush()
+        # Family ids don't overlap, so sending one to the education endpoint is a foreign id
+        db.session.add(FamilySupportProgramIndicators(id=100, date_column=date(2024, 1, 1), food_support=7))
+        db.session.add(FamilySupportProgramIndicators(id=101, date_column=date(2024, 1, 2), food_support=8))
+        db.session.commit()
+        return {'education': [row.id for row in education], 'family': [100, 101]}
+
+
+def column_values(app, model, name):
+    with app.app_context():
+        return dict(db.session.query(model.id, getattr(model, name)).all())
+
+
+def test_mixed_batch_writes_nothing(app, admin_client, rows):
+    first, second, third = rows['education']
+    response = admin_client.post('/indicators/education/batch-update', json={'updates': [
+        {'id': first, 'values': {'enrolled_in_college': 40}},
+        {'id': second, 'values': {'enrolled_in_college': -1}},
+        {'id': third, 'values': {'not_a_field': 1, 'date_column': '2024-02-30'}},
+        {'id': first, 'values': {'supported_with_transport': 2}},
+    ]})
+    assert response.status_code == 400
+    results = response.get_json()['results']
+    assert results == [
+        {'id': second, 'status': 'invalid', 'errors': {'enrolled_in_college': 'must not be negative'}},
+        {'id': third, 'status': 'invalid',
+         'errors': {'not_a_field': 'unknown field', 'date_column': 'must be a date as YYYY-MM-DD'}},
+        {'id': first, 'status': 'invalid', 'errors': {'id': 'appears more than once'}},
+    ]
+    assert column_values(app, EducationSupportIndicators, 'enrolled_in_college') == {
+        first: 1, second: 2, third: 3,
+    }
+
+
+def test_valid_batch_updates_every_record(app, admin_client, rows):
+    first, second, _ = rows['education']
+    response = admin_client.post('/indicators/education/batch-update', json={'updates': [
+        {'id': first, 'values': {'enrolled_in_college': 40}},
+        {'id': second, 'values': {'enrolled_in_college': '41', 'date_column': '2024-03-01'}},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['updated'] == 2
+    values = column_values(app, EducationSupportIndicators, 'enrolled_in_college')
+    assert (values[first], values[second]) == (40, 41)
+    assert column_values(app, EducationSupportIndicators, 'date_column')[second] == date(2024, 3, 1)
+
+
+def test_ids_of_the_other_program_are_not_found(app, admin_client, rows):
+    first = rows['education'][0]
+    family_id = rows['family'][0]
+    response = admin_client.post('/indicators/education/batch-update', json={'updates': [
+        {'id': first, 'values': {'enrolled_in_college': 9}},
+        {'id': family_id, 'values': {'enrolled_in_college': 9}},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {'id': first, 'status': 'updated'}, {'id': family_id, 'status': 'not_found'},
+    ]
+
+    response = admin_client.post('/indicators/education/batch-delete', json={'ids': rows['family']})
+    assert response.status_code == 200
+    assert response.get_json()['deleted'] == 0
+    assert column_values(app, FamilySupportProgramIndicators, 'food_support') == {100: 7, 101: 8}
+
+
+@pytest.mark.parametrize('ids', [[], [1, 1], ['x'], [True], 'all'])
+def test_malformed_delete_is_refused(app, admin_client, rows, ids):
+    response = admin_client.post('/indicators/education/batch-delete', json={'ids': ids})
+    assert response.status_code == 400
+    with app.app_context():
+        assert EducationSupportIndicators.query.count() == 3
+
+
+def test_batch_endpoints_are_admin_only(user_client, rows):
+    assert user_client.post('/indicators/education/batch-delete', json={'ids': rows['education']}).status_code == 403
+    assert user_client.post('/indicators/education/batch-update', json={'updates': [
+        {'id': rows['education'][0], 'values': {'enrolled_in_college': 1}},
+    ]}).status_code == 403
+
+
+def test_totals_are_current_after_a_batch_delete(app, admin_client, rows):
+    def cached_figures():
+        # The dashboard's cached figures
+        return result_cache.get_or_compute(('dashboard', 'all', None, None), INDICATOR_TABLES | PROGRAM_TABLES,
+                                           lambda: dashboard_figures(None, None))
+
+    with app.app_context():
+        before = cached_figures()
+    assert before['education_sums']['total_enrolled_in_college'] == 6
+
+    response = admin_client.post('/indicators/education/batch-delete',
+                                 json={'ids': rows['education'][:2] + [999]})
+    assert response.status_code == 200
+    assert [result['status'] for result in response.get_json()['results']] == ['deleted', 'deleted', 'not_found']
+
+    with app.app_context():
+        after = cached_figures()
+        assert after['education_sums'] == indicator_totals(EducationSupportIndicators, EDUCATION_INDICATOR_FIELDS)
+        assert after['family_sums'] == before['family_sums'] == indicator_totals(
+            FamilySupportProgramIndicators, FAMILY_INDICATOR_FIELDS)
+    assert after['education_sums']['total_enrolled_in_college'] == 3
+    assert after['education_sums']['total_supported_with_transport'] == 30
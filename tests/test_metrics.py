@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.fixture
+def app_config():
+    return {'METRICS_ENABLED': True, 'METRICS_TOKEN': 's3cret'}
+
+
+def test_scraper_authenticates_with_the_bearer_token(client):
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert 'dms_http_requests_total' in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('authorization', ['Bearer wrong', 'Bearer s3crét', 'Bearer €', ''])
+def test_wrong_or_non_ascii_token_is_unauthorized(client, authorization):
+    response = client.get('/metrics', headers={'Authorization': authorization})
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
+
+
+def test_non_ascii_header_still_lets_an_admin_in(admin_client):
+    response = admin_client.get('/metrics', headers={'Authorization': 'Bearer é'})
+    assert response.status_code == 200
+
+
+def test_other_users_are_forbidden(user_client):
+    assert user_client.get('/metrics').status_code == 403
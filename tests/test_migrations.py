@@ -0,0 +1,77 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import ProgramDailyRollup, ProgramData, ProgramDefinition, ProgramField
+from utils import migrations
+from utils.aggregation import entry_date_from_data
+
+
+def add_program_with_entries(visits):
+    program = ProgramDefinition(name='Outreach')
+    db.session.add(program)
+    db.session.flush()
+    for order, (name, field_type) in enumerate([('date_column', 'date'), ('visits', 'number')]):
+        db.session.add(ProgramField(program_id=program.id, field_name=name, field_label=name,
+                                    field_type=field_type, order=order))
+    for value in visits:
+        # Written the way entries were before rollups existed
+        db.session.add(ProgramData(program_id=program.id, data={'date_column': '2024-01-05', 'visits': value},
+                                   created_at=datetime(2024, 1, 5), entry_date=date(2024, 1, 5)))
+    db.session.commit()
+
+
+def test_upgrade_fills_rollups_for_existing_entries(app):
+    with app.app_context():
+        add_program_with_entries([3, 4])
+        assert ProgramDailyRollup.query.count() == 0
+
+        assert migrations.upgrade(db.engine, db.metadata)['program_daily_rollups'] == 1
+        row = ProgramDailyRollup.query.one()
+        assert (row.field_name, row.day, row.value_sum, row.value_count) == ('visits', date(2024, 1, 5), 7.0, 2)
+
+
+def test_upgrade_leaves_existing_rollups_alone(app):
+    with app.app_context():
+        add_program_with_entries([3])
+        migrations.upgrade(db.engine, db.metadata)
+        ProgramDailyRollup.query.update({'value_sum': 100})
+        db.session.commit()
+
+        assert migrations.upgrade(db.engine, db.metadata)['program_daily_rollups'] == 0
+        assert ProgramDailyRollup.query.one().value_sum == 100
+
+
+def test_upgrade_without_entries_writes_no_rollups(app):
+    with app.app_context():
+        assert migrations.upgrade(db.engine, db.metadata)['program_daily_rollups'] == 0
+        assert ProgramDailyRollup.query.count() == 0
+
+
+@pytest.mark.parametrize('value', ['2024-01-05', '2024-01-05T10:30:00', '2024-02-30', '20240105', 'now', 7, None])
+def test_entry_date_backfill_outside_sqlite_uses_the_write_path(app, monkeypatch, value):
+    created_at = datetime(2020, 5, 5, 12)
+    data = {'visits': 1} if value is None else {'date_column': value}
+    with app.app_context():
+        program = ProgramDefinition(name='Dates')
+        db.session.add(program)
+        db.session.flush()
+        entry = ProgramData(program_id=program.id, data=data, created_at=created_at)
+        db.session.add(entry)
+        db.session.commit()
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with db.engine.begin() as connection:
+            # As on MySQL or PostgreSQL, where the SQLite-only UPDATE can't run
+            monkeypatch.setattr(connection.dialect, 'name', 'postgresql')
+            event.listen(connection, 'before_cursor_execute', record)
+            assert migrations.program_data_entry_date(connection, db.metadata) == 1
+        assert not any('GLOB' in statement or 'json_extract' in statement for statement in statements)
+        db.session.refresh(entry)
+        assert entry.entry_date == entry_date_from_data(data, created_at)
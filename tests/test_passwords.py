@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from werkzeug.security import generate_password_hash
+
+from extensions import db, passwords
+from models import User
+from utils import passwords as password_service
+from utils.passwords import hash_method, normalize_method
+
+CURRENT = 'pbkdf2:sha256:1000'  # PASSWORD_HASH_METHOD in conftest
+
+
+@pytest.fixture
+def make_user_with_hash(app):
+    """make_user_with_hash(stored_hash) -> user id, for hashes made under an older policy."""
+    def make(stored_hash, username='legacy'):
+        with app.app_context():
+            user = User(username=username, password=stored_hash, role='user')
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+
+def stored_hash(app, user_id):
+    with app.app_context():
+        return db.session.get(User, user_id).password
+
+
+def post_login(client, username, password):
+    return client.post('/login', data={'username': username, 'password': password})
+
+
+@pytest.mark.parametrize('method, expected', [
+    ('scrypt', 'scrypt:32768:8:1'),
+    ('scrypt:16384', 'scrypt:16384:8:1'),
+    ('pbkdf2:sha256', None),
+    ('pbkdf2:sha512:1000', 'pbkdf2:sha512:1000'),
+])
+def test_normalize_method(method, expected):
+    if expected is None:
+        assert normalize_method(method).startswith('pbkdf2:sha256:')
+    else:
+        assert normalize_method(method) == expected
+
+
+@pytest.mark.parametrize('old_method', ['pbkdf2:sha256:500', 'scrypt:1024:8:1'])
+def test_login_upgrades_an_outdated_hash(app, client, make_user_with_hash, old_method):
+    user_id = make_user_with_hash(generate_password_hash('secret', method=old_method))
+
+    assert post_login(client, 'legacy', 'secret').status_code == 302
+    upgraded = stored_hash(app, user_id)
+    assert hash_method(upgraded) == CURRENT
+
+    client.get('/logout')
+    assert post_login(client, 'legacy', 'secret').status_code == 302
+    assert stored_hash(app, user_id) == upgraded  # Already current: left alone
+
+
+def test_failed_login_keeps_the_old_hash(app, client, make_user_with_hash):
+    old = generate_password_hash('secret', method='pbkdf2:sha256:500')
+    user_id = make_user_with_hash(old)
+    assert post_login(client, 'legacy', 'wrong').status_code == 200
+    assert stored_hash(app, user_id) == old
+
+
+def test_unreadable_hash_fails_the_login_cleanly(app, client, make_user_with_hash):
+    user_id = make_user_with_hash('secret')  # Stored in plain text before hashing existed
+    response = post_login(client, 'legacy', 'secret')
+    assert response.status_code == 200
+    assert b'Invalid username or password' in response.data
+    assert stored_hash(app, user_id) == 'secret'
+
+
+def test_unknown_user_is_refused(client):
+    response = post_login(client, 'nobody', 'secret')
+    assert response.status_code == 200
+    assert b'Invalid username or password' in response.data
+
+
+@pytest.mark.parametrize('app_config', [{
+    'PASSWORD_HASH_CONCURRENCY': 1, 'PASSWORD_HASH_QUEUE': 0, 'PASSWORD_HASH_TIMEOUT': 0.05,
+}])
+def test_login_is_a_503_while_the_hash_pool_is_full(client, make_user):
+    make_user('user')
+    passwords._slots.acquire()  # Another request holds the only slot
+    try:
+        response = post_login(client, 'user', 'secret')
+    finally:
+        passwords._slots.release()
+    assert response.status_code == 503
+    assert post_login(client, 'user', 'secret').status_code == 302
+
+
+def test_login_succeeds_when_storing_the_rehash_fails(app, client, make_user_with_hash, monkeypatch):
+    old = generate_password_hash('secret', method='pbkdf2:sha256:500')
+    user_id = make_user_with_hash(old)
+
+    def locked():
+        raise OperationalError('UPDATE user', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(db.session, 'commit', locked)
+    assert post_login(client, 'legacy', 'secret').status_code == 302
+    monkeypatch.undo()
+    assert stored_hash(app, user_id) == old  # Upgraded on a later login instead
+
+
+@pytest.mark.parametrize('app_config', [{'PASSWORD_HASH_CONCURRENCY': 1}])
+def test_unknown_user_dummy_hash_runs_on_the_hash_pool(client, monkeypatch):
+    threads = []
+
+    def record_thread(password, method):
+        threads.append(threading.current_thread().name)
+        return generate_password_hash(password, method)
+
+    monkeypatch.setattr(password_service, 'generate_password_hash', record_thread)
+    assert post_login(client, 'nobody', 'secret').status_code == 200
+    assert threads and all(name.startswith('password-hash') for name in threads)
@@ -0,0 +1,105 @@
+import hashlib
+import io
+import os
+
+from sqlalchemy.exc import OperationalError
+
+from extensions import db, photo_store
+from models import Children
+
+
+def test_photos_are_stored_in_the_configured_folder(app, tmp_path):
+    assert photo_store.folder == str(tmp_path / 'uploads')
+    assert app.extensions['photo_store'] is photo_store
+
+
+def child_form(name, photo=None, date_of_birth='2012-01-01'):
+    form = {
+        'name': name, 'date_of_birth': date_of_birth, 'gender': 'F', 'guardian_name': 'G',
+        'guardian_contact': '0700', 'address': 'Nairobi', 'date_of_admission': '2020-01-01',
+        'nature_of_case': 'Neglect', 'status': 'Active',
+    }
+    if photo is not None:
+        form['photo'] = (io.BytesIO(photo), 'portrait.jpg')
+    return form
+
+
+def add_child(client, name, photo=None, **form):
+    return client.post('/data_entry', data=child_form(name, photo, **form), content_type='multipart/form-data')
+
+
+def child(app, name):
+    with app.app_context():
+        return Children.query.filter_by(name=name).one()
+
+
+def stored_files():
+    return sorted(os.listdir(photo_store.folder)) if os.path.isdir(photo_store.folder) else []
+
+
+def test_identical_uploads_share_one_file(app, admin_client):
+    assert add_child(admin_client, 'Amina', b'same image').status_code == 302
+    assert add_child(admin_client, 'Baraka', b'same image').status_code == 302
+    name = child(app, 'Amina').photo
+    assert child(app, 'Baraka').photo == name
+    assert name == hashlib.sha256(b'same image').hexdigest() + '.jpg'
+    assert stored_files() == [name]
+
+
+def test_file_is_removed_with_its_last_reference(app, admin_client):
+    add_child(admin_client, 'Amina', b'same image')
+    add_child(admin_client, 'Baraka', b'same image')
+    name = child(app, 'Amina').photo
+
+    admin_client.post(f"/delete_child/{child(app, 'Amina').id}")
+    assert stored_files() == [name]
+    admin_client.post(f"/delete_child/{child(app, 'Baraka').id}")
+    assert stored_files() == []
+
+
+def test_replacing_a_photo_releases_the_old_one_only_when_unused(app, admin_client):
+    add_child(admin_client, 'Amina', b'first')
+    add_child(admin_client, 'Baraka', b'first')
+    first = child(app, 'Amina').photo
+
+    response = admin_client.post(f"/edit_child/{child(app, 'Amina').id}",
+                                 data=child_form('Amina', b'second'), content_type='multipart/form-data')
+    assert response.status_code == 302
+    second = child(app, 'Amina').photo
+    assert stored_files() == sorted([first, second])  # Baraka still uses the first
+
+    admin_client.post(f"/edit_child/{child(app, 'Baraka').id}",
+                      data=child_form('Baraka', b'second'), content_type='multipart/form-data')
+    assert stored_files() == [second]
+
+
+def test_invalid_form_stores_no_photo(app, admin_client):
+    response = add_child(admin_client, 'Amina', b'image', date_of_birth='01/01/2012')
+    assert response.status_code == 200
+    assert stored_files() == []
+
+    add_child(admin_client, 'Baraka', b'kept')
+    kept = child(app, 'Baraka').photo
+    response = admin_client.post(f"/edit_child/{child(app, 'Baraka').id}",
+                                 data=child_form('Baraka', b'other', date_of_birth='never'),
+                                 content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert child(app, 'Baraka').photo == kept
+    assert stored_files() == [kept]
+
+
+def test_failed_commit_removes_the_new_photo(app, admin_client, monkeypatch):
+    add_child(admin_client, 'Amina', b'shared')
+    shared = child(app, 'Amina').photo
+
+    def fail():
+        raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(db.session, 'commit', fail)
+    add_child(admin_client, 'Baraka', b'new')
+    add_child(admin_client, 'Chausiku', b'shared')  # Already used by Amina: kept
+    monkeypatch.undo()
+
+    assert stored_files() == [shared]
+    with app.app_context():
+        assert [row.name for row in Children.query] == ['Amina']
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from extensions import db
+from models import ProgramData, ProgramDefinition, ProgramField
+from utils import rollup
+
+
+@pytest.fixture
+def app_config():
+    # CSRF stays on here, as in production
+    return {'WTF_CSRF_ENABLED': True, 'SYNC_TOKEN': 'sync-token', 'PROGRAM_DATA_BATCH_SIZE': 2}
+
+
+@pytest.fixture
+def program_id(app):
+    with app.app_context():
+        program = ProgramDefinition(name='Outreach')
+        db.session.add(program)
+        db.session.flush()
+        db.session.add(ProgramField(program_id=program.id, field_name='date_column', field_label='Date',
+                                    field_type='date', is_required=True, order=0))
+        db.session.add(ProgramField(program_id=program.id, field_name='visits', field_label='Visits',
+                                    field_type='number', is_required=True, order=1))
+        db.session.commit()
+        return program.id
+
+
+@pytest.fixture
+def session_client(client, make_user):
+    """Signed in through the session cookie, as a browser would be, without a CSRF token."""
+    user_id = make_user('field')
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+def records(count):
+    return [{'date_column': f'2024-01-{day:02d}', 'visits': day} for day in range(1, count + 1)]
+
+
+def stored(app, program_id):
+    with app.app_context():
+        return ProgramData.query.filter_by(program_id=program_id).order_by(ProgramData.id).all()
+
+
+def test_signed_in_json_post_needs_no_csrf_token(app, session_client, program_id):
+    response = session_client.post(f'/api/programs/{program_id}/data', json=records(3))
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 3
+    assert all(row.created_by is not None for row in stored(app, program_id))
+
+
+def test_sync_token_authenticates_ndjson(app, client, program_id):
+    body = '\n'.join(json.dumps(record) for record in records(3))
+    response = client.post(f'/api/programs/{program_id}/data', data=body,
+                           content_type='application/x-ndjson',
+                           headers={'Authorization': 'Bearer sync-token'})
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 3
+    assert [row.created_by for row in stored(app, program_id)] == [None, None, None]
+
+
+@pytest.mark.parametrize('headers', [{}, {'Authorization': 'Bearer wrong'}])
+def test_unauthenticated_requests_get_json_401(client, program_id, headers):
+    response = client.post(f'/api/programs/{program_id}/data', json=records(1), headers=headers)
+    assert response.status_code == 401
+    assert 'error' in response.get_json()
+
+
+def test_form_posts_are_refused(app, session_client, program_id):
+    # What a cross-site form could send; JSON and NDJSON need a CORS preflight
+    response = session_client.post(f'/api/programs/{program_id}/data',
+                                   data={'date_column': '2024-01-01', 'visits': '1'})
+    assert response.status_code == 415
+    assert stored(app, program_id) == []
+
+
+def test_failed_batch_reports_what_was_committed(app, client, program_id, monkeypatch):
+    record_entries = rollup.record_entries
+    calls = []
+
+    def fail_on_second_batch(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError('disk full')
+        return record_entries(*args, **kwargs)
+
+    monkeypatch.setattr(rollup, 'record_entries', fail_on_second_batch)
+    payload = records(5)
+    payload.insert(1, {'visits': 'many'})  # Rejected, but inside the first committed batch
+    response = client.post(f'/api/programs/{program_id}/data', json=payload,
+                           headers={'Authorization': 'Bearer sync-token'})
+
+    assert response.status_code == 500
+    body = response.get_json()
+    assert body['partial'] is True
+    assert body['committed'] == 2
+    assert body['resume_from'] == 3
+    assert [entry['status'] for entry in body['results']] == ['created', 'rejected', 'created']
+    rows = stored(app, program_id)
+    assert [row.id for row in rows] == [body['results'][0]['id'], body['results'][2]['id']]
+
+    # Sending the rest again completes the sync
+    monkeypatch.setattr(rollup, 'record_entries', record_entries)
+    response = client.post(f'/api/programs/{program_id}/data', json=payload[body['resume_from']:],
+                           headers={'Authorization': 'Bearer sync-token'})
+    assert response.status_code == 200
+    assert len(stored(app, program_id)) == 5
@@ -0,0 +1,89 @@
+import json
+import logging
+
+import pytest
+
+from extensions import db
+from models import ProgramData, ProgramDefinition, ProgramField
+from utils.program_schema import compile_rules
+
+
+@pytest.fixture
+def legacy_program(app):
+    """A program saved before field types and rules were validated."""
+    with app.app_context():
+        program = ProgramDefinition(name='Legacy')
+        db.session.add(program)
+        db.session.flush()
+        fields = [
+            ('date_column', 'date', None),
+            ('visits', 'number', {'min': 0, 'min_length': 1}),
+            ('name', 'text', 'not json'),
+            ('colour', 'select', {'options': ['red']}),
+        ]
+        for order, (name, field_type, rules) in enumerate(fields):
+            db.session.add(ProgramField(
+                program_id=program.id, field_name=name, field_label=name.title(), field_type=field_type,
+                is_required=False, order=order,
+                validation_rules=rules if rules is None or isinstance(rules, str) else json.dumps(rules),
+            ))
+        db.session.commit()
+        return program.id
+
+
+def test_compile_rules_rejects_unknown_rules_by_default():
+    with pytest.raises(ValueError, match="min_length"):
+        compile_rules('text', {'min_length': 1})
+
+
+def test_compile_rules_reports_and_skips_with_on_invalid():
+    problems = []
+    validators = compile_rules('number', {'min': 0, 'min_length': 1}, on_invalid=problems.append)
+    assert len(validators) == 1
+    assert problems == ["Invalid validation rule 'min_length': unknown rule"]
+
+
+def test_creating_a_program_still_rejects_unknown_rules(client):
+    response = client.post('/api/programs', json={
+        'name': 'New',
+        'fields': [{'field_name': 'n', 'field_label': 'N', 'field_type': 'text',
+                    'validation_rules': {'min_length': 1}}],
+    })
+    assert response.status_code == 400
+    assert 'min_length' in response.get_json()['error']
+
+
+def test_legacy_program_entry_form_renders(user_client, legacy_program, caplog):
+    with caplog.at_level(logging.WARNING, logger='dms.schema'):
+        response = user_client.get(f'/programs/{legacy_program}/data/new')
+    assert response.status_code == 200
+    assert "'min_length': unknown rule; rule ignored" in caplog.text
+    assert "unknown field type 'select', treated as text" in caplog.text
+
+
+def test_legacy_program_accepts_submissions_with_supported_rules(app, user_client, legacy_program):
+    response = user_client.post(f'/api/programs/{legacy_program}/data', json=[
+        {'date_column': '2024-01-05', 'visits': 3, 'name': 'x', 'colour': 'blue'},
+        {'date_column': '2024-01-06', 'visits': -1},
+    ])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['inserted'] == 1
+    assert body['rejected'] == 1  # min still applies
+    with app.app_context():
+        assert ProgramData.query.filter_by(program_id=legacy_program).count() == 1
+
+
+def test_legacy_program_series(user_client, legacy_program):
+    response = user_client.get(f'/programs/{legacy_program}/series.json', query_string={'field': 'visits'})
+    assert response.status_code == 200
+    assert response.get_json()['field'] == 'visits'
+
+
+def test_check_program_fields_command(app, legacy_program):
+    result = app.test_cli_runner().invoke(args=['check-program-fields'])
+    assert result.exit_code == 0
+    assert "field 'visits': Invalid validation rule 'min_length'" in result.output
+    assert "field 'name': validation_rules must be valid JSON" in result.output
+    assert "field 'colour': unknown field type 'select'" in result.output
+    assert result.output.strip().endswith('4 problems found.')
@@ -0,0 +1,60 @@
+from extensions import db
+from models import DataVersion, ProgramDefinition
+from views import delete_program_job
+
+
+def create_program(client, name):
+    response = client.post('/api/programs', json={
+        'name': name,
+        'fields': [{'field_name': 'visits', 'field_label': 'Visits', 'field_type': 'number'}],
+    })
+    assert response.status_code == 201
+    return response.get_json()['program_id']
+
+
+def delete_program(app, program_id):
+    with app.app_context():
+        delete_program_job(None, program_id)
+        db.session.commit()
+
+
+def test_unchanged_list_is_not_modified(client):
+    create_program(client, 'Outreach')
+    etag = client.get('/api/programs').headers['ETag']
+    response = client.get('/api/programs', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_delete_then_insert_reusing_the_id_changes_the_etag(app, client):
+    create_program(client, 'Outreach')
+    replaced = create_program(client, 'Feeding')
+    etag = client.get('/api/programs').headers['ETag']
+
+    delete_program(app, replaced)
+    # SQLite hands the freed rowid to the next insert: same count, max and sum of ids
+    assert create_program(client, 'Renamed') == replaced
+
+    response = client.get('/api/programs', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Renamed' in [program['name'] for program in response.get_json()['programs']]
+
+
+def test_single_program_etag_changes_when_its_id_is_reused(app, client):
+    replaced = create_program(client, 'Feeding')
+    etag = client.get(f'/api/programs/{replaced}').headers['ETag']
+
+    delete_program(app, replaced)
+    assert create_program(client, 'Renamed') == replaced
+
+    response = client.get(f'/api/programs/{replaced}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'Renamed'
+
+
+def test_rolled_back_write_does_not_bump_versions(app):
+    with app.app_context():
+        before = {row.table_name: row.version for row in DataVersion.query}
+        db.session.add(ProgramDefinition(name='Draft'))
+        db.session.flush()
+        db.session.rollback()
+        assert {row.table_name: row.version for row in DataVersion.query} == before
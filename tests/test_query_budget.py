@@ -0,0 +1,102 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models import (
+    Children,
+    EducationSupportIndicators,
+    FamilySupportProgramIndicators,
+    ProgramData,
+    ProgramDefinition,
+    ProgramField,
+)
+from utils.aggregation import entry_date_from_data
+from utils.query_budget import QueryBudgetError, query_budget
+
+
+@pytest.fixture
+def app_config():
+    return {'QUERY_TRACKING': 'raise'}
+
+
+@pytest.fixture
+def program_ids(app):
+    """Enough programs, fields and entries that a per-row query would repeat."""
+    with app.app_context():
+        programs = []
+        for number in range(6):
+            program = ProgramDefinition(name=f'Program {number}')
+            db.session.add(program)
+            db.session.flush()
+            for order, (name, field_type) in enumerate([('date_column', 'date'), ('visits', 'number'),
+                                                        ('meals', 'number'), ('notes', 'text')]):
+                db.session.add(ProgramField(program_id=program.id, field_name=name, field_label=name.title(),
+                                            field_type=field_type, is_required=False, order=order))
+            for day in range(8):
+                data = {'date_column': (date(2024, 1, 1) + timedelta(days=day)).isoformat(),
+                        'visits': day, 'meals': number, 'notes': 'x'}
+                created_at = datetime(2024, 2, 1)
+                db.session.add(ProgramData(program_id=program.id, data=data, created_at=created_at,
+                                           entry_date=entry_date_from_data(data, created_at)))
+            programs.append(program)
+        for day in range(8):
+            db.session.add(EducationSupportIndicators(enrolled_in_college=day, date_column=date(2024, 1, 1 + day)))
+            db.session.add(FamilySupportProgramIndicators(date_column=date(2024, 1, 1 + day)))
+            db.session.add(Children(
+                name=f'Child {day}', date_of_birth=date(2012, 1, 1), gender='F', guardian_name='G',
+                guardian_contact='0700', address='Nairobi', date_of_admission=date(2020, 1, 1),
+                nature_of_case='Neglect', status='Active',
+            ))
+        db.session.commit()
+        return [program.id for program in programs]
+
+
+@pytest.mark.parametrize('path', [
+    '/data_display',
+    '/reports',
+    '/indicators',
+    '/indicators/education.json',
+    '/indicators/family.json',
+    '/programs/dashboard',
+    '/programs/{id}/dashboard.json',
+    '/programs/{id}/series.json?field=visits',
+    '/programs/{id}/entries.json',
+    '/api/programs',
+    '/api/programs?fields=id,name,field_count,fields',
+    '/api/programs/{id}',
+])
+def test_budgeted_views_stay_within_budget(admin_client, program_ids, path):
+    # Under 'raise', going over the view's @query_budget or an N+1 loop fails the request
+    response = admin_client.get(path.format(id=program_ids[-1]))
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) > 0
+
+
+def test_going_over_budget_raises(app, client, program_ids):
+    @app.route('/test/over-budget')
+    @query_budget(2)
+    def over_budget():
+        for model in (ProgramDefinition, ProgramField, ProgramData):
+            model.query.count()
+        return 'ok'
+
+    with pytest.raises(QueryBudgetError) as excinfo:
+        client.get('/test/over-budget')
+    assert '3 statements, budget 2' in excinfo.value.report
+
+
+def test_n_plus_one_loop_raises_and_names_the_line(app, client, program_ids):
+    @app.route('/test/n-plus-one')
+    def n_plus_one():
+        counts = {}
+        for program in ProgramDefinition.query.all():
+            counts[program.name] = len(program.fields)  # Lazy load: one statement per program
+        return counts
+
+    with pytest.raises(QueryBudgetError) as excinfo:
+        client.get('/test/n-plus-one')
+    report = excinfo.value.report
+    assert 'N+1: 6x' in report
+    assert 'program_field' in report
+    assert 'from tests/test_query_budget.py' in report and 'in n_plus_one' in report
@@ -0,0 +1,98 @@
+from datetime import date
+
+import pytest
+
+from extensions import db, result_cache
+from models import Children, EducationSupportIndicators, INDICATOR_TABLES
+from utils.cache import MemoryBackend, ResultCache
+
+
+@pytest.fixture
+def cached_count(app):
+    """cached_count() -> (education row count, times it was computed), through the result cache."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return EducationSupportIndicators.query.count()
+
+    def lookup():
+        value = result_cache.get_or_compute(('education_count',), INDICATOR_TABLES, compute)
+        return value, len(calls)
+    return lookup
+
+
+def add_indicator():
+    db.session.add(EducationSupportIndicators(enrolled_in_college=1, date_column=date(2024, 1, 1)))
+
+
+def test_repeated_lookups_are_served_from_the_cache(app, cached_count):
+    with app.app_context():
+        assert cached_count() == (0, 1)
+        assert cached_count() == (0, 1)
+
+
+def test_commit_to_a_watched_table_invalidates(app, cached_count):
+    with app.app_context():
+        cached_count()
+        add_indicator()
+        db.session.commit()
+        assert cached_count() == (1, 2)
+
+
+def test_bulk_delete_invalidates(app, cached_count):
+    with app.app_context():
+        add_indicator()
+        db.session.commit()
+        assert cached_count() == (1, 1)
+        EducationSupportIndicators.query.delete()
+        db.session.commit()
+        assert cached_count() == (0, 2)
+
+
+def test_flush_without_commit_does_not_invalidate(app, cached_count):
+    with app.app_context():
+        cached_count()
+        add_indicator()
+        db.session.flush()
+        assert cached_count() == (0, 1)
+        db.session.rollback()
+        assert cached_count() == (0, 1)
+
+
+def test_rolled_back_write_does_not_invalidate_on_a_later_commit(app, cached_count):
+    with app.app_context():
+        cached_count()
+        add_indicator()
+        db.session.flush()
+        db.session.rollback()
+        db.session.add(Children(
+            name='Amina', date_of_birth=date(2012, 1, 1), gender='F', guardian_name='G',
+            guardian_contact='0700', address='Nairobi', date_of_admission=date(2020, 1, 1),
+            nature_of_case='Neglect', status='Active',
+        ))
+        db.session.commit()
+        assert cached_count() == (0, 1)
+
+
+def test_memory_invalidation_reaches_other_workers(tmp_path):
+    # Two workers' backends on one host share only the marker directory
+    first, second = MemoryBackend(marker_dir=str(tmp_path)), MemoryBackend(marker_dir=str(tmp_path))
+    before = second.generation('education_support_indicators')
+    first.bump('education_support_indicators')
+    assert second.generation('education_support_indicators') != before
+    assert second.generation('family_support_program_indicators') == 0
+
+
+def test_commit_in_one_worker_retires_another_workers_entries(app):
+    other_worker = ResultCache()
+    other_worker.backend = MemoryBackend(marker_dir=app.config['RESULT_CACHE_DIR'])
+    with app.app_context():
+        def lookup():
+            return other_worker.get_or_compute(('education_count',), INDICATOR_TABLES,
+                                               EducationSupportIndicators.query.count)
+
+        assert lookup() == 0
+        add_indicator()
+        db.session.commit()  # Invalidates through this worker's result_cache
+        assert lookup() == 1
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, postgresql
+
+from extensions import db
+from models import ProgramDailyRollup, ProgramData, ProgramDefinition, ProgramField
+from utils import rollup
+
+
+@pytest.fixture
+def program_id(app):
+    with app.app_context():
+        program = ProgramDefinition(name='Outreach')
+        db.session.add(program)
+        db.session.flush()
+        for order, (name, field_type) in enumerate([('date_column', 'date'), ('visits', 'number')]):
+            db.session.add(ProgramField(program_id=program.id, field_name=name, field_label=name,
+                                        field_type=field_type, order=order))
+        db.session.commit()
+        return program.id
+
+
+def add_entries(program_id, *visits, day='2024-01-05'):
+    entries = []
+    for value in visits:
+        data = {'date_column': day, 'visits': value}
+        entry = ProgramData(program_id=program_id, data=data, created_at=datetime(2024, 1, 5),
+                            entry_date=date.fromisoformat(day))
+        db.session.add(entry)
+        entries.append(entry)
+    db.session.flush()
+    rollup.record_entries(db.session, ProgramDailyRollup, ['visits'], entries)
+    db.session.commit()
+
+
+def rollup_rows():
+    return [
+        (row.day, row.value_sum, row.value_count, row.value_min, row.value_max)
+        for row in ProgramDailyRollup.query.order_by(ProgramDailyRollup.day)
+    ]
+
+
+def test_writes_add_to_the_day_they_fall_on(app, program_id):
+    with app.app_context():
+        add_entries(program_id, 4, 6)
+        add_entries(program_id, 1)
+        add_entries(program_id, 10, 2)
+        add_entries(program_id, 3, day='2024-01-06')
+        assert rollup_rows() == [
+            (date(2024, 1, 5), 23.0, 5, 1.0, 10.0),
+            (date(2024, 1, 6), 3.0, 1, 3.0, 3.0),
+        ]
+
+        recorded = rollup_rows()
+        rollup.rebuild(db.session, ProgramData, ProgramField, ProgramDailyRollup)
+        db.session.commit()
+        assert rollup_rows() == recorded
+
+
+def test_rows_are_updated_without_reading_them(app, program_id):
+    with app.app_context():
+        add_entries(program_id, 4)
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            rollup.record_entries(db.session, ProgramDailyRollup, ['visits'], [
+                SimpleNamespace(program_id=program_id, data={'visits': 5}, entry_date=date(2024, 1, 5),
+                                created_at=datetime(2024, 1, 5)),
+            ])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        db.session.commit()
+        assert len(statements) == 1 and statements[0].lstrip().upper().startswith('INSERT')
+        assert rollup_rows() == [(date(2024, 1, 5), 9.0, 2, 4.0, 5.0)]
+
+
+@pytest.mark.parametrize('dialect, clause', [
+    (mysql.dialect(), 'ON DUPLICATE KEY UPDATE'),
+    (postgresql.dialect(), 'ON CONFLICT (program_id, field_name, day) DO UPDATE'),
+])
+def test_upsert_compiles_for_server_databases(dialect, clause):
+    statement = rollup._merge_into_rollup(ProgramDailyRollup.__table__, dialect.name)
+    assert clause in str(statement.compile(dialect=dialect))
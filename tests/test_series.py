@@ -0,0 +1,59 @@
+import math
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from utils.series import downsample_series, lttb
+
+
+def wave(count):
+    return [(x, math.sin(x / 7) * 10 + random.Random(x).random()) for x in range(count)]
+
+
+@pytest.mark.parametrize('count, threshold', [(10, 3), (100, 10), (1000, 97), (365, 364), (7, 5)])
+def test_lttb_keeps_the_ends_and_returns_threshold_points(count, threshold):
+    points = wave(count)
+    sampled = lttb(points, threshold)
+    assert len(sampled) == threshold
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    xs = [x for x, _ in sampled]
+    assert xs == sorted(set(xs))  # In order, no point twice
+    assert set(sampled) <= set(points)
+
+
+@pytest.mark.parametrize('count, threshold', [(0, 10), (1, 10), (10, 10), (9, 10), (50, 2), (50, 0)])
+def test_lttb_passes_short_input_through(count, threshold):
+    points = wave(count)
+    sampled = lttb(points, threshold)
+    assert sampled == points
+    assert sampled is not points
+
+
+def test_lttb_keeps_a_spike():
+    points = [(x, 0.0) for x in range(200)]
+    points[123] = (123, 50.0)
+    assert (123, 50.0) in lttb(points, 20)
+
+
+def series(count, start=date(2024, 1, 1)):
+    return [((start + timedelta(days=offset)).isoformat(), float(offset % 9)) for offset in range(count)]
+
+
+def test_downsample_series_keeps_dates_and_ends():
+    full = series(400)
+    sampled = downsample_series(full, 50)
+    assert len(sampled) == 50
+    assert sampled[0] == full[0] and sampled[-1] == full[-1]
+    assert set(sampled) <= set(full)
+
+
+def test_downsample_series_skips_days_without_a_value():
+    full = series(10)
+    full[3] = (full[3][0], None)
+    assert downsample_series(full, 20) == full[:3] + full[4:]
+
+
+def test_downsample_series_passes_short_series_through():
+    full = series(30)
+    assert downsample_series(full, 30) == full
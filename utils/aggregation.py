@@ -0,0 +1,145 @@
+import re
+from datetime import date, datetime
+
+from sqlalchemy import Date, Float, and_, case, cast, func, literal
+
+# date_column counts when its first ten characters are a real calendar date
+# written as YYYY-MM-DD; anything after them (a time, say) is ignored. The
+# SQL and Python versions below must accept exactly the same values.
+ISO_DATE_PREFIX = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+ISO_DATE_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+
+
+def entry_date_expression(data_model):
+    """Date an entry counts towards: its date_column value, else its created_at day.
+
+    Used to backfill ProgramData.entry_date; queries should filter on that column.
+    """
+    day = func.substr(func.json_extract(data_model.data, '$.date_column'), 1, 10)
+    # date() passes impossible days such as 2024-02-30 through unchanged;
+    # adding '+0 days' normalizes them, so only real dates compare equal
+    is_date = and_(day.op('GLOB')(ISO_DATE_GLOB), func.date(day, '+0 days') == day)
+    return func.coalesce(
+        case((is_date, func.date(day))),
+        func.date(data_model.created_at),
+        type_=Date,
+    )
+
+
+def parse_entry_date(value):
+    """The date at the start of a date_column value, or None (see ISO_DATE_PREFIX)."""
+    if not isinstance(value, str) or not ISO_DATE_PREFIX.match(value):
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def entry_date_from_data(data, created_at=None):
+    """Python mirror of entry_date_expression for a single entry."""
+    entry_date = parse_entry_date((data or {}).get('date_column'))
+    if entry_date is not None:
+        return entry_date
+    return (created_at or datetime.utcnow()).date()
+
+
+def numeric_fields(field_model, program_ids=None):
+    """Return {program_id: [ProgramField, ...]} for numeric fields, in form order."""
+    query = field_model.query.filter(field_model.field_type == 'number')
+    if program_ids is not None:
+        query = query.filter(field_model.program_id.in_(program_ids))
+    query = query.order_by(field_model.program_id, field_model.order, field_model.id)
+
+    fields = {}
+    for field in query:
+        fields.setdefault(field.program_id, []).append(field)
+    return fields
+
+
+def _numeric_values(session, data_model, field_model):
+    """Distinct numeric (program_id, field_name) pairs and the per-entry value expression."""
+    fields = (
+        session.query(field_model.program_id, field_model.field_name)
+        .filter(field_model.field_type == 'number')
+        .distinct()
+        .subquery()
+    )
+    path = literal('$."') + fields.c.field_name + literal('"')
+    value = cast(func.json_extract(data_model.data, path), Float)
+    return fields, value
+
+
+def numeric_field_stats(session, data_model, field_model, program_ids=None,
+                        start_date=None, end_date=None, date_expression=None):
+    """Aggregate every numeric field of every program in one grouped query.
+
+    Returns {program_id: {field_name: {'sum', 'count', 'min', 'max'}}}. Only
+    (program, field) pairs with at least one entry in range are present.
+    """
+    fields, value = _numeric_values(session, data_model, field_model)
+
+    query = (
+        session.query(
+            data_model.program_id,
+            fields.c.field_name,
+            func.coalesce(func.sum(value), 0),
+            func.count(value),
+            func.min(value),
+            func.max(value),
+        )
+        .join(fields, fields.c.program_id == data_model.program_id)
+    )
+    if program_ids is not None:
+        query = query.filter(data_model.program_id.in_(program_ids))
+    if start_date and end_date:
+        if date_expression is None:
+            date_expression = data_model.entry_date
+        query = query.filter(date_expression.between(start_date, end_date))
+    query = query.group_by(data_model.program_id, fields.c.field_name)
+
+    stats = {}
+    for program_id, field_name, total, count, minimum, maximum in query:
+        stats.setdefault(program_id, {})[field_name] = {
+            'sum': total,
+            'count': count,
+            'min': minimum,
+            'max': maximum,
+        }
+    return stats
+
+
+def daily_numeric_field_stats(session, data_model, field_model, program_ids=None):
+    """Per-day aggregates of every numeric field, as dicts shaped like ProgramDailyRollup rows."""
+    fields, value = _numeric_values(session, data_model, field_model)
+    day = data_model.entry_date
+
+    query = (
+        session.query(
+            data_model.program_id,
+            fields.c.field_name,
+            day,
+            func.sum(value),
+            func.count(value),
+            func.min(value),
+            func.max(value),
+        )
+        .join(fields, fields.c.program_id == data_model.program_id)
+        .filter(value.isnot(None))
+    )
+    if program_ids is not None:
+        query = query.filter(data_model.program_id.in_(program_ids))
+    query = query.group_by(data_model.program_id, fields.c.field_name, day)
+
+    return [
+        {
+            'program_id': program_id,
+            'field_name': field_name,
+            'day': entry_day,
+            'value_sum': total,
+            'value_count': count,
+            'value_min': minimum,
+            'value_max': maximum,
+        }
+        for program_id, field_name, entry_day, total, count, minimum, maximum in query
+    ]
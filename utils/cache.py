@@ -0,0 +1,324 @@
+import hashlib
+import itertools
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+
+MISSING = object()
+
+
+def watch_tables(session, tables, on_commit):
+    """Call on_commit(written) after each commit on `session` that wrote to `tables`.
+
+    Unit-of-work changes are collected after each flush and bulk
+    statements (query.delete(), Core inserts) as they execute; `written`
+    is the set of watched table names the transaction touched. A rollback
+    discards what was collected.
+    """
+    watched = set(tables)
+    info_key = object()  # Private to this watcher
+
+    def pending(sess):
+        return sess.info.setdefault(info_key, set())
+
+    @event.listens_for(session, 'after_flush')
+    def collect_flushed_tables(sess, flush_context):
+        for obj in itertools.chain(sess.new, sess.dirty, sess.deleted):
+            table = inspect(obj).mapper.local_table.name
+            if table in watched:
+                pending(sess).add(table)
+
+    @event.listens_for(session, 'do_orm_execute')
+    def collect_bulk_tables(orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update
+                or orm_execute_state.is_delete):
+            return
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and getattr(table, 'name', None) in watched:
+            pending(orm_execute_state.session).add(table.name)
+
+    @event.listens_for(session, 'after_commit')
+    def report_committed_tables(sess):
+        written = sess.info.pop(info_key, None)
+        if written:
+            on_commit(written)
+
+    @event.listens_for(session, 'after_rollback')
+    def discard_pending_tables(sess):
+        sess.info.pop(info_key, None)
+
+
+def _replace_file(directory, path, payload):
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as temp:
+            temp.write(payload)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class SharedMarker:
+    """A file whose replacement tells every worker on the host that something changed.
+
+    Checking costs one stat() call, far cheaper than asking the database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._seen = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def changed(self):
+        """True once after each touch() made anywhere since the last check."""
+        current = self._stat()
+        if current == self._seen:
+            return False
+        self._seen = current
+        return True
+
+    def touch(self):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        _replace_file(directory, self.path, uuid.uuid4().hex.encode())
+        self._seen = self._stat()
+
+
+class MemoryBackend:
+    """LRU cache with per-entry expiry, local to one worker process.
+
+    Entries stay in the worker, but with a marker_dir each table's
+    invalidations are passed on to every worker through a SharedMarker, so
+    a commit in one worker retires what the others cached.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_entries=256, marker_dir=None):
+        self.max_entries = max_entries
+        self.marker_dir = marker_dir
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._markers = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _marker(self, tag):
+        marker = self._markers.get(tag)
+        if marker is None and self.marker_dir is not None:
+            marker = self._markers[tag] = SharedMarker(os.path.join(self.marker_dir, f'{tag}.generation'))
+        return marker
+
+    def generation(self, tag):
+        with self._lock:
+            marker = self._marker(tag)
+            if marker is not None and marker.changed():  # Another worker committed
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            return self._generations.get(tag, 0)
+
+    def bump(self, tag):
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            marker = self._marker(tag)
+            if marker is not None:
+                marker.touch()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend:
+    """Pickled entries in a directory shared by every worker on the host.
+
+    Invalidation writes a fresh generation token per table, so a commit in
+    one worker retires the entries every other worker cached. Reads touch
+    the entry file, and the least recently used files go first once there
+    are more than max_entries.
+    """
+
+    name = 'disk'
+
+    def __init__(self, directory, max_entries=256):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + '.entry')
+
+    def _write(self, path, payload):
+        _replace_file(self.directory, path, payload)
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return MISSING
+        if expires_at < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return MISSING
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value, ttl):
+        self._write(self._entry_path(key), pickle.dumps((time.time() + ttl, value)))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.entry'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _generation_path(self, tag):
+        return os.path.join(self.directory, f'{tag}.generation')
+
+    def generation(self, tag):
+        try:
+            with open(self._generation_path(tag)) as f:
+                return f.read()
+        except OSError:
+            return ''
+
+    def bump(self, tag):
+        self._write(self._generation_path(tag), uuid.uuid4().hex.encode())
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith('.entry'))
+
+
+class ResultCache:
+    """Caches computed view data, retiring it when the tables it reads change.
+
+    Every entry is tagged with the tables it was computed from. A commit that
+    wrote to one of those tables bumps the table's generation, which is part
+    of the lookup key, so stale entries are never read again and simply age
+    out. Values must be picklable for the disk backend.
+
+    Configuration: RESULT_CACHE ('memory', 'disk' or 'none'),
+    RESULT_CACHE_TTL (seconds), RESULT_CACHE_MAX_ENTRIES and RESULT_CACHE_DIR
+    (disk entries, or the invalidation markers of the memory backend).
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._counter_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        kind = app.config.get('RESULT_CACHE', 'memory')
+        max_entries = app.config.get('RESULT_CACHE_MAX_ENTRIES', 256)
+        self.ttl = app.config.get('RESULT_CACHE_TTL', 300)
+        if kind == 'memory':
+            self.backend = MemoryBackend(max_entries, app.config.get('RESULT_CACHE_DIR'))
+        elif kind == 'disk':
+            self.backend = DiskBackend(app.config['RESULT_CACHE_DIR'], max_entries)
+        elif kind == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown RESULT_CACHE '{kind}'; expected memory, disk or none")
+        app.extensions['result_cache'] = self
+
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_or_compute(self, key, tables, compute):
+        """Return the cached value for `key`, or compute and store it.
+
+        `key` is a tuple of plain values naming the view and its filters;
+        `tables` are the table names the computation reads.
+        """
+        if self.backend is None or self.ttl <= 0:
+            return compute()
+
+        generations = tuple(self.backend.generation(table) for table in sorted(tables))
+        full_key = repr((key, generations))
+        value = self.backend.get(full_key)
+        if value is not MISSING:
+            self._count('hits')
+            return value
+
+        self._count('misses')
+        value = compute()
+        self.backend.set(full_key, value, self.ttl)
+        return value
+
+    def invalidate(self, tables):
+        if self.backend is None:
+            return
+        for table in tables:
+            self.backend.bump(table)
+            self._count('invalidations')
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend.name if self.backend is not None else 'none',
+            'ttl': self.ttl,
+            'entries': len(self.backend) if self.backend is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            'invalidations': self.invalidations,
+        }
+
+    def watch(self, session, tables):
+        """Invalidate `tables` whenever a commit on `session` has written to them."""
+        watch_tables(session, tables, self.invalidate)
@@ -1,11 +1,24 @@
 import os
 from datetime import timedelta
 
+# The bundled database lives next to app.py
+DEFAULT_DATABASE_URL = 'sqlite:///' + os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dms.db'
+)
+
+def database_url():
+    url = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
 class ConfigManager:
     def __init__(self):
         self._config = {
             'SECRET_KEY': os.environ.get('SECRET_KEY', 'your-secret-key-here'),
-            'SQLALCHEMY_DATABASE_URI': os.environ.get('DATABASE_URL', 'sqlite:///dms.db'),
+            'SQLALCHEMY_DATABASE_URI': database_url(),
+            'DB_PROFILE': os.environ.get('DB_PROFILE', 'production'),
             'SQLALCHEMY_TRACK_MODIFICATIONS': False,
             'UPLOAD_FOLDER': 'static/uploads',
             'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,  # 16MB max file size
@@ -0,0 +1,131 @@
+import csv
+import io
+import os
+import time
+from datetime import datetime
+
+CHILDREN_CSV_COLUMNS = [
+    'name',
+    'date_of_birth',
+    'gender',
+    'guardian_name',
+    'guardian_contact',
+    'address',
+    'date_of_admission',
+    'nature_of_case',
+    'status',
+]
+
+CHILDREN_DATE_COLUMNS = {'date_of_birth', 'date_of_admission'}
+
+
+def parse_date(date_str):
+    """Try parsing date string in multiple formats."""
+    date_formats = ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']
+
+    for fmt in date_formats:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+
+    raise ValueError(f"Date '{date_str}' does not match any of the supported formats: YYYY-MM-DD, M/D/YYYY, D/M/YYYY")
+
+
+def parse_children_row(row):
+    """Validate one CSV row and return it as a dict of Children column values."""
+    if len(row) < len(CHILDREN_CSV_COLUMNS):
+        raise ValueError(f"Expected {len(CHILDREN_CSV_COLUMNS)} columns, found {len(row)}")
+
+    record = {}
+    for name, value in zip(CHILDREN_CSV_COLUMNS, row):
+        value = value.strip()
+        if name in CHILDREN_DATE_COLUMNS:
+            value = parse_date(value)
+        record[name] = value
+    if not record['name']:
+        raise ValueError("Name is required")
+    return record
+
+
+class ImportResult:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.total = 0
+        self.imported = 0
+        self.rejected = 0
+        self.has_report = False
+
+
+def import_children(stream, session, table, batch_size=1000, dry_run=False, report=None,
+                    on_batch=None):
+    """Stream a children CSV upload into `table` in executemany batches.
+
+    The upload is decoded incrementally, so memory use depends on the batch
+    size rather than the file size. Rows that fail validation are skipped
+    and written to `report` (a callable returning a writable text file,
+    opened only on the first rejection) together with the reason. With
+    dry_run nothing is inserted. The caller owns the transaction;
+    `on_batch(result)` runs after each batch, e.g. to commit and report
+    progress.
+    """
+    result = ImportResult(dry_run=dry_run)
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    writer = None
+
+    try:
+        next(reader, None)  # Skip header
+        batch = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue  # Blank line
+            result.total += 1
+            try:
+                record = parse_children_row(row)
+            except ValueError as e:
+                result.rejected += 1
+                if report is not None:
+                    if writer is None:
+                        writer = csv.writer(report())
+                        writer.writerow(['row', 'reason'] + CHILDREN_CSV_COLUMNS)
+                        result.has_report = True
+                    writer.writerow([result.total, str(e)] + row)
+                continue
+
+            result.imported += 1
+            if dry_run:
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                session.execute(table.insert(), batch)
+                batch = []
+                if on_batch is not None:
+                    on_batch(result)
+
+        if batch:
+            session.execute(table.insert(), batch)
+    finally:
+        text.detach()
+
+    return result
+
+
+def remove_expired_files(folder, max_age, suffixes=('.csv', '.upload')):
+    """Delete import reports and spooled uploads older than max_age seconds. Returns the count."""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(suffixes):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass  # Removed by another worker meanwhile
+    return removed
@@ -0,0 +1,72 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# Named database engine profiles, selected with the DB_PROFILE setting.
+#   sqlite_pragmas  - PRAGMAs run on every new SQLite connection
+#   sqlite_options  - engine options for file-backed SQLite databases
+#   server_options  - engine options for client/server databases
+PROFILES = {
+    # SQLAlchemy defaults, as the app ran before profiles existed
+    'development': {
+        'sqlite_pragmas': {},
+        'sqlite_options': {},
+        'server_options': {},
+    },
+    # Several gunicorn workers writing to the same database
+    'production': {
+        'sqlite_pragmas': {
+            'journal_mode': 'WAL',  # Readers no longer block the writer
+            'synchronous': 'NORMAL',  # Durable with WAL, far fewer fsyncs
+            'busy_timeout': 5000,  # Wait for the write lock instead of failing
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # Negative values are KiB: 64 MiB
+            'temp_store': 'MEMORY',
+        },
+        'sqlite_options': {
+            'poolclass': QueuePool,
+            'pool_size': 5,
+            'max_overflow': 10,
+        },
+        'server_options': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_pre_ping': True,
+            'pool_recycle': 1800,
+        },
+    },
+}
+
+
+def get_profile(name):
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown DB_PROFILE '{name}'; expected one of: {', '.join(PROFILES)}")
+
+
+def _is_file_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def engine_options(name, database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for a profile and database URL."""
+    profile = get_profile(name)
+    url = make_url(database_uri)
+    if url.get_backend_name() == 'sqlite':
+        return dict(profile['sqlite_options']) if _is_file_sqlite(url) else {}
+    return dict(profile['server_options'])
+
+
+def install_pragmas(engine, name):
+    """Apply the profile's PRAGMAs to every connection the engine opens."""
+    pragmas = get_profile(name)['sqlite_pragmas']
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
+        cursor.close()
@@ -0,0 +1,31 @@
+import hashlib
+import json
+
+from flask import Response, jsonify, request
+
+
+def compute_etag(*parts):
+    """Strong ETag from JSON-serialisable parts, e.g. a data fingerprint and query args."""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def not_modified(etag):
+    """A 304 response if the client already holds `etag`, else None.
+
+    Check this before building the payload so unchanged polls skip the work.
+    """
+    if not request.if_none_match.contains(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def etag_json(payload, etag):
+    """jsonify(payload), tagged so clients revalidate with If-None-Match."""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows buffered before a chunk is handed to the WSGI server
+CHUNK_ROWS = 500
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_stream(columns, rows):
+    """Yield CSV text in chunks: a header row, then one line per row tuple."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow([_plain(value) for value in row])
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def ndjson_stream(columns, rows):
+    """Yield newline-delimited JSON objects keyed by column name, in chunks."""
+    lines = []
+    for row in rows:
+        record = {column: _plain(value) for column, value in zip(columns, row)}
+        lines.append(json.dumps(record, default=str))
+        if len(lines) >= CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_stream(export_format, columns, rows):
+    if export_format == 'csv':
+        return csv_stream(columns, rows)
+    return ndjson_stream(columns, rows)
+
+
+def flatten_program_rows(rows, field_names):
+    """Spread each ProgramData JSON blob into columns ordered like the program's fields.
+
+    Expects rows of (id, entry_date, created_at, created_by, data).
+    """
+    for entry_id, entry_date, created_at, created_by, data in rows:
+        data = data or {}
+        yield (entry_id, entry_date, created_at, created_by) + tuple(
+            data.get(name) for name in field_names
+        )
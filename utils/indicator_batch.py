@@ -0,0 +1,136 @@
+from datetime import date
+
+from sqlalchemy import delete, select, update
+
+# Most records one batch request may touch
+MAX_BATCH_SIZE = 1000
+
+
+def _parse_id(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError('id must be an integer')
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('id must be an integer') from None
+
+
+def _parse_count(value):
+    if isinstance(value, bool):
+        raise ValueError('must be a whole number')
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError('must be a whole number')
+        value = int(value)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('must be a whole number') from None
+    if value < 0:
+        raise ValueError('must not be negative')
+    return value
+
+
+def _parse_date(value):
+    if value is None or value == '':
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError('must be a date as YYYY-MM-DD') from None
+
+
+def _check_size(items, name):
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"'{name}' must be a non-empty list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} {name} per request")
+
+
+def parse_ids(ids):
+    """Unique integer ids from a JSON list; raises ValueError for the whole list."""
+    _check_size(ids, 'ids')
+    parsed = [_parse_id(value) for value in ids]
+    if len(set(parsed)) != len(parsed):
+        raise ValueError('ids must not repeat')
+    return parsed
+
+
+def validate_updates(updates, field_names):
+    """Check every [{'id': .., 'values': {field: value}}, ...] before anything is written.
+
+    Returns (rows, invalid). rows is a list of {'id': .., column: value}
+    ready for a bulk UPDATE by primary key. invalid is a list of per-record
+    results, and it is empty only when the whole batch is valid. Raises
+    ValueError when the request itself is malformed.
+    """
+    _check_size(updates, 'updates')
+    allowed = set(field_names) | {'date_column'}
+    rows, invalid, seen = [], [], set()
+    for index, item in enumerate(updates):
+        if not isinstance(item, dict):
+            invalid.append({'index': index, 'status': 'invalid', 'errors': {'': 'must be an object'}})
+            continue
+        try:
+            record_id = _parse_id(item.get('id'))
+        except ValueError as e:
+            invalid.append({'index': index, 'status': 'invalid', 'errors': {'id': str(e)}})
+            continue
+
+        values = item.get('values')
+        errors = {}
+        if record_id in seen:
+            errors['id'] = 'appears more than once'
+        seen.add(record_id)
+        if not isinstance(values, dict) or not values:
+            errors['values'] = 'must be a non-empty object'
+            values = {}
+
+        row = {'id': record_id}
+        for name, value in values.items():
+            if name not in allowed:
+                errors[name] = 'unknown field'
+                continue
+            try:
+                row[name] = _parse_date(value) if name == 'date_column' else _parse_count(value)
+            except ValueError as e:
+                errors[name] = str(e)
+
+        if errors:
+            invalid.append({'id': record_id, 'status': 'invalid', 'errors': errors})
+        else:
+            rows.append(row)
+    return rows, invalid
+
+
+def existing_ids(session, model, ids):
+    return set(session.scalars(select(model.id).where(model.id.in_(ids))))
+
+
+def apply_updates(session, model, rows):
+    """Bulk UPDATE by primary key; returns per-id results in request order.
+
+    Ids with no record are reported as not_found and skipped. Rows that
+    change the same columns share one executemany. The caller commits.
+    """
+    found = existing_ids(session, model, [row['id'] for row in rows])
+    groups = {}
+    for row in rows:
+        if row['id'] in found:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+    for group in groups.values():
+        session.execute(update(model), group)
+    return [{'id': row['id'], 'status': 'updated' if row['id'] in found else 'not_found'}
+            for row in rows]
+
+
+def apply_deletes(session, model, ids):
+    """One bulk DELETE for every id; returns per-id results in request order. The caller commits."""
+    found = existing_ids(session, model, ids)
+    if found:
+        session.execute(
+            delete(model).where(model.id.in_(found)),
+            execution_options={'synchronize_session': False},
+        )
+    return [{'id': record_id, 'status': 'deleted' if record_id in found else 'not_found'}
+            for record_id in ids]
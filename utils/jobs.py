@@ -0,0 +1,87 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger('dms')
+
+
+class JobProgress:
+    """Handle given to a running job for reporting how far it has got.
+
+    Progress is written to the job row in the job's own session, so it
+    becomes visible whenever the job commits.
+    """
+
+    def __init__(self, job):
+        self.job = job
+
+    @property
+    def id(self):
+        return self.job.id
+
+    def update(self, done, total=None, message=None):
+        self.job.progress = done
+        if total is not None:
+            self.job.total = total
+        if message is not None:
+            self.job.message = message
+
+
+class JobRunner:
+    """In-process background jobs backed by a thread pool and a Job table.
+
+    Needs no external broker: each gunicorn worker owns a small pool, and the
+    Job rows make status visible to every worker. Jobs still queued or
+    running when their worker exits are lost and stay in that state.
+    """
+
+    def __init__(self, app=None, db=None, job_model=None):
+        self.executor = None
+        if app is not None:
+            self.init_app(app, db, job_model)
+
+    def init_app(self, app, db, job_model):
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('JOB_WORKERS', 2),
+            thread_name_prefix='dms-job',
+        )
+        app.extensions['job_runner'] = self
+
+    def submit(self, kind, func, *args, created_by=None, **kwargs):
+        """Record a queued job, hand it to the pool and return its id.
+
+        `func` is called as func(progress, *args, **kwargs) inside an app
+        context; its return value must be JSON-serialisable.
+        """
+        job = self.job_model(kind=kind, status='queued', created_by=created_by)
+        self.db.session.add(job)
+        self.db.session.commit()
+        self.executor.submit(self._run, job.id, func, args, kwargs)
+        return job.id
+
+    def _run(self, job_id, func, args, kwargs):
+        with self.app.app_context():
+            session = self.db.session
+            job = session.get(self.job_model, job_id)
+            kind = job.kind
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            session.commit()
+
+            try:
+                result = func(JobProgress(job), *args, **kwargs)
+                job.status = 'succeeded'
+                job.result = result
+                job.finished_at = datetime.utcnow()
+                session.commit()
+            except Exception as e:
+                logger.exception(f"Job {job_id} ({kind}) failed")
+                session.rollback()
+                job = session.get(self.job_model, job_id)
+                job.status = 'failed'
+                job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                session.commit()
@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+slow_query_logger = logging.getLogger('dms.slow_query')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Endpoint label for statements run outside a request, e.g. by background jobs
+BACKGROUND = '(background)'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            yield f'{name}_bucket', {**labels, 'le': le}, cumulative
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        rendered = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        name = f'{name}{{{rendered}}}'
+    if isinstance(value, float):
+        value = repr(value)
+    return f'{name} {value}'
+
+
+class RequestMetrics:
+    """Per-endpoint request and SQL metrics, rendered in Prometheus text format.
+
+    With METRICS_ENABLED off, no hooks or engine listeners are installed at
+    all, so the cost is nil. When on, each request pays for two clock reads
+    per SQL statement and a lock to fold its totals in. SLOW_QUERY_MS sets
+    the threshold for the slow-query log. Every gunicorn worker keeps its
+    own figures, so scrape each worker or run a single one.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._latency = {}
+        self._queries = {}
+        self._query_totals = {}
+        self._slow_queries = {}
+        self._collectors = []
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.enabled = bool(app.config.get('METRICS_ENABLED', False))
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_MS', 200) / 1000
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def collector(self, func):
+        """Register func() -> [(name, type, help, [(labels, value), ...]), ...] for /metrics."""
+        self._collectors.append(func)
+        return func
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_query_seconds = 0.0
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or '(unmatched)'
+        queries = g.pop('metrics_queries', 0)
+        query_seconds = g.pop('metrics_query_seconds', 0.0)
+
+        with self._lock:
+            key = (endpoint, request.method, str(response.status_code))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if endpoint not in self._latency:
+                self._latency[endpoint] = Histogram(LATENCY_BUCKETS)
+                self._queries[endpoint] = Histogram(QUERY_COUNT_BUCKETS)
+            self._latency[endpoint].observe(elapsed)
+            self._queries[endpoint].observe(queries)
+            self._add_query_totals(endpoint, queries, query_seconds)
+        return response
+
+    def _add_query_totals(self, endpoint, count, seconds):
+        totals = self._query_totals.setdefault(endpoint, [0, 0.0])
+        totals[0] += count
+        totals[1] += seconds
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get('metrics_query_started')
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+
+        in_request = has_request_context() and 'metrics_started' in g
+        if in_request:
+            g.metrics_queries += 1
+            g.metrics_query_seconds += elapsed
+            endpoint = request.endpoint or '(unmatched)'
+        else:
+            endpoint = BACKGROUND
+            with self._lock:
+                self._add_query_totals(endpoint, 1, elapsed)
+
+        if elapsed >= self.slow_query_seconds:
+            with self._lock:
+                self._slow_queries[endpoint] = self._slow_queries.get(endpoint, 0) + 1
+            slow_query_logger.warning(
+                f"{elapsed * 1000:.1f} ms in {endpoint}: {' '.join(statement.split())[:500]}"
+            )
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        families = []
+        with self._lock:
+            families.append(('dms_http_requests_total', 'counter',
+                             'Requests served, by endpoint, method and status.',
+                             [({'endpoint': e, 'method': m, 'status': s}, n)
+                              for (e, m, s), n in sorted(self._requests.items())]))
+            families.append(('dms_http_request_duration_seconds', 'histogram',
+                             'Request latency by endpoint.',
+                             [sample for endpoint, histogram in sorted(self._latency.items())
+                              for sample in histogram.samples('dms_http_request_duration_seconds',
+                                                              {'endpoint': endpoint})]))
+            families.append(('dms_db_queries_per_request', 'histogram',
+                             'SQL statements issued per request, by endpoint.',
+                             [sample for endpoint, histogram in sorted(self._queries.items())
+                              for sample in histogram.samples('dms_db_queries_per_request',
+                                                              {'endpoint': endpoint})]))
+            families.append(('dms_db_queries_total', 'counter',
+                             'SQL statements executed, by endpoint.',
+                             [({'endpoint': e}, count) for e, (count, _) in sorted(self._query_totals.items())]))
+            families.append(('dms_db_query_seconds_total', 'counter',
+                             'Time spent executing SQL, by endpoint.',
+                             [({'endpoint': e}, seconds) for e, (_, seconds) in sorted(self._query_totals.items())]))
+            families.append(('dms_db_slow_queries_total', 'counter',
+                             'Statements slower than SLOW_QUERY_MS, by endpoint.',
+                             [({'endpoint': e}, n) for e, n in sorted(self._slow_queries.items())]))
+
+        for collect in self._collectors:
+            families.extend(collect())
+
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample in samples:
+                if len(sample) == 3:
+                    lines.append(_format_sample(*sample))
+                else:
+                    labels, value = sample
+                    lines.append(_format_sample(name, labels, value))
+        return '\n'.join(lines) + '\n'
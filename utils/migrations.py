@@ -0,0 +1,138 @@
+from sqlalchemy import bindparam, inspect, select, text
+from sqlalchemy.orm import Session
+
+from utils import rollup, search
+from utils.aggregation import entry_date_expression, entry_date_from_data
+
+
+def _columns(connection, table_name):
+    return {column['name'] for column in inspect(connection).get_columns(table_name)}
+
+
+def program_data_entry_date(connection, metadata):
+    """Promote date_column out of the ProgramData JSON blob into entry_date."""
+    if 'entry_date' not in _columns(connection, 'program_data'):
+        connection.execute(text('ALTER TABLE program_data ADD COLUMN entry_date DATE'))
+
+    program_data = metadata.tables['program_data']
+    if connection.dialect.name != 'sqlite':
+        # entry_date_expression() is SQLite SQL; other databases take the write path's rule
+        return _backfill_entry_dates(connection, program_data)
+    result = connection.execute(
+        program_data.update()
+        .where(program_data.c.entry_date.is_(None))
+        .values(entry_date=entry_date_expression(program_data.c))
+    )
+    return result.rowcount
+
+
+def _backfill_entry_dates(connection, program_data):
+    """Set missing entry dates one row at a time with entry_date_from_data()."""
+    rows = connection.execute(
+        select(program_data.c.id, program_data.c.data, program_data.c.created_at)
+        .where(program_data.c.entry_date.is_(None))
+    ).all()
+    updates = [
+        {'row_id': row_id, 'entry_date': entry_date_from_data(data, created_at)}
+        for row_id, data, created_at in rows
+    ]
+    if updates:
+        connection.execute(
+            program_data.update()
+            .where(program_data.c.id == bindparam('row_id'))
+            .values(entry_date=bindparam('entry_date')),
+            updates,
+        )
+    return len(updates)
+
+
+def create_missing_indexes(connection, metadata):
+    """Create indexes declared on the models that an older database lacks."""
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def children_search_index(connection, metadata):
+    """Create the children_fts full-text index and backfill it on first creation."""
+    if connection.dialect.name != 'sqlite':
+        return 0
+    if search.create_children_fts(connection):
+        return search.rebuild_children_fts(connection)
+    return 0
+
+
+def program_daily_rollups(connection, metadata):
+    """Fill program_daily_rollup on a database whose entries predate it, as rebuild-rollups does."""
+    if connection.dialect.name not in ('sqlite', 'mysql'):
+        return 0  # The rebuild reads the entries with json_extract()
+    rollups = metadata.tables['program_daily_rollup']
+    program_data = metadata.tables['program_data']
+    if (connection.execute(select(rollups.c.program_id).limit(1)).first() is not None
+            or connection.execute(select(program_data.c.id).limit(1)).first() is None):
+        return 0
+    # Imported here: models imports utils, never the other way round
+    from models import ProgramDailyRollup, ProgramData, ProgramField
+    with Session(bind=connection) as session:
+        return rollup.rebuild(session, ProgramData, ProgramField, ProgramDailyRollup)
+
+
+def user_password_length(connection, metadata):
+    """Widen user.password to 255 characters; scrypt hashes run past the old 120."""
+    if connection.dialect.name == 'sqlite':
+        return 0  # SQLite doesn't enforce VARCHAR lengths
+    column = next(c for c in inspect(connection).get_columns('user') if c['name'] == 'password')
+    length = getattr(column['type'], 'length', None)
+    if length is None or length >= 255:
+        return 0
+
+    table = connection.dialect.identifier_preparer.quote('user')
+    if connection.dialect.name == 'mysql':
+        connection.execute(text(f'ALTER TABLE {table} MODIFY password VARCHAR(255) NOT NULL'))
+    else:
+        connection.execute(text(f'ALTER TABLE {table} ALTER COLUMN password TYPE VARCHAR(255)'))
+    return 0
+
+
+def data_version_rows(connection, metadata):
+    """Give every table a data_version counter, so writers only ever UPDATE it."""
+    data_version = metadata.tables['data_version']
+    existing = set(connection.execute(select(data_version.c.table_name)).scalars())
+    missing = [
+        {'table_name': table.name, 'version': 0}
+        for table in metadata.sorted_tables
+        if table.name != data_version.name and table.name not in existing
+    ]
+    if missing:
+        connection.execute(data_version.insert(), missing)
+    return len(missing)
+
+
+# Applied in order by `flask upgrade-db`; every step must be idempotent.
+MIGRATIONS = [
+    program_data_entry_date,
+    create_missing_indexes,
+    children_search_index,
+    program_daily_rollups,
+    user_password_length,
+    data_version_rows,
+]
+
+
+def upgrade(engine, metadata):
+    """Run every migration in one transaction. Returns {name: rows touched}."""
+    results = {}
+    with engine.begin() as connection:
+        for migration in MIGRATIONS:
+            results[migration.__name__] = migration(connection, metadata) or 0
+    return results
+
+
+def upgrade_schema(db):
+    """Create missing tables, then migrate: what `flask upgrade-db` does.
+
+    Setup scripts call this rather than db.create_all(), which alone leaves
+    out the search index, its triggers and in-place column changes.
+    """
+    db.create_all()
+    return upgrade(db.engine, db.metadata)
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.types import Date, DateTime
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe token for the sort key of the last row on a page."""
+    values = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """Inverse of encode_cursor; raises ValueError on a malformed token."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column.type, Date):
+            value = date.fromisoformat(value)
+        decoded.append(value)
+    return decoded
+
+
+def keyset_page(query, sort_column, id_column, cursor=None, per_page=50, descending=False,
+                key=None):
+    """Fetch one page ordered by (sort_column, id_column) starting after cursor.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page. The
+    sort column must be NOT NULL for the seek condition to be exact. `key`
+    extracts (sort value, id) from a row when rows are not plain entities.
+    """
+    columns = [sort_column, id_column]
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, columns)
+        if descending:
+            query = query.filter(or_(
+                sort_column < last_value,
+                and_(sort_column == last_value, id_column < last_id),
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > last_value,
+                and_(sort_column == last_value, id_column > last_id),
+            ))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    # One extra row tells us whether another page exists without a COUNT(*)
+    rows = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        if key is None:
+            values = [getattr(last, sort_column.key), getattr(last, id_column.key)]
+        else:
+            values = list(key(last))
+        next_cursor = encode_cursor(values)
+    return rows, next_cursor
+
+
+def keyset_page_nulls_last(query, sort_column, id_column, cursor=None, per_page=50, descending=False):
+    """keyset_page for a nullable sort column, with NULL rows after all others.
+
+    Dated rows are paged by (sort_column, id_column) as usual, then the NULL
+    rows by id_column in the same direction. A cursor whose sort value is
+    null points into that second run.
+    """
+    last_value, last_id = decode_cursor(cursor, [sort_column, id_column]) if cursor else (None, None)
+
+    rows = []
+    if not cursor or last_value is not None:
+        rows, next_cursor = keyset_page(query.filter(sort_column.isnot(None)), sort_column, id_column,
+                                        cursor=cursor, per_page=per_page, descending=descending)
+        if next_cursor is not None:
+            return rows, next_cursor
+        last_id = None
+
+    null_query = query.filter(sort_column.is_(None))
+    if last_id is not None:
+        null_query = null_query.filter(id_column < last_id if descending else id_column > last_id)
+    remaining = per_page - len(rows)
+    null_rows = null_query.order_by(id_column.desc() if descending else id_column.asc()).limit(remaining + 1).all()
+
+    next_cursor = None
+    if len(null_rows) > remaining:
+        null_rows = null_rows[:remaining]
+        # With no NULL row on this page, the next one starts the NULL run from its beginning
+        next_id = getattr(null_rows[-1], id_column.key) if null_rows else None
+        next_cursor = encode_cursor([None, next_id])
+    return rows + null_rows, next_cursor
@@ -0,0 +1,132 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+# Werkzeug's scrypt defaults, filled in when a method string leaves them out
+SCRYPT_DEFAULTS = ('32768', '8', '1')
+
+
+class PasswordServiceBusy(RuntimeError):
+    """More password checks are waiting than the service allows."""
+
+
+def normalize_method(method):
+    """Method string with every cost parameter spelled out, for comparisons.
+
+    'scrypt' becomes 'scrypt:32768:8:1' and 'pbkdf2:sha256' gains
+    Werkzeug's default iteration count. Other methods come back unchanged.
+    """
+    parts = method.split(':')
+    if parts[0] == 'scrypt':
+        params = parts[1:] + list(SCRYPT_DEFAULTS[len(parts) - 1:])
+        return ':'.join(['scrypt'] + params[:3])
+    if parts[0] == 'pbkdf2':
+        hash_name = parts[1] if len(parts) > 1 else 'sha256'
+        iterations = parts[2] if len(parts) > 2 else str(DEFAULT_PBKDF2_ITERATIONS)
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
+
+
+def check_method(method):
+    """Raise ValueError unless Werkzeug can hash with `method`, without hashing anything."""
+    parts = method.split(':')
+    if parts[0] == 'scrypt':
+        params = parts[1:]
+    elif parts[0] == 'pbkdf2':
+        if len(parts) > 1 and parts[1] not in hashlib.algorithms_available:
+            raise ValueError(f"Unknown hash '{parts[1]}' in password method '{method}'")
+        params = parts[2:]
+    else:
+        raise ValueError(f"Invalid password method '{method}'; expected scrypt or pbkdf2")
+    if not all(param.isdigit() and int(param) > 0 for param in params):
+        raise ValueError(f"Invalid cost parameters in password method '{method}'")
+
+
+def hash_method(stored_hash):
+    """The method part of a stored Werkzeug hash, normalized."""
+    return normalize_method(stored_hash.split('$', 1)[0]) if '$' in stored_hash else ''
+
+
+class PasswordService:
+    """Hashes passwords under one configured policy and upgrades old hashes on login.
+
+    PASSWORD_HASH_METHOD is the target, in Werkzeug's method syntax (for
+    example 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'). A hash made any
+    other way still verifies, and login replaces it with a new one. Use
+    benchmarks/login.py to pick the cost.
+
+    PASSWORD_HASH_CONCURRENCY > 0 runs hashing on that many threads. It
+    caps how many CPU-heavy checks a worker runs at once. At most
+    PASSWORD_HASH_QUEUE further checks may wait, and only for
+    PASSWORD_HASH_TIMEOUT seconds. After that, PasswordServiceBusy is
+    raised instead of tying the worker up. With 0, hashing runs inline.
+    """
+
+    def __init__(self, app=None):
+        self.method = normalize_method('scrypt')
+        self._executor = None
+        self._slots = None
+        self._dummy_hash = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = normalize_method(app.config.get('PASSWORD_HASH_METHOD', 'scrypt'))
+        check_method(self.method)
+        # Made on the first unknown-user login rather than at startup
+        self._dummy_hash = None
+        self.concurrency = app.config.get('PASSWORD_HASH_CONCURRENCY', 0)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 5)
+        if self.concurrency > 0:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                                thread_name_prefix='password-hash')
+            self._slots = threading.BoundedSemaphore(
+                self.concurrency + app.config.get('PASSWORD_HASH_QUEUE', 16)
+            )
+        app.extensions['passwords'] = self
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordServiceBusy('Too many password checks in progress')
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def needs_rehash(self, stored_hash):
+        return hash_method(stored_hash) != self.method
+
+    def verify(self, stored_hash, password):
+        """True if password matches; hashes Werkzeug cannot read simply fail."""
+        def check():
+            try:
+                return check_password_hash(stored_hash, password)
+            except ValueError:
+                return False
+        return self._run(check)
+
+    def authenticate(self, user, password):
+        """Check a login; on success, re-hash an outdated hash on `user`.
+
+        Returns True when the password matches. The caller commits when
+        user.password changed. For an unknown user (None) a dummy hash is
+        still checked, so the response time doesn't reveal which
+        usernames exist.
+        """
+        if user is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash('')
+            self.verify(self._dummy_hash, password)
+            return False
+        if not self.verify(user.password, password):
+            return False
+        if self.needs_rehash(user.password):
+            user.password = self.hash(password)
+        return True
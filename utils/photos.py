@@ -0,0 +1,75 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from werkzeug.utils import secure_filename
+
+# Stored names are the SHA-256 of the content plus the upload's extension
+HASHED_NAME = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9]{1,5})?$')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_digest(name):
+    """The content hash encoded in a stored photo name, or None for legacy names."""
+    match = HASHED_NAME.match(name or '')
+    return match.group(1) if match else None
+
+
+class PhotoStore:
+    """Content-addressed photo files: identical uploads share one file on disk.
+
+    Rows reference photos by stored name, so a file may only be removed once
+    no row points at it; callers pass the remaining reference count to
+    release().
+    """
+
+    def __init__(self, folder=None, app=None):
+        self.folder = folder
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Store photos in UPLOAD_FOLDER; a relative folder is taken from the app's root."""
+        self.folder = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])
+        app.extensions['photo_store'] = self
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def save(self, upload):
+        """Store a werkzeug FileStorage and return its content-addressed name."""
+        os.makedirs(self.folder, exist_ok=True)
+        extension = os.path.splitext(secure_filename(upload.filename or ''))[1].lower()
+        if not re.fullmatch(r'\.[a-z0-9]{1,5}', extension):
+            extension = ''
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in iter(lambda: upload.stream.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    temp.write(chunk)
+
+            name = digest.hexdigest() + extension
+            if os.path.exists(self.path(name)):
+                os.remove(temp_path)  # Already stored
+            else:
+                os.replace(temp_path, self.path(name))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+    def release(self, name, remaining_references):
+        """Delete a stored photo once nothing references it. Returns True if removed."""
+        if not name or remaining_references > 0:
+            return False
+        path = self.path(name)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
@@ -0,0 +1,121 @@
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from utils import rollup
+from utils.aggregation import entry_date_from_data
+from utils.program_schema import ValidationError
+
+
+def json_array_records(payload):
+    """Yield (record, error) pairs from an already parsed JSON array."""
+    for record in payload:
+        yield record, None
+
+
+def ndjson_records(stream):
+    """Yield (record, error) pairs from a newline-delimited JSON byte stream.
+
+    The stream is decoded line by line, so large syncs are never held in
+    memory as a whole. Blank lines are skipped.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    try:
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line), None
+            except ValueError as e:
+                yield None, f"Invalid JSON: {e}"
+    finally:
+        text.detach()
+
+
+class IngestResult:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.received = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.results = []
+
+    def to_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'received': self.received,
+            'inserted': self.inserted,
+            'rejected': self.rejected,
+            'results': self.results,
+        }
+
+
+def ingest_program_records(records, session, schema, data_table, rollup_model, created_by=None,
+                           batch_size=500, dry_run=False, on_batch=None):
+    """Validate submissions against a ProgramSchema and insert them in batches.
+
+    `records` yields (record, error) pairs, as json_array_records() and
+    ndjson_records() do. Each batch is one executemany insert, and the
+    daily rollups of the batch are updated alongside it. The caller owns the
+    transaction: `on_batch(result)` runs after each batch, e.g. to commit.
+    Every record gets an entry in result.results, in input order, with
+    its index and either the new row id or the validation errors.
+    """
+    result = IngestResult(dry_run=dry_run)
+    insert = data_table.insert().returning(data_table.c.id, sort_by_parameter_order=True)
+    batch = []
+    batch_results = []
+
+    def flush_batch():
+        rows = session.execute(insert, batch).all()
+        for entry, (row_id,) in zip(batch_results, rows):
+            entry['id'] = row_id
+        rollup.record_entries(session, rollup_model, schema.numeric_fields, [
+            SimpleNamespace(program_id=row['program_id'], data=row['data'],
+                            entry_date=row['entry_date'], created_at=row['created_at'])
+            for row in batch
+        ])
+        session.flush()
+        batch.clear()
+        batch_results.clear()
+        if on_batch is not None:
+            on_batch(result)
+
+    for index, (record, error) in enumerate(records):
+        result.received += 1
+        if error is None and not isinstance(record, dict):
+            error = "Each record must be a JSON object"
+        if error is None:
+            try:
+                data = schema.clean(record)
+            except ValidationError as e:
+                result.rejected += 1
+                result.results.append({'index': index, 'status': 'rejected', 'errors': e.errors})
+                continue
+        else:
+            result.rejected += 1
+            result.results.append({'index': index, 'status': 'rejected', 'errors': {'_record': error}})
+            continue
+
+        result.inserted += 1
+        entry = {'index': index, 'status': 'valid' if dry_run else 'created'}
+        result.results.append(entry)
+        if dry_run:
+            continue
+
+        created_at = datetime.utcnow()
+        batch.append({
+            'program_id': schema.program_id,
+            'data': data,
+            'entry_date': entry_date_from_data(data, created_at),
+            'created_at': created_at,
+            'created_by': created_by,
+        })
+        batch_results.append(entry)
+        if len(batch) >= batch_size:
+            flush_batch()
+
+    if batch:
+        flush_batch()
+    return result
@@ -0,0 +1,312 @@
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+
+from utils.cache import SharedMarker, watch_tables
+
+logger = logging.getLogger('dms.schema')
+
+FIELD_TYPES = ('text', 'number', 'date', 'textarea')
+
+# The entry date of a submission; defaults to the day it was entered
+DATE_COLUMN = 'date_column'
+
+
+class ValidationError(ValueError):
+    """A submission failed its program's schema; `errors` maps field names to messages."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors.values()))
+
+
+def _is_empty(value):
+    return value is None or value == ''
+
+
+def _parse_date(value):
+    if not isinstance(value, str):
+        raise ValueError("must be a date in YYYY-MM-DD format")
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError("must be a date in YYYY-MM-DD format")
+
+
+def _coerce_number(value):
+    if isinstance(value, bool):
+        raise ValueError("must be a number")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError("must be a number")
+
+
+def _coerce_date(value):
+    return _parse_date(value).strftime('%Y-%m-%d')
+
+
+def _coerce_text(value):
+    return value if isinstance(value, str) else str(value)
+
+
+COERCERS = {
+    'number': _coerce_number,
+    'date': _coerce_date,
+    'text': _coerce_text,
+    'textarea': _coerce_text,
+}
+
+# Value stored for an optional field left empty, as the entry form always has
+EMPTY_VALUES = {
+    'number': 0,
+    'date': None,
+}
+
+
+def _bound_validator(field_type, rule, bound):
+    """Validator for a min/max rule: numeric value, date, or text length."""
+    below = rule == 'min'
+    if field_type == 'number':
+        limit = _coerce_number(bound)
+        measure = lambda value: value
+        describe = f"{'at least' if below else 'at most'} {bound}"
+    elif field_type == 'date':
+        limit = _parse_date(bound)
+        measure = _parse_date
+        describe = f"{'on or after' if below else 'on or before'} {bound}"
+    else:
+        limit = int(bound)
+        measure = len
+        describe = f"{'at least' if below else 'at most'} {bound} characters"
+
+    def validate(value):
+        measured = measure(value)
+        if (measured < limit) if below else (measured > limit):
+            raise ValueError(f"must be {describe}")
+    return validate
+
+
+def _regex_validator(pattern):
+    compiled = re.compile(pattern)
+
+    def validate(value):
+        if not compiled.fullmatch(str(value)):
+            raise ValueError(f"must match {pattern}")
+    return validate
+
+
+def _choices_validator(field_type, choices):
+    if not isinstance(choices, list) or not choices:
+        raise ValueError("choices must be a non-empty list")
+    coerce = COERCERS[field_type]
+    allowed = frozenset(coerce(choice) for choice in choices)
+
+    def validate(value):
+        if value not in allowed:
+            raise ValueError(f"must be one of {', '.join(str(c) for c in choices)}")
+    return validate
+
+
+def _compile_rule(field_type, rule, setting):
+    if rule in ('min', 'max'):
+        return _bound_validator(field_type, rule, setting)
+    if rule == 'regex':
+        return _regex_validator(setting)
+    if rule == 'choices':
+        return _choices_validator(field_type, setting)
+    raise ValueError("unknown rule")
+
+
+def compile_rules(field_type, rules, on_invalid=None):
+    """Build validators from a field's validation_rules.
+
+    Supported rules are min/max (value for numbers, day for dates, length
+    for text), regex (matched against the whole value) and choices.
+    Raises ValueError for unknown or malformed rules, unless on_invalid is
+    given: then on_invalid(message) is called and the rule is skipped.
+    Fields saved before rules were checked may hold anything.
+    """
+    def invalid(message):
+        if on_invalid is None:
+            raise ValueError(message)
+        on_invalid(message)
+
+    if isinstance(rules, str):
+        try:
+            rules = json.loads(rules) if rules.strip() else {}
+        except ValueError:
+            invalid("validation_rules must be valid JSON")
+            return ()
+    rules = rules or {}
+    if not isinstance(rules, dict):
+        invalid("validation_rules must be an object")
+        return ()
+
+    validators = []
+    for rule, setting in rules.items():
+        try:
+            validators.append(_compile_rule(field_type, rule, setting))
+        except (TypeError, ValueError, re.error) as e:
+            invalid(f"Invalid validation rule '{rule}': {e}")
+    return tuple(validators)
+
+
+def stored_field_problems(field):
+    """What compile_schema() would skip or replace on a stored ProgramField, as messages."""
+    problems = []
+    field_type = field.field_type
+    if field_type not in COERCERS:
+        problems.append(f"unknown field type '{field_type}', treated as text")
+        field_type = 'text'
+    compile_rules(field_type, field.validation_rules, on_invalid=problems.append)
+    return problems
+
+
+@dataclass(frozen=True)
+class FieldSchema:
+    name: str
+    label: str
+    type: str
+    required: bool
+    coerce: object
+    validators: tuple
+
+    def clean(self, raw):
+        """Coerce and validate one submitted value; raises ValueError with a message."""
+        if _is_empty(raw):
+            if self.required:
+                raise ValueError(f"{self.label} is required")
+            if self.name == DATE_COLUMN and self.type == 'date':
+                return datetime.now().date().strftime('%Y-%m-%d')
+            return EMPTY_VALUES.get(self.type, raw)
+
+        try:
+            value = self.coerce(raw)
+            for validate in self.validators:
+                validate(value)
+        except ValueError as e:
+            raise ValueError(f"{self.label} {e}")
+        return value
+
+
+@dataclass(frozen=True)
+class ProgramSchema:
+    """A program's fields compiled for validating submissions."""
+
+    program_id: int
+    name: str
+    fields: tuple
+    by_name: MappingProxyType
+    numeric_fields: tuple
+
+    def clean(self, values):
+        """Build the ProgramData payload from submitted values (form or JSON object).
+
+        Raises ValidationError listing every field that failed.
+        """
+        data = {}
+        errors = {}
+        for field in self.fields:
+            try:
+                data[field.name] = field.clean(values.get(field.name))
+            except ValueError as e:
+                errors[field.name] = str(e)
+        if errors:
+            raise ValidationError(errors)
+        return data
+
+
+def compile_schema(program, fields):
+    """Compile a ProgramDefinition and its ProgramField rows into a ProgramSchema.
+
+    Fields are not re-checked strictly: programs saved before field types
+    and rules were validated may hold anything. An unknown type is treated
+    as text and a rule compile_rules() rejects is skipped, both with a
+    warning, so such programs keep working. `flask check-program-fields`
+    lists them.
+    """
+    compiled = []
+    for field in sorted(fields, key=lambda f: (f.order or 0, f.id)):
+        def warn(message, field=field):
+            logger.warning(f"Program {program.id} field '{field.field_name}': {message}")
+
+        field_type = field.field_type
+        if field_type not in COERCERS:
+            warn(f"unknown field type '{field_type}', treated as text")
+            field_type = 'text'
+        compiled.append(FieldSchema(
+            name=field.field_name,
+            label=field.field_label,
+            type=field_type,
+            required=bool(field.is_required),
+            coerce=COERCERS[field_type],
+            validators=compile_rules(field_type, field.validation_rules,
+                                     on_invalid=lambda message: warn(f'{message}; rule ignored')),
+        ))
+    return ProgramSchema(
+        program_id=program.id,
+        name=program.name,
+        fields=tuple(compiled),
+        by_name=MappingProxyType({field.name: field for field in compiled}),
+        numeric_fields=tuple(field.name for field in compiled if field.type == 'number'),
+    )
+
+
+class ProgramSchemaRegistry:
+    """Compiled ProgramSchemas, built on first use and dropped when programs change.
+
+    Commits touching the program or field tables clear the registry, and a
+    SharedMarker (PROGRAM_SCHEMA_MARKER) passes the clear on to other workers.
+    """
+
+    def __init__(self, app=None, db=None, program_model=None, field_model=None):
+        self._schemas = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.marker = None
+        if app is not None:
+            self.init_app(app, db, program_model, field_model)
+
+    def init_app(self, app, db, program_model, field_model):
+        self.db = db
+        self.program_model = program_model
+        self.field_model = field_model
+        self.marker = SharedMarker(app.config['PROGRAM_SCHEMA_MARKER'])
+        watch_tables(
+            db.session,
+            [program_model.__tablename__, field_model.__tablename__],
+            lambda written: self.invalidate()
+        )
+        app.extensions['program_schemas'] = self
+
+    def get(self, program_id):
+        """The schema of a program, or None if it does not exist."""
+        with self._lock:
+            if self.marker.changed():
+                self._schemas.clear()
+                self._generation += 1
+            schema = self._schemas.get(program_id)
+            generation = self._generation
+        if schema is not None:
+            return schema
+
+        program = self.db.session.get(self.program_model, program_id)
+        if program is None:
+            return None
+        fields = self.field_model.query.filter_by(program_id=program_id).all()
+        schema = compile_schema(program, fields)
+        with self._lock:
+            if generation == self._generation:  # Not invalidated while compiling
+                self._schemas[program_id] = schema
+        return schema
+
+    def invalidate(self):
+        with self._lock:
+            self._schemas.clear()
+            self._generation += 1
+            self.marker.touch()
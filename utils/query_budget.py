@@ -0,0 +1,156 @@
+import logging
+import os
+import sys
+from collections import Counter
+from functools import wraps
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+query_logger = logging.getLogger('dms.queries')
+
+MODES = ('off', 'warn', 'raise')
+
+
+class QueryBudgetError(RuntimeError):
+    """A request went over its query budget or repeated a statement N+1 style."""
+
+    def __init__(self, report):
+        super().__init__(report)
+        self.report = report
+
+
+def query_budget(limit):
+    """Declare the most SQL statements one request to this view may issue.
+
+    Put it directly above the view function, below @app.route. It is only
+    enforced while query tracking is on.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.query_budget = limit
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+class RequestQueries:
+    """Statements issued by one request, grouped by shape (the SQL text).
+
+    A shape seen repeatedly with different parameters is what an N+1 loop
+    looks like from the database's side.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = {}
+
+    def add(self, statement, parameters, call_site):
+        self.count += 1
+        shape = self.shapes.get(statement)
+        if shape is None:
+            shape = self.shapes[statement] = {'count': 0, 'parameters': set(), 'call_sites': Counter()}
+        shape['count'] += 1
+        shape['parameters'].add(repr(parameters))
+        if call_site is not None:
+            shape['call_sites'][call_site] += 1
+
+    def repeated(self, threshold):
+        """[(statement, shape), ...] run at least `threshold` times with differing parameters."""
+        return sorted(
+            ((statement, shape) for statement, shape in self.shapes.items()
+             if shape['count'] >= threshold and len(shape['parameters']) > 1),
+            key=lambda item: -item[1]['count'],
+        )
+
+
+class QueryTracker:
+    """Per-request statement counts, query budgets and N+1 detection.
+
+    QUERY_TRACKING picks the mode:
+    - 'off' (the production default) registers nothing.
+    - 'warn' logs a report to dms.queries.
+    - 'raise' fails the request with QueryBudgetError, which is what tests
+      want.
+    Reports name the app code line that issued each repeated statement.
+    Statements issued while a streamed response is being sent are not
+    counted.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.mode = 'off'
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.mode = app.config.get('QUERY_TRACKING', 'off')
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown QUERY_TRACKING mode '{self.mode}'; expected one of: {', '.join(MODES)}")
+        app.extensions['query_tracker'] = self
+        if self.mode == 'off':
+            return
+
+        self.default_budget = app.config.get('QUERY_BUDGET_DEFAULT') or None
+        self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+        self.root = app.root_path + os.sep
+        self.own_file = os.path.abspath(__file__)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _start_request(self):
+        g.request_queries = RequestQueries()
+
+    def _call_site(self):
+        """'file:line in function' for the innermost frame of app code."""
+        frame = sys._getframe(2)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if (filename.startswith(self.root) and filename != self.own_file
+                    and f'{os.sep}site-packages{os.sep}' not in filename):
+                return f'{os.path.relpath(filename, self.root)}:{frame.f_lineno} in {frame.f_code.co_name}'
+            frame = frame.f_back
+        return None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context():
+            return
+        queries = g.get('request_queries')
+        if queries is not None:
+            queries.add(statement, parameters, self._call_site())
+
+    def _finish_request(self, response):
+        queries = g.pop('request_queries', None)
+        if queries is None:
+            return response
+        response.headers['X-Query-Count'] = str(queries.count)
+
+        budget = g.get('query_budget', self.default_budget)
+        over_budget = budget is not None and queries.count > budget
+        repeated = queries.repeated(self.n_plus_one_threshold)
+        if not over_budget and not repeated:
+            return response
+
+        report = self.report(queries, budget, repeated)
+        if self.mode == 'raise':
+            raise QueryBudgetError(report)
+        query_logger.warning(report)
+        return response
+
+    def report(self, queries, budget, repeated):
+        lines = [f'{request.method} {request.path} ({request.endpoint}): {queries.count} statements'
+                 + (f', budget {budget}' if budget is not None else '')]
+        if repeated:
+            listed = [('N+1', statement, shape) for statement, shape in repeated]
+        else:
+            # Over budget without a repeat: show where the statements came from
+            listed = [('', statement, shape) for statement, shape in
+                      sorted(queries.shapes.items(), key=lambda item: -item[1]['count'])[:10]]
+        for label, statement, shape in listed:
+            prefix = f'{label}: ' if label else ''
+            lines.append(f"  {prefix}{shape['count']}x {' '.join(statement.split())[:200]}")
+            for call_site, count in shape['call_sites'].most_common(3):
+                lines.append(f'    {count}x from {call_site}')
+        return '\n'.join(lines)
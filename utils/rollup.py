@@ -0,0 +1,149 @@
+from sqlalchemy import case, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from utils.aggregation import daily_numeric_field_stats, entry_date_from_data
+
+
+def entry_day(entry):
+    """Rollup bucket of an entry; falls back to its JSON for rows not yet backfilled."""
+    return entry.entry_date or entry_date_from_data(entry.data, entry.created_at)
+
+
+def numeric_value(value):
+    """Coerce a stored value the way SQLite's CAST(... AS REAL) does."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def record_entries(session, rollup_model, field_names, entries):
+    """Fold new ProgramData entries into their daily rollup rows.
+
+    Runs inside the caller's transaction, so rollups commit (or roll back)
+    together with the entries themselves. Rows are never read first: each
+    day's totals are added in one upsert.
+    """
+    deltas = {}
+    for entry in entries:
+        day = entry_day(entry)
+        for name in field_names:
+            value = numeric_value(entry.data.get(name))
+            if value is None:
+                continue
+            key = (entry.program_id, name, day)
+            delta = deltas.get(key)
+            if delta is None:
+                deltas[key] = [value, 1, value, value]
+            else:
+                delta[0] += value
+                delta[1] += 1
+                delta[2] = min(delta[2], value)
+                delta[3] = max(delta[3], value)
+
+    if deltas:
+        statement = _merge_into_rollup(rollup_model.__table__, session.get_bind().dialect.name)
+        session.execute(statement, [
+            {
+                'program_id': program_id,
+                'field_name': name,
+                'day': day,
+                'value_sum': total,
+                'value_count': count,
+                'value_min': minimum,
+                'value_max': maximum,
+            }
+            for (program_id, name, day), (total, count, minimum, maximum) in deltas.items()
+        ])
+
+
+def _merge_into_rollup(table, dialect_name):
+    """INSERT of new rollup rows that adds to an existing row for the same day instead.
+
+    The merge happens in the database, so concurrent writers neither lose
+    each other's increments nor collide on the first row of a day.
+    """
+    if dialect_name == 'mysql':
+        statement = mysql.insert(table)
+        new = statement.inserted
+    else:
+        statement = (postgresql if dialect_name == 'postgresql' else sqlite).insert(table)
+        new = statement.excluded
+    merged = {
+        'value_sum': table.c.value_sum + new.value_sum,
+        'value_count': table.c.value_count + new.value_count,
+        'value_min': case((new.value_min < table.c.value_min, new.value_min), else_=table.c.value_min),
+        'value_max': case((new.value_max > table.c.value_max, new.value_max), else_=table.c.value_max),
+    }
+    if dialect_name == 'mysql':
+        return statement.on_duplicate_key_update(**merged)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.program_id, table.c.field_name, table.c.day],
+        set_=merged,
+    )
+
+
+def discard_programs(session, rollup_model, program_ids):
+    """Drop the rollup rows of deleted programs."""
+    session.query(rollup_model).filter(
+        rollup_model.program_id.in_(program_ids)
+    ).delete(synchronize_session=False)
+
+
+def rebuild(session, data_model, field_model, rollup_model, program_ids=None):
+    """Recompute rollup rows from ProgramData. Returns the number of rows written."""
+    query = session.query(rollup_model)
+    if program_ids is not None:
+        query = query.filter(rollup_model.program_id.in_(program_ids))
+    query.delete(synchronize_session=False)
+
+    rows = daily_numeric_field_stats(session, data_model, field_model, program_ids)
+    if rows:
+        session.execute(rollup_model.__table__.insert(), rows)
+    return len(rows)
+
+
+def rollup_stats(session, rollup_model, program_ids=None, start_date=None, end_date=None):
+    """Same result shape as aggregation.numeric_field_stats, read from the rollup table."""
+    query = session.query(
+        rollup_model.program_id,
+        rollup_model.field_name,
+        func.sum(rollup_model.value_sum),
+        func.sum(rollup_model.value_count),
+        func.min(rollup_model.value_min),
+        func.max(rollup_model.value_max),
+    )
+    if program_ids is not None:
+        query = query.filter(rollup_model.program_id.in_(program_ids))
+    if start_date and end_date:
+        query = query.filter(rollup_model.day.between(start_date, end_date))
+    query = query.group_by(rollup_model.program_id, rollup_model.field_name)
+
+    stats = {}
+    for program_id, field_name, total, count, minimum, maximum in query:
+        stats.setdefault(program_id, {})[field_name] = {
+            'sum': total,
+            'count': count,
+            'min': minimum,
+            'max': maximum,
+        }
+    return stats
+
+
+def programs_with_values(session, rollup_model, field_model, start_date=None, end_date=None):
+    """Query of the ids of programs with numeric values in range, ordered by id.
+
+    Reads only the rollup table and field definitions, so callers can count
+    and page through programs before computing any chart data.
+    """
+    query = (
+        session.query(rollup_model.program_id)
+        .join(field_model, (field_model.program_id == rollup_model.program_id)
+              & (field_model.field_name == rollup_model.field_name))
+        .filter(field_model.field_type == 'number', rollup_model.value_count > 0)
+    )
+    if start_date and end_date:
+        query = query.filter(rollup_model.day.between(start_date, end_date))
+    return query.distinct().order_by(rollup_model.program_id)
@@ -0,0 +1,87 @@
+import re
+
+from sqlalchemy import column, func, select, table, text
+
+CHILDREN_FTS_COLUMNS = ['name', 'guardian_name', 'address', 'nature_of_case', 'status']
+
+_columns = ', '.join(CHILDREN_FTS_COLUMNS)
+_new_values = ', '.join(f'new.{name}' for name in CHILDREN_FTS_COLUMNS)
+_old_values = ', '.join(f'old.{name}' for name in CHILDREN_FTS_COLUMNS)
+
+# External-content FTS5 index over children, kept in sync by triggers so raw
+# SQL writes (e.g. the admin scripts) are indexed as well as ORM ones.
+CHILDREN_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS children_fts USING fts5(
+        {_columns},
+        content='children', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS children_fts_ai AFTER INSERT ON children BEGIN
+        INSERT INTO children_fts(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS children_fts_ad AFTER DELETE ON children BEGIN
+        INSERT INTO children_fts(children_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS children_fts_au AFTER UPDATE ON children BEGIN
+        INSERT INTO children_fts(children_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO children_fts(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+]
+
+children_fts = table('children_fts', column('rowid'))
+
+# Engines known to have the index; a miss is not cached so that running
+# `flask upgrade-db` on a live database is picked up without a restart.
+_fts_engines = set()
+
+
+def fts_available(engine):
+    """Whether the children_fts index exists on this engine's database."""
+    if engine in _fts_engines:
+        return True
+    if engine.dialect.name != 'sqlite':
+        return False
+    with engine.connect() as connection:
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'children_fts'"
+        )).first() is not None
+    if exists:
+        _fts_engines.add(engine)
+    return exists
+
+
+def create_children_fts(connection):
+    """Create the index and its triggers; returns True if it did not exist before."""
+    existed = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'children_fts'"
+    )).first() is not None
+    for statement in CHILDREN_FTS_DDL:
+        connection.execute(text(statement))
+    return not existed
+
+
+def rebuild_children_fts(connection):
+    """Re-read every children row into the index. Returns the number of rows indexed."""
+    connection.execute(text("INSERT INTO children_fts(children_fts) VALUES ('rebuild')"))
+    return connection.execute(text('SELECT COUNT(*) FROM children')).scalar()
+
+
+def match_expression(search_text):
+    """Turn free text into an FTS5 query where every word is a quoted prefix term."""
+    terms = re.findall(r'\w+', search_text, re.UNICODE)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def children_matches(search_text):
+    """Subquery of (rowid, rank) for matching children; lower rank is more relevant.
+
+    Returns None when the text has no searchable words.
+    """
+    expression = match_expression(search_text)
+    if not expression:
+        return None
+    return (
+        select(children_fts.c.rowid, func.bm25(text('children_fts')).label('rank'))
+        .where(text('children_fts MATCH :fts_query').bindparams(fts_query=expression))
+        .subquery('children_matches')
+    )
@@ -0,0 +1,115 @@
+from datetime import date
+
+from sqlalchemy import func
+
+BUCKETS = ('day', 'week', 'month')
+AGGREGATES = ('sum', 'avg', 'count')
+
+# Rough bucket widths in days, used to pick a bucket for bucket='auto'
+BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 30}
+
+
+def bucket_expression(column, bucket, dialect):
+    """SQL expression truncating a date column to the start of its bucket.
+
+    Weeks start on Monday.
+    """
+    if bucket == 'day':
+        return column
+    if dialect == 'postgresql':
+        return func.date(func.date_trunc(bucket, column))
+    if bucket == 'week':
+        return func.date(column, 'weekday 0', '-6 days')
+    return func.date(column, 'start of month')
+
+
+def auto_bucket(start_date, end_date, max_points):
+    """The finest bucket that keeps a date range within max_points."""
+    span = (end_date - start_date).days + 1
+    for bucket in BUCKETS:
+        if span / BUCKET_DAYS[bucket] <= max_points:
+            return bucket
+    return BUCKETS[-1]
+
+
+def date_range(session, rollup_model, program_id, field_name):
+    """(first day, last day) with values for one field, or (None, None)."""
+    return session.query(func.min(rollup_model.day), func.max(rollup_model.day)).filter(
+        rollup_model.program_id == program_id,
+        rollup_model.field_name == field_name,
+    ).one()
+
+
+def field_series(session, rollup_model, program_id, field_name, bucket='day', aggregate='sum',
+                 start_date=None, end_date=None):
+    """[(bucket start as YYYY-MM-DD, value), ...] for one field, aggregated in SQL.
+
+    Reads the daily rollups, so avg is the true mean of the entries in each
+    bucket (total over count), not a mean of daily means.
+    """
+    period = bucket_expression(rollup_model.day, bucket, session.get_bind().dialect.name).label('period')
+    total = func.sum(rollup_model.value_sum)
+    count = func.sum(rollup_model.value_count)
+    value = {
+        'sum': total,
+        'count': count,
+        'avg': total / func.nullif(count, 0),
+    }[aggregate]
+
+    query = session.query(period, value).filter(
+        rollup_model.program_id == program_id,
+        rollup_model.field_name == field_name,
+        rollup_model.value_count > 0,
+    )
+    if start_date and end_date:
+        query = query.filter(rollup_model.day.between(start_date, end_date))
+    query = query.group_by(period).order_by(period)
+
+    return [(str(day)[:10], float(total) if total is not None else None) for day, total in query]
+
+
+def lttb(points, threshold):
+    """Largest-triangle-three-buckets downsampling of [(x, y), ...] sorted by x.
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with its neighbours, which preserves
+    the visual shape of the series. x values must be numeric.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(x for x, _ in next_bucket) / len(next_bucket)
+        avg_y = sum(y for _, y in next_bucket) / len(next_bucket)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = points[a]
+        best_area = -1
+        best = start
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def downsample_series(series, max_points):
+    """LTTB over [(YYYY-MM-DD, value), ...], skipping buckets without a value."""
+    points = [(date.fromisoformat(day).toordinal(), value, day) for day, value in series if value is not None]
+    kept = lttb([(x, y) for x, y, _ in points], max_points)
+    by_x = {x: day for x, _, day in points}
+    return [(by_x[x], y) for x, y in kept]
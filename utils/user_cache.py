@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+from utils.cache import SharedMarker, watch_tables
+
+
+class CachedUser(UserMixin):
+    """The parts of a User that request handling reads, detached from any session."""
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+
+class UserCache:
+    """Bounded TTL cache behind the Flask-Login user loader.
+
+    Any committed change to the user table clears it. The clear is shared
+    through a marker file that every worker stats on lookup, so a change
+    made in one worker, or by a script such as init_admin.py, reaches the
+    others on their next request without a database round trip.
+
+    Configuration: USER_CACHE_TTL (seconds, 0 disables the cache),
+    USER_CACHE_MAX_ENTRIES and USER_CACHE_MARKER.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 60
+        self.max_entries = 1024
+        self.marker = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', 60)
+        self.max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', 1024)
+        self.marker = SharedMarker(app.config['USER_CACHE_MARKER'])
+        app.extensions['user_cache'] = self
+
+    def get(self, user_id, load):
+        """Return the cached record for user_id, or one built from load(user_id)."""
+        if self.ttl <= 0:
+            user = load(user_id)
+            return self._record(user) if user is not None else None
+
+        with self._lock:
+            if self.marker.changed():
+                self._entries.clear()
+
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        user = load(user_id)
+        if user is None:
+            return None  # Misses are not cached
+        record = self._record(user)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, record)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return record
+
+    @staticmethod
+    def _record(user):
+        return CachedUser(user.id, user.username, user.role)
+
+    def invalidate(self):
+        """Drop every cached user in this process and signal the other workers."""
+        with self._lock:
+            self._entries.clear()
+            self.marker.touch()
+
+    def stats(self):
+        return {
+            'ttl': self.ttl,
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def watch(self, session, table):
+        """Invalidate after any commit on `session` that wrote to `table`."""
+        watch_tables(session, [table], lambda written: self.invalidate())
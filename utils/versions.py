@@ -0,0 +1,54 @@
+import itertools
+
+from sqlalchemy import event, inspect, select
+
+
+def _bump(connection, version_table, tables):
+    for name in sorted(tables):
+        result = connection.execute(
+            version_table.update()
+            .where(version_table.c.table_name == name)
+            .values(version=version_table.c.version + 1)
+        )
+        if result.rowcount == 0:  # upgrade-db seeds the rows; databases made without it start here
+            connection.execute(version_table.insert().values(table_name=name, version=1))
+
+
+def track_versions(session, version_model, tables):
+    """Bump version_model's counter for each of `tables` in the transaction that writes to it.
+
+    Unit-of-work flushes and bulk statements (query.delete(), Core inserts)
+    both count, and a rollback undoes the bump with the write. Unlike ids,
+    row counts or timestamps, a counter never repeats, so it changes even
+    when a delete and an insert leave the table looking the same.
+    """
+    watched = set(tables)
+    version_table = version_model.__table__
+
+    @event.listens_for(session, 'after_flush')
+    def bump_flushed_tables(sess, flush_context):
+        written = {
+            inspect(obj).mapper.local_table.name
+            for obj in itertools.chain(sess.new, sess.dirty, sess.deleted)
+        } & watched
+        if written:
+            _bump(sess.connection(), version_table, written)
+
+    @event.listens_for(session, 'do_orm_execute')
+    def bump_bulk_tables(orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update
+                or orm_execute_state.is_delete):
+            return
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and getattr(table, 'name', None) in watched:
+            _bump(orm_execute_state.session.connection(), version_table, {table.name})
+
+
+def table_versions(session, version_model, tables):
+    """{table name: version} for `tables`; 0 for a table with no counter yet."""
+    versions = dict.fromkeys(tables, 0)
+    versions.update(session.execute(
+        select(version_model.table_name, version_model.version)
+        .where(version_model.table_name.in_(list(tables)))
+    ).all())
+    return versions
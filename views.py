@@ -0,0 +1,1741 @@
+"""Routes, CLI commands and the helpers behind them, registered by create_app()."""
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify, abort, send_from_directory, Response, stream_with_context
+from flask_login import login_required, login_user, logout_user, current_user
+from werkzeug.utils import secure_filename
+import os
+import hmac
+import logging
+from datetime import datetime, timedelta
+import random
+import re
+import shutil
+import string
+import tempfile
+import uuid
+import json
+import traceback
+from functools import wraps
+from utils.aggregation import entry_date_from_data, numeric_fields, numeric_field_stats
+from utils import migrations, rollup, search
+from utils.pagination import keyset_page, keyset_page_nulls_last
+from utils.csv_import import import_children, remove_expired_files
+from utils.export import EXPORT_FORMATS, export_stream, flatten_program_rows
+from utils.photos import content_digest
+from utils.program_schema import FIELD_TYPES, compile_rules, stored_field_problems
+from utils import indicator_batch
+from utils.program_ingest import ingest_program_records, json_array_records, ndjson_records
+from utils.etags import compute_etag, etag_json, not_modified
+from utils import series
+from utils.query_budget import query_budget
+from utils.versions import table_versions
+from utils.passwords import PasswordServiceBusy
+from extensions import csrf, db, jobs, login_manager, metrics, passwords, photo_store, program_schemas, result_cache, user_cache
+from models import (
+    User,
+    ProgramDefinition,
+    ProgramField,
+    ProgramData,
+    ProgramDailyRollup,
+    Children,
+    EducationSupportIndicators,
+    FamilySupportProgramIndicators,
+    Job,
+    DataVersion,
+    INDICATOR_TABLES,
+    PROGRAM_TABLES,
+    EDUCATION_INDICATOR_FIELDS,
+    FAMILY_INDICATOR_FIELDS,
+    INDICATOR_PROGRAMS,
+    PROGRAM_SCHEMA_TABLES,
+)
+from math import ceil
+
+logger = logging.getLogger('dms')
+
+bp = Blueprint('main', __name__, cli_group=None)
+
+# Absolute path to current directory
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+# Add custom date filter
+@bp.app_template_filter('date')
+def format_date(value, format='%Y-%m-%d'):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        try:
+            value = datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            return value
+    return value.strftime(format)
+
+def indicator_totals(model, field_names, start_date=None, end_date=None):
+    """Sum indicator columns in SQL, returning a dict keyed 'total_<field>'."""
+    columns = [
+        db.func.coalesce(db.func.sum(getattr(model, name)), 0).label(f'total_{name}')
+        for name in field_names
+    ]
+    query = db.session.query(*columns)
+    if start_date and end_date:
+        query = query.filter(model.date_column.between(start_date, end_date))
+    return dict(query.one()._mapping)
+
+def handle_errors(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except Exception as e:
+            error_message = str(e)
+            error_details = traceback.format_exc()
+            
+            # Log the error
+            logger.error(f"Error in {f.__name__}: {error_message}\n{error_details}")
+            
+            # Flash error message to user
+            flash(f'An error occurred: {error_message}', 'danger')
+            
+            # Return appropriate response
+            if request.is_json:
+                return jsonify({'error': error_message}), 500
+            return redirect(url_for('main.index'))
+    return decorated_function
+
+CHILDREN_SORT_COLUMNS = {
+    'name': Children.name,
+    'date_of_birth': Children.date_of_birth,
+    'date_of_admission': Children.date_of_admission,
+    'gender': Children.gender,
+    'status': Children.status,
+}
+
+MAX_CHILDREN_PER_PAGE = 200
+
+PROGRAMS_SORT_COLUMNS = {
+    'id': ProgramDefinition.id,
+    'name': ProgramDefinition.name,
+    'created_at': ProgramDefinition.created_at,
+}
+
+# Attributes clients may pick with ?fields= on the programs API
+PROGRAM_API_FIELDS = ('id', 'name', 'description', 'created_at', 'field_count', 'fields')
+
+MAX_PROGRAMS_PER_PAGE = 200
+
+# Rows per page in the lazily loaded indicator and program entry tabs
+INDICATOR_ROWS_PER_PAGE = 50
+MAX_INDICATOR_ROWS_PER_PAGE = 200
+
+# Upper bound on the points in one chart series
+MAX_SERIES_POINTS = 2000
+
+# Rows fetched from the cursor at a time while streaming exports
+EXPORT_BATCH_SIZE = 1000
+
+# Browser cache lifetime for content-addressed photos (one year)
+PHOTO_MAX_AGE = 365 * 24 * 60 * 60
+
+def children_listing(args):
+    """Filter, sort and keyset-paginate Children from request args.
+
+    Returns (children, listing) where listing echoes the effective filters,
+    sort and page size along with the cursor for the next page.
+    """
+    listing = {
+        key: args.get(key, '').strip()
+        for key in ('search', 'status', 'gender', 'case', 'admitted_from', 'admitted_to')
+    }
+
+    query = Children.query
+    matches = None
+    if listing['search']:
+        if search.fts_available(db.engine):
+            matches = search.children_matches(listing['search'])
+        if matches is not None:
+            query = query.join(matches, matches.c.rowid == Children.id)
+        else:
+            # No index, or text with no words to match (such as '++')
+            query = query.filter(Children.name.like(f"%{listing['search']}%"))
+    if listing['status']:
+        query = query.filter(Children.status == listing['status'])
+    if listing['gender']:
+        query = query.filter(Children.gender == listing['gender'])
+    if listing['case']:
+        query = query.filter(Children.nature_of_case == listing['case'])
+    if listing['admitted_from']:
+        query = query.filter(Children.date_of_admission >= datetime.strptime(listing['admitted_from'], '%Y-%m-%d').date())
+    if listing['admitted_to']:
+        query = query.filter(Children.date_of_admission <= datetime.strptime(listing['admitted_to'], '%Y-%m-%d').date())
+
+    sort = args.get('sort') or ('relevance' if matches is not None else 'name')
+    if sort == 'relevance':
+        if matches is None:
+            sort = 'name'
+    elif sort not in CHILDREN_SORT_COLUMNS:
+        sort = 'name'
+    order = 'desc' if args.get('order') == 'desc' else 'asc'
+    per_page = args.get('per_page', type=int) or current_app.config['CHILDREN_PER_PAGE']
+    per_page = max(1, min(per_page, MAX_CHILDREN_PER_PAGE))
+
+    if sort == 'relevance':
+        # bm25() scores better matches lower, so ascending is most relevant first
+        rows, next_cursor = keyset_page(
+            query.add_columns(matches.c.rank), matches.c.rank, Children.id,
+            cursor=args.get('cursor'), per_page=per_page, descending=order == 'desc',
+            key=lambda row: (row.rank, row[0].id)
+        )
+        children = [row[0] for row in rows]
+    else:
+        children, next_cursor = keyset_page(
+            query, CHILDREN_SORT_COLUMNS[sort], Children.id,
+            cursor=args.get('cursor'), per_page=per_page, descending=order == 'desc'
+        )
+
+    listing.update(sort=sort, order=order, per_page=per_page,
+                   cursor=args.get('cursor'), next_cursor=next_cursor)
+    return children, listing
+
+@bp.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables and apply in-place schema migrations."""
+    for name, count in migrations.upgrade_schema(db).items():
+        print(f"{name}: {count} rows updated")
+
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Recreate the children full-text index from the children table."""
+    with db.engine.begin() as connection:
+        search.create_children_fts(connection)
+        count = search.rebuild_children_fts(connection)
+    print(f"Indexed {count} children.")
+
+@bp.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Backfill ProgramDailyRollup from existing ProgramData rows."""
+    db.create_all()  # Creates the rollup table on databases that predate it
+    count = rollup.rebuild(db.session, ProgramData, ProgramField, ProgramDailyRollup)
+    db.session.commit()
+    print(f"Rebuilt {count} daily rollup rows.")
+
+@bp.cli.command('check-program-fields')
+def check_program_fields_command():
+    """List stored field types and validation rules that programs ignore."""
+    count = 0
+    for field in ProgramField.query.order_by(ProgramField.program_id, ProgramField.id):
+        for problem in stored_field_problems(field):
+            print(f"Program {field.program_id} field '{field.field_name}': {problem}")
+            count += 1
+    print(f"{count} problems found.")
+
+@bp.route('/')
+def index():
+    return redirect(url_for('main.login'))
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.data_display'))
+
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+
+        try:
+            user = User.query.filter_by(username=username).first()
+            stored_hash = user.password if user else None
+            if passwords.authenticate(user, password):
+                if user.password != stored_hash:
+                    # Upgraded to the current hash policy; the next login retries if this fails
+                    try:
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.warning(f"Could not store the rehashed password of user {user.id}: {e}")
+                login_user(user)
+                return redirect(url_for('main.data_display'))
+            else:
+                flash('Invalid username or password', 'danger')
+        except PasswordServiceBusy:
+            flash('The server is busy signing other users in. Please try again in a moment.', 'warning')
+            return render_template('login.html'), 503
+        except Exception as e:
+            flash(f"Error logging in: {e}", 'danger')
+
+    return render_template('login.html')
+
+@bp.route('/help')
+def help():
+    return render_template('help.html')
+
+def run_children_import(stream, dry_run=False, on_batch=None):
+    """Import a children CSV stream; returns (result, error report token or None)."""
+    report_folder = current_app.config['IMPORT_REPORT_FOLDER']
+    report_token = uuid.uuid4().hex
+    report_file = None
+    remove_expired_files(report_folder, current_app.config['IMPORT_REPORT_MAX_AGE'])
+
+    def open_report():
+        nonlocal report_file
+        os.makedirs(report_folder, exist_ok=True)
+        report_file = open(os.path.join(report_folder, f'{report_token}.csv'),
+                           'w', newline='', encoding='utf-8')
+        return report_file
+
+    try:
+        result = import_children(
+            stream, db.session, Children.__table__,
+            batch_size=current_app.config['IMPORT_BATCH_SIZE'],
+            dry_run=dry_run,
+            report=open_report,
+            on_batch=on_batch
+        )
+    finally:
+        if report_file is not None:
+            report_file.close()
+
+    return result, report_token if result.has_report else None
+
+def import_children_job(progress, upload_path, dry_run):
+    """Background variant of the CSV import; commits after every batch."""
+    def on_batch(result):
+        progress.update(result.total, message=f'{result.imported} imported, {result.rejected} rejected')
+        db.session.commit()
+
+    try:
+        with open(upload_path, 'rb') as stream:
+            result, report_token = run_children_import(stream, dry_run, on_batch=on_batch)
+    finally:
+        os.remove(upload_path)
+
+    progress.update(result.total, total=result.total,
+                    message=f'{result.imported} imported, {result.rejected} rejected')
+    return {
+        'dry_run': dry_run,
+        'total': result.total,
+        'imported': result.imported,
+        'rejected': result.rejected,
+        'report_token': report_token,
+    }
+
+@bp.route('/import_csv', methods=['GET', 'POST'])
+@login_required
+def import_csv():
+    if current_user.role != 'admin':
+        flash('You do not have permission to access the import wizard.', 'danger')
+        return redirect(url_for('main.data_display'))
+
+    if request.method == 'POST':
+        file = request.files.get('csv_file')
+
+        if not file or file.filename == '':
+            flash('No file selected', 'danger')
+            return redirect(url_for('main.import_csv'))
+
+        if not file.filename.endswith('.csv'):
+            flash('Invalid file type. Please upload a CSV file.', 'danger')
+            return render_template('import_csv.html')
+
+        dry_run = request.form.get('dry_run') == 'on'
+
+        if request.form.get('background') == 'on':
+            # The upload is gone once this request ends, so spool it for the job
+            report_folder = current_app.config['IMPORT_REPORT_FOLDER']
+            os.makedirs(report_folder, exist_ok=True)
+            fd, upload_path = tempfile.mkstemp(suffix='.upload', dir=report_folder)
+            with os.fdopen(fd, 'wb') as spool:
+                shutil.copyfileobj(file.stream, spool)
+            job_id = jobs.submit('import_children', import_children_job, upload_path, dry_run,
+                                 created_by=current_user.id)
+            flash(f'Import started in the background (job {job_id}).', 'info')
+            return redirect(url_for('main.import_csv', job_id=job_id))
+
+        try:
+            result, report_token = run_children_import(file.stream, dry_run)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error importing CSV data: {str(e)}", 'danger')
+            return redirect(url_for('main.import_csv'))
+
+        if not dry_run and not result.rejected:
+            flash(f'CSV data imported successfully! {result.imported} records added.', 'success')
+            return redirect(url_for('main.data_display'))
+
+        return render_template('import_csv.html', result=result, report_token=report_token)
+
+    return render_template('import_csv.html', job_id=request.args.get('job_id', type=int))
+
+@bp.route('/import_csv/report/<token>')
+@login_required
+def import_csv_report(token):
+    if current_user.role != 'admin':
+        flash('You do not have permission to access the import wizard.', 'danger')
+        return redirect(url_for('main.data_display'))
+
+    if not re.fullmatch(r'[0-9a-f]{32}', token):
+        abort(404)
+    report_folder = current_app.config['IMPORT_REPORT_FOLDER']
+    if not os.path.exists(os.path.join(report_folder, f'{token}.csv')):
+        flash('That error report has expired. Validate the file again to get a new one.', 'warning')
+        return redirect(url_for('main.import_csv'))
+    return send_from_directory(report_folder, f'{token}.csv',
+                               as_attachment=True, download_name='import_errors.csv')
+
+@bp.route('/data_manager', methods=['GET', 'POST'])
+@login_required
+def data_manager():
+    if current_user.role != 'admin':
+        flash('You do not have permission to access this page.', 'danger')
+        return redirect(url_for('main.data_display'))
+
+    if request.method == 'POST':
+        try:
+            indicator = EducationSupportIndicators(
+                enrolled_in_high_school=int(request.form.get('enrolled_in_high_school')),
+                enrolled_in_college=int(request.form.get('enrolled_in_college')),
+                continued_scholarship_support=int(request.form.get('continued_scholarship_support')),
+                supported_with_transport=int(request.form.get('supported_with_transport')),
+                supported_with_upkeep=int(request.form.get('supported_with_upkeep')),
+                supported_with_scholastic_materials=int(request.form.get('supported_with_scholastic_materials')),
+                supported_with_pocket_money=int(request.form.get('supported_with_pocket_money')),
+                supported_with_tuition=int(request.form.get('supported_with_tuition'))
+            )
+            db.session.add(indicator)
+            db.session.commit()
+            flash('Education support data submitted successfully!', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error submitting data: {e}", 'danger')
+
+        return redirect(url_for('main.data_manager'))
+
+    return render_template('data_manager.html')
+
+@bp.route('/dashboard', methods=['GET', 'POST'])
+@login_required
+def dashboard():
+    # Default filter values
+    filter_period = request.form.get('filter-period', 'this-month')
+    start_date = None
+    end_date = None
+
+    today = datetime.today()
+
+    if filter_period == 'this-month':
+        start_date = today.replace(day=1)
+        end_date = today
+    elif filter_period == 'last-3-months':
+        start_date = today - timedelta(days=90)
+        end_date = today
+    elif filter_period == 'this-year':
+        start_date = today.replace(month=1, day=1)
+        end_date = today
+    elif filter_period == 'custom':
+        start_date = request.form.get('start-date')
+        end_date = request.form.get('end-date')
+        if start_date and end_date:
+            start_date = datetime.strptime(start_date, '%Y-%m-%d')
+            end_date = datetime.strptime(end_date, '%Y-%m-%d')
+
+    figures = result_cache.get_or_compute(
+        ('dashboard', filter_period, cache_day(start_date), cache_day(end_date)),
+        INDICATOR_TABLES | PROGRAM_TABLES,
+        lambda: dashboard_figures(start_date, end_date)
+    )
+
+    # Pass all values to template
+    return render_template("dashboard.html",
+        filter_period=filter_period,
+        start_date=start_date.strftime('%Y-%m-%d') if start_date else '',
+        end_date=end_date.strftime('%Y-%m-%d') if end_date else '',
+        **figures['education_sums'],
+        **figures['family_sums'],
+        custom_programs=figures['custom_programs'],
+        custom_programs_data=figures['custom_programs_data']
+    )
+
+def cache_day(value):
+    """Day component of a filter bound, for result cache keys."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat()
+
+def dashboard_figures(start_date, end_date):
+    # Aggregate education support data
+    education_sums = indicator_totals(
+        EducationSupportIndicators, EDUCATION_INDICATOR_FIELDS, start_date, end_date
+    )
+
+    # Aggregate family support data
+    family_sums = indicator_totals(
+        FamilySupportProgramIndicators, FAMILY_INDICATOR_FIELDS, start_date, end_date
+    )
+
+    # Get custom programs data
+    custom_programs = ProgramDefinition.query.all()
+    custom_programs_data = {}
+
+    # Calculate sums for numeric fields of every program in one query
+    fields_by_program = numeric_fields(ProgramField)
+    stats = numeric_field_stats(
+        db.session, ProgramData, ProgramField,
+        start_date=start_date, end_date=end_date,
+        date_expression=ProgramData.created_at
+    )
+
+    for program in custom_programs:
+        program_stats = stats.get(program.id, {})
+        sums = {
+            field.field_name: program_stats.get(field.field_name, {}).get('sum', 0)
+            for field in fields_by_program.get(program.id, [])
+        }
+
+        custom_programs_data[program.id] = {
+            'name': program.name,
+            'sums': sums
+        }
+
+    # Plain values only, so the result can be cached outside the session
+    return {
+        'education_sums': education_sums,
+        'family_sums': family_sums,
+        'custom_programs': [{'id': p.id, 'name': p.name} for p in custom_programs],
+        'custom_programs_data': custom_programs_data,
+    }
+
+@bp.route('/reports', methods=['GET', 'POST'])
+@login_required
+@query_budget(8)
+def reports():
+    labels = []
+    values = []
+    selected_program_id = None
+
+    if request.method == 'POST':
+        custom_program_id = request.form.get('custom_program_id')
+        selected_program_id = custom_program_id  # Set the selected program ID
+        filter_period = request.form.get('period')
+        start_date = None
+        end_date = None
+
+        # Date range handling
+        if filter_period == 'this-month':
+            start_date = datetime.now().replace(day=1).date()
+            end_date = datetime.now().date()
+        elif filter_period == 'last-3-months':
+            end_date = datetime.now().date()
+            start_date = (datetime.now() - timedelta(days=90)).date()
+        elif filter_period == 'this-year':
+            start_date = datetime.now().replace(month=1, day=1).date()
+            end_date = datetime.now().date()
+        elif filter_period == 'custom':
+            start_date_str = request.form.get('start_date')
+            end_date_str = request.form.get('end_date')
+            try:
+                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+            except ValueError:
+                flash("Invalid custom date format. Please use YYYY-MM-DD.", "danger")
+                return redirect(request.url)
+
+        if custom_program_id:
+            program = ProgramDefinition.query.get_or_404(custom_program_id)
+            labels, values = result_cache.get_or_compute(
+                ('reports', program.id, filter_period, cache_day(start_date), cache_day(end_date)),
+                PROGRAM_TABLES,
+                lambda: report_figures(program.id, start_date, end_date)
+            )
+
+    # Get all custom programs for the dropdown
+    custom_programs = ProgramDefinition.query.all()
+
+    return render_template('reports.html', 
+                         labels=labels, 
+                         values=values, 
+                         custom_programs=custom_programs,
+                         selected_program_id=selected_program_id)
+
+def report_figures(program_id, start_date, end_date):
+    """Field labels and sums charted on the reports page for one program."""
+    program_fields = numeric_fields(ProgramField, [program_id]).get(program_id, [])
+    if not program_fields:
+        return [], []
+
+    program_stats = rollup.rollup_stats(
+        db.session, ProgramDailyRollup,
+        program_ids=[program_id],
+        start_date=start_date, end_date=end_date
+    ).get(program_id, {})
+
+    labels = [field.field_label for field in program_fields]
+    values = [
+        program_stats.get(field.field_name, {}).get('sum', 0)
+        for field in program_fields
+    ]
+    return labels, values
+
+@bp.route('/add_family_program_data', methods=['GET', 'POST'])
+@login_required
+def add_family_program_data():
+    if request.method == 'POST':
+        try:
+            indicator = FamilySupportProgramIndicators(
+                financial_support=int(request.form.get('financial_support')),
+                housing_support=int(request.form.get('housing_support')),
+                healthcare_support=int(request.form.get('healthcare_support')),
+                food_support=int(request.form.get('food_support')),
+                educational_support=int(request.form.get('educational_support')),
+                employment_support=int(request.form.get('employment_support')),
+                emotional_support=int(request.form.get('emotional_support')),
+                legal_support=int(request.form.get('legal_support')),
+                date_column=datetime.now().date()
+            )
+            db.session.add(indicator)
+            db.session.commit()
+            flash('Family program data added successfully', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error adding family program data: {e}', 'danger')
+        return redirect(url_for('main.add_family_program_data'))
+
+    return render_template('add_family_program_data.html')
+
+@bp.route('/data_entry', methods=['GET', 'POST'])
+@login_required
+def data_entry():
+    if current_user.role != 'admin':
+        flash('You do not have permission to access this page.', 'danger')
+        return redirect(url_for('main.data_display'))
+
+    if request.method == 'POST':
+        stored_photo = None
+        try:
+            child = Children(
+                name=request.form['name'],
+                date_of_birth=datetime.strptime(request.form['date_of_birth'], '%Y-%m-%d').date(),
+                gender=request.form['gender'],
+                guardian_name=request.form['guardian_name'],
+                guardian_contact=request.form['guardian_contact'],
+                address=request.form['address'],
+                date_of_admission=datetime.strptime(request.form['date_of_admission'], '%Y-%m-%d').date(),
+                nature_of_case=request.form['nature_of_case'],
+                status=request.form['status']
+            )
+            # Stored only once the form is valid
+            photo = request.files.get('photo')
+            if photo and photo.filename != '':
+                stored_photo = child.photo = photo_store.save(photo)
+            db.session.add(child)
+            db.session.commit()
+            flash('Child record added successfully!', 'success')
+            return redirect(url_for('main.data_display'))
+        except Exception as e:
+            db.session.rollback()
+            if stored_photo:
+                release_photo(stored_photo)
+            flash(f'Error adding child record: {e}', 'danger')
+
+    return render_template('data_entry.html')
+
+@bp.route('/data_display')
+@login_required
+@query_budget(8)
+def data_display():
+    try:
+        children, listing = children_listing(request.args)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('main.data_display'))
+
+    statuses = [row[0] for row in db.session.query(Children.status).distinct().order_by(Children.status)]
+    cases = [row[0] for row in db.session.query(Children.nature_of_case).distinct().order_by(Children.nature_of_case)]
+
+    return render_template('data_display.html',
+                         children=children,
+                         search_query=listing['search'],
+                         listing=listing,
+                         statuses=statuses,
+                         cases=cases)
+
+@bp.route('/api/children')
+@login_required
+def list_children_api():
+    try:
+        children, listing = children_listing(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'children': [{
+            'id': child.id,
+            'name': child.name,
+            'date_of_birth': child.date_of_birth.isoformat(),
+            'gender': child.gender,
+            'guardian_name': child.guardian_name,
+            'guardian_contact': child.guardian_contact,
+            'address': child.address,
+            'date_of_admission': child.date_of_admission.isoformat(),
+            'nature_of_case': child.nature_of_case,
+            'status': child.status,
+        } for child in children],
+        'next_cursor': listing['next_cursor'],
+        'sort': listing['sort'],
+        'order': listing['order'],
+        'per_page': listing['per_page'],
+    })
+
+def export_response(export_format, filename, columns, rows):
+    """Stream rows as a CSV or NDJSON attachment without building them in memory."""
+    return Response(
+        stream_with_context(export_stream(export_format, columns, rows)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{export_format}'}
+    )
+
+def stream_table(table):
+    """Execute a full-table select that fetches rows from the cursor in batches."""
+    statement = db.select(table).order_by(table.c.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    return db.session.execute(statement)
+
+@bp.route('/export/children.<any(csv, ndjson):export_format>')
+@login_required
+def export_children(export_format):
+    table = Children.__table__
+    return export_response(export_format, 'children', table.columns.keys(), stream_table(table))
+
+@bp.route('/export/indicators/<any(education, family):program>.<any(csv, ndjson):export_format>')
+@login_required
+def export_indicators(program, export_format):
+    model = EducationSupportIndicators if program == 'education' else FamilySupportProgramIndicators
+    table = model.__table__
+    return export_response(export_format, f'{program}_indicators', table.columns.keys(), stream_table(table))
+
+@bp.route('/child_detail/<int:child_id>')
+@login_required
+def child_detail(child_id):
+    child = Children.query.get_or_404(child_id)
+    return render_template('child_detail.html', child=child)
+
+@bp.route('/edit_child/<int:child_id>', methods=['GET', 'POST'])
+@login_required
+def edit_child(child_id):
+    child = Children.query.get_or_404(child_id)
+
+    if request.method == 'POST':
+        old_photo = child.photo
+        stored_photo = None
+        try:
+            child.name = request.form['name']
+            child.date_of_birth = datetime.strptime(request.form['date_of_birth'], '%Y-%m-%d').date()
+            child.gender = request.form['gender']
+            child.guardian_name = request.form['guardian_name']
+            child.guardian_contact = request.form['guardian_contact']
+            child.address = request.form['address']
+            child.date_of_admission = datetime.strptime(request.form['date_of_admission'], '%Y-%m-%d').date()
+            child.nature_of_case = request.form['nature_of_case']
+            child.status = request.form['status']
+            # Stored only once the form is valid
+            photo = request.files.get('photo')
+            if photo and photo.filename != '':
+                stored_photo = child.photo = photo_store.save(photo)
+
+            db.session.commit()
+            if old_photo and old_photo != child.photo:
+                release_photo(old_photo)
+            flash('Child record updated successfully!', 'success')
+            return redirect(url_for('main.data_display'))
+        except Exception as e:
+            db.session.rollback()
+            if stored_photo:
+                release_photo(stored_photo)
+            flash(f'Error updating child record: {e}', 'danger')
+
+    return render_template('edit_child.html', child=child)
+
+@bp.route('/delete_child/<int:child_id>', methods=['POST'])
+@login_required
+def delete_child(child_id):
+    if current_user.role != 'admin':
+        flash('You do not have permission to delete records.', 'danger')
+        return redirect(url_for('main.data_display'))
+
+    child = Children.query.get_or_404(child_id)
+    try:
+        photo = child.photo
+        db.session.delete(child)
+        db.session.commit()
+        if photo:
+            release_photo(photo)
+        flash('Child record deleted successfully!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error deleting child record: {e}', 'danger')
+
+    return redirect(url_for('main.data_display'))
+
+def release_photo(name):
+    """Remove a photo file once no child references it any more.
+
+    Also called after a failed write, so a photo stored for it is removed
+    unless another child already uses the same file.
+    """
+    remaining = Children.query.filter_by(photo=name).count()
+    photo_store.release(name, remaining)
+
+@bp.route('/photos/<name>')
+@login_required
+def child_photo(name):
+    digest = content_digest(name)
+    if digest:
+        # Content-addressed files never change, so the hash is a strong validator
+        response = send_from_directory(photo_store.folder, name, etag=digest, max_age=PHOTO_MAX_AGE)
+        response.cache_control.immutable = True
+    else:
+        # Legacy files named after the upload may be overwritten; always revalidate
+        response = send_from_directory(photo_store.folder, name, max_age=0)
+        response.cache_control.no_cache = True
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('main.login'))
+
+@bp.route('/indicators')
+@login_required
+@query_budget(4)
+def indicators():
+    # Only the shell; each tab pages in its rows from the JSON endpoints below
+    programs = (
+        db.session.query(ProgramDefinition.id, ProgramDefinition.name)
+        .order_by(ProgramDefinition.name, ProgramDefinition.id)
+        .all()
+    )
+    return render_template('indicators_display.html',
+                           programs=programs,
+                           indicator_programs=INDICATOR_PROGRAMS,
+                           per_page=INDICATOR_ROWS_PER_PAGE)
+
+def indicator_rows_per_page(args):
+    per_page = args.get('per_page', type=int) or INDICATOR_ROWS_PER_PAGE
+    return max(1, min(per_page, MAX_INDICATOR_ROWS_PER_PAGE))
+
+@bp.route('/indicators/<any(education, family):program>.json')
+@login_required
+@query_budget(4)
+def indicator_rows_api(program):
+    model, field_names = INDICATOR_PROGRAMS[program]
+    per_page = indicator_rows_per_page(request.args)
+    try:
+        rows, next_cursor = keyset_page_nulls_last(
+            model.query, model.date_column, model.id,
+            cursor=request.args.get('cursor'), per_page=per_page, descending=True
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'program': program,
+        'fields': field_names,
+        'rows': [{
+            'id': row.id,
+            'date_column': row.date_column.isoformat() if row.date_column else None,
+            'values': [getattr(row, name) for name in field_names],
+        } for row in rows],
+        'next_cursor': next_cursor,
+        'per_page': per_page,
+    })
+
+@bp.route('/programs/<int:program_id>/entries.json')
+@login_required
+@query_budget(5)
+def program_entries_api(program_id):
+    program = db.session.get(ProgramDefinition, program_id)
+    if program is None:
+        return jsonify({'error': 'Program not found'}), 404
+    per_page = indicator_rows_per_page(request.args)
+    try:
+        entries, next_cursor = keyset_page(
+            ProgramData.query.filter_by(program_id=program_id),
+            ProgramData.created_at, ProgramData.id,
+            cursor=request.args.get('cursor'), per_page=per_page, descending=True
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'id': program.id,
+        'name': program.name,
+        'fields': program_field_definitions(program.fields),
+        'entries': [{
+            'id': entry.id,
+            'created_at': entry.created_at.isoformat(),
+            'data': entry.data,
+        } for entry in entries],
+        'next_cursor': next_cursor,
+        'per_page': per_page,
+    })
+
+@bp.route('/update_indicator', methods=['POST'])
+@login_required
+def update_indicator():
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Permission denied'})
+
+    try:
+        data = request.get_json()
+        indicator_id = data['id']
+        program = data['program']
+        values = data['values']
+
+        if program == 'education':
+            indicator = EducationSupportIndicators.query.get_or_404(indicator_id)
+            indicator.enrolled_in_high_school = values[0]
+            indicator.enrolled_in_college = values[1]
+            indicator.continued_scholarship_support = values[2]
+            indicator.supported_with_transport = values[3]
+            indicator.supported_with_upkeep = values[4]
+            indicator.supported_with_scholastic_materials = values[5]
+            indicator.supported_with_pocket_money = values[6]
+            indicator.supported_with_tuition = values[7]
+        else:
+            indicator = FamilySupportProgramIndicators.query.get_or_404(indicator_id)
+            indicator.financial_support = values[0]
+            indicator.housing_support = values[1]
+            indicator.healthcare_support = values[2]
+            indicator.food_support = values[3]
+            indicator.educational_support = values[4]
+            indicator.employment_support = values[5]
+            indicator.emotional_support = values[6]
+            indicator.legal_support = values[7]
+
+        db.session.commit()
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
+@bp.route('/delete_indicator/<program>/<int:indicator_id>', methods=['POST'])
+@login_required
+def delete_indicator(program, indicator_id):
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Permission denied'})
+
+    try:
+        if program == 'education':
+            indicator = EducationSupportIndicators.query.get_or_404(indicator_id)
+        else:
+            indicator = FamilySupportProgramIndicators.query.get_or_404(indicator_id)
+
+        db.session.delete(indicator)
+        db.session.commit()
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
+@bp.route('/indicators/<any(education, family):program>/batch-update', methods=['POST'])
+@login_required
+def batch_update_indicators(program):
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Permission denied'}), 403
+    model, field_names = INDICATOR_PROGRAMS[program]
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Expected a JSON object with an "updates" list'}), 400
+
+    try:
+        rows, invalid = indicator_batch.validate_updates(payload.get('updates'), field_names)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if invalid:
+        # Nothing is written unless every record in the batch is valid
+        return jsonify({'error': 'Some updates are invalid; nothing was changed', 'results': invalid}), 400
+
+    try:
+        results = indicator_batch.apply_updates(db.session, model, rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Batch update of {program} indicators failed: {e}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'updated': sum(1 for result in results if result['status'] == 'updated'),
+        'results': results,
+    })
+
+@bp.route('/indicators/<any(education, family):program>/batch-delete', methods=['POST'])
+@login_required
+def batch_delete_indicators(program):
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Permission denied'}), 403
+    model, _ = INDICATOR_PROGRAMS[program]
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Expected a JSON object with an "ids" list'}), 400
+
+    try:
+        ids = indicator_batch.parse_ids(payload.get('ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        results = indicator_batch.apply_deletes(db.session, model, ids)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Batch delete of {program} indicators failed: {e}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'deleted': sum(1 for result in results if result['status'] == 'deleted'),
+        'results': results,
+    })
+
+@bp.route('/programs')
+@login_required
+def list_programs():
+    programs = ProgramDefinition.query.all()
+    return render_template('programs/list.html', programs=programs)
+
+@bp.route('/programs/new', methods=['GET', 'POST'])
+@login_required
+@handle_errors
+def create_program():
+    if current_user.role != 'admin':
+        flash('You do not have permission to create programs.', 'danger')
+        return redirect(url_for('main.list_programs'))
+
+    if request.method == 'POST':
+        try:
+            program = ProgramDefinition(
+                name=request.form['name'],
+                description=request.form['description'],
+                created_by=current_user.id
+            )
+            db.session.add(program)
+            db.session.flush()
+
+            # Process fields
+            field_names = request.form.getlist('field_name[]')
+            field_labels = request.form.getlist('field_label[]')
+            field_types = request.form.getlist('field_type[]')
+            field_required = request.form.getlist('field_required[]')
+
+            # Add date_column field first
+            date_field = ProgramField(
+                program_id=program.id,
+                field_name='date_column',
+                field_label='Date',
+                field_type='date',
+                is_required=True,
+                order=0
+            )
+            db.session.add(date_field)
+
+            # Process other fields
+            for i in range(len(field_names)):
+                field = ProgramField(
+                    program_id=program.id,
+                    field_name=field_names[i],
+                    field_label=field_labels[i],
+                    field_type=field_types[i],
+                    is_required=field_required[i] == 'true',
+                    order=i + 1
+                )
+                db.session.add(field)
+
+            db.session.commit()
+            flash('Program created successfully!', 'success')
+            return redirect(url_for('main.list_programs'))
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    return render_template('programs/create.html')
+
+@bp.route('/programs/<int:program_id>/data/new', methods=['GET', 'POST'])
+@login_required
+def add_program_data(program_id):
+    schema = program_schemas.get(program_id)
+    if schema is None:
+        abort(404)
+
+    if request.method == 'POST':
+        try:
+            # Coerce and validate against the program's compiled schema
+            data = schema.clean(request.form)
+
+            program_data = ProgramData(
+                program_id=program_id,
+                data=data,
+                entry_date=entry_date_from_data(data),
+                created_by=current_user.id
+            )
+            db.session.add(program_data)
+            db.session.flush()
+
+            # Keep the daily rollups in step within the same transaction
+            rollup.record_entries(db.session, ProgramDailyRollup, schema.numeric_fields, [program_data])
+            db.session.commit()
+            
+            flash('Data added successfully!', 'success')
+            return redirect(url_for('main.view_program_data', program_id=program_id))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error adding data: {str(e)}', 'danger')
+
+    program = ProgramDefinition.query.get_or_404(program_id)
+    return render_template('programs/add_data.html', program=program)
+
+@bp.route('/programs/<int:program_id>/data')
+@login_required
+def view_program_data(program_id):
+    program = ProgramDefinition.query.get_or_404(program_id)
+    data = ProgramData.query.filter_by(program_id=program_id).order_by(ProgramData.created_at.desc()).all()
+    return render_template('programs/view_data.html', program=program, data=data)
+
+@bp.route('/programs/<int:program_id>/data/export.<any(csv, ndjson):export_format>')
+@login_required
+def export_program_data(program_id, export_format):
+    program = ProgramDefinition.query.get_or_404(program_id)
+    field_names = [
+        name for (name,) in db.session.query(ProgramField.field_name)
+        .filter_by(program_id=program.id)
+        .order_by(ProgramField.order, ProgramField.id)
+    ]
+
+    statement = (
+        db.select(ProgramData.id, ProgramData.entry_date, ProgramData.created_at,
+                  ProgramData.created_by, ProgramData.data)
+        .where(ProgramData.program_id == program.id)
+        .order_by(ProgramData.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    rows = flatten_program_rows(db.session.execute(statement), field_names)
+    columns = ['id', 'entry_date', 'created_at', 'created_by'] + field_names
+    filename = f'{secure_filename(program.name) or "program"}_data'
+    return export_response(export_format, filename, columns, rows)
+
+def programs_dashboard_period(values):
+    """(filter_period, start_date, end_date) from the programs dashboard filter."""
+    filter_period = values.get('filter-period', 'this-month')
+    start_date = None
+    end_date = None
+
+    today = datetime.today()
+
+    if filter_period == 'this-month':
+        start_date = today.replace(day=1)
+        end_date = today
+    elif filter_period == 'last-3-months':
+        start_date = today - timedelta(days=90)
+        end_date = today
+    elif filter_period == 'this-year':
+        start_date = today.replace(month=1, day=1)
+        end_date = today
+    elif filter_period == 'custom':
+        start_date_str = values.get('start-date')
+        end_date_str = values.get('end-date')
+        if start_date_str and end_date_str:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+
+    return filter_period, start_date, end_date
+
+@bp.route('/programs/dashboard', methods=['GET', 'POST'])
+@login_required
+@query_budget(6)
+def programs_dashboard():
+    # Filters arrive by query string (page links) or from the filter form
+    filter_period, start_date, end_date = programs_dashboard_period(request.values)
+    start_day = start_date.date() if start_date else None
+    end_day = end_date.date() if end_date else None
+
+    # Page through program ids first; chart data is fetched per program
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = 2  # Show 2 programs per page
+
+    def page_programs():
+        program_ids = rollup.programs_with_values(
+            db.session, ProgramDailyRollup, ProgramField, start_day, end_day
+        )
+        total = program_ids.count()
+        page_ids = [pid for (pid,) in program_ids.limit(per_page).offset((page - 1) * per_page)]
+        names = dict(
+            db.session.query(ProgramDefinition.id, ProgramDefinition.name)
+            .filter(ProgramDefinition.id.in_(page_ids))
+        )
+        return total, [{'id': pid, 'name': names.get(pid, '')} for pid in page_ids]
+
+    total, programs = result_cache.get_or_compute(
+        ('programs_dashboard', filter_period, cache_day(start_date), cache_day(end_date), page, per_page),
+        PROGRAM_TABLES,
+        page_programs
+    )
+    total_pages = ceil(total / per_page)
+
+    filter_args = {'filter-period': filter_period}
+    if filter_period == 'custom' and start_date and end_date:
+        filter_args['start-date'] = start_date.strftime('%Y-%m-%d')
+        filter_args['end-date'] = end_date.strftime('%Y-%m-%d')
+
+    return render_template('programs/dashboard.html',
+                         programs=programs,
+                         filter_period=filter_period,
+                         filter_args=filter_args,
+                         start_date=start_date,
+                         end_date=end_date,
+                         page=page,
+                         total_pages=total_pages)
+
+@bp.route('/programs/<int:program_id>/dashboard.json')
+@login_required
+@query_budget(6)
+def program_chart_api(program_id):
+    """Chart data for one program card, using the dashboard's filter arguments."""
+    try:
+        filter_period, start_date, end_date = programs_dashboard_period(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    chart = result_cache.get_or_compute(
+        ('program_chart', program_id, filter_period, cache_day(start_date), cache_day(end_date)),
+        PROGRAM_TABLES,
+        lambda: program_chart_data(
+            program_id,
+            start_date.date() if start_date else None,
+            end_date.date() if end_date else None
+        )
+    )
+    if chart is None:
+        return jsonify({'error': 'Program not found'}), 404
+    return jsonify(chart)
+
+@bp.route('/programs/<int:program_id>/series.json')
+@login_required
+@query_budget(6)
+def program_series_api(program_id):
+    """Time series of one numeric field in day, week or month buckets.
+
+    ?field= (required), ?bucket=auto|day|week|month, ?agg=sum|avg|count,
+    ?max_points= and ?downsample=lttb, plus the dashboard filter arguments.
+    """
+    field_name = request.args.get('field', '')
+    bucket = request.args.get('bucket', 'auto')
+    aggregate = request.args.get('agg', 'sum')
+    downsample = request.args.get('downsample', '')
+    max_points = request.args.get('max_points', 500, type=int)
+    max_points = max(3, min(max_points, MAX_SERIES_POINTS))
+    if bucket != 'auto' and bucket not in series.BUCKETS:
+        return jsonify({'error': f"bucket must be auto or one of: {', '.join(series.BUCKETS)}"}), 400
+    if aggregate not in series.AGGREGATES:
+        return jsonify({'error': f"agg must be one of: {', '.join(series.AGGREGATES)}"}), 400
+    if downsample not in ('', 'lttb'):
+        return jsonify({'error': 'downsample must be lttb'}), 400
+    try:
+        filter_period, start_date, end_date = programs_dashboard_period(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    schema = program_schemas.get(program_id)
+    if schema is None:
+        return jsonify({'error': 'Program not found'}), 404
+    if field_name not in schema.numeric_fields:
+        return jsonify({'error': f"'{field_name}' is not a numeric field of this program"}), 400
+
+    start_day = start_date.date() if start_date else None
+    end_day = end_date.date() if end_date else None
+
+    def compute():
+        chosen = bucket
+        if chosen == 'auto':
+            first, last = (start_day, end_day) if start_day and end_day else series.date_range(
+                db.session, ProgramDailyRollup, program_id, field_name
+            )
+            chosen = series.auto_bucket(first, last, max_points) if first and last else 'day'
+
+        points = series.field_series(
+            db.session, ProgramDailyRollup, program_id, field_name,
+            bucket=chosen, aggregate=aggregate, start_date=start_day, end_date=end_day
+        )
+        source_points = len(points)
+        if downsample == 'lttb' and len(points) > max_points:
+            points = series.downsample_series(points, max_points)
+        else:
+            points = points[-max_points:]  # Keep the most recent buckets
+
+        return {
+            'program_id': program_id,
+            'field': field_name,
+            'label': schema.by_name[field_name].label,
+            'bucket': chosen,
+            'agg': aggregate,
+            'downsample': downsample or None,
+            'source_points': source_points,
+            'points': [{'t': day, 'v': value} for day, value in points],
+        }
+
+    return jsonify(result_cache.get_or_compute(
+        ('program_series', program_id, field_name, bucket, aggregate, downsample, max_points,
+         filter_period, cache_day(start_date), cache_day(end_date)),
+        PROGRAM_TABLES,
+        compute
+    ))
+
+def program_chart_data(program_id, start_date, end_date):
+    """Per-field stats of one program's numeric values in range, or None if it doesn't exist."""
+    program = db.session.get(ProgramDefinition, program_id)
+    if program is None:
+        return None
+
+    program_stats = rollup.rollup_stats(
+        db.session, ProgramDailyRollup,
+        program_ids=[program_id],
+        start_date=start_date, end_date=end_date
+    ).get(program_id, {})
+
+    # Prepare data for charts
+    chart_data = {}
+    for field in numeric_fields(ProgramField, [program_id]).get(program_id, []):
+        field_stats = program_stats.get(field.field_name)
+        if field_stats and field_stats['count']:  # Only include fields with valid data
+            chart_data[field.field_name] = {
+                'label': field.field_label,
+                **field_stats
+            }
+
+    return {'id': program.id, 'name': program.name, 'chart_data': chart_data}
+
+@bp.route('/programs/<int:program_id>/delete', methods=['POST'])
+@login_required
+def delete_program(program_id):
+    if current_user.role != 'admin':
+        flash('You do not have permission to delete programs.', 'danger')
+        return redirect(url_for('main.list_programs'))
+
+    program = ProgramDefinition.query.get_or_404(program_id)
+    try:
+        job_id = jobs.submit('delete_program', delete_program_job, program.id,
+                             created_by=current_user.id)
+        flash(f'Program "{program.name}" is being deleted in the background (job {job_id}).', 'info')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error deleting program: {str(e)}', 'danger')
+
+    return redirect(url_for('main.list_programs'))
+
+def delete_program_job(progress, program_id):
+    program = db.session.get(ProgramDefinition, program_id)
+    if program is None:
+        return {'program_id': program_id, 'deleted': False}
+
+    # Delete all associated data first
+    deleted_rows = ProgramData.query.filter_by(program_id=program_id).delete()
+    rollup.discard_programs(db.session, ProgramDailyRollup, [program_id])
+
+    # Delete all associated fields
+    ProgramField.query.filter_by(program_id=program_id).delete()
+
+    # Delete the program
+    db.session.delete(program)
+    return {'program_id': program_id, 'deleted': True, 'data_rows': deleted_rows}
+
+@bp.route('/jobs')
+@login_required
+def list_jobs():
+    query = Job.query
+    if current_user.role != 'admin':
+        query = query.filter_by(created_by=current_user.id)
+    recent = query.order_by(Job.id.desc()).limit(50).all()
+    return jsonify([job.to_dict() for job in recent])
+
+@bp.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if current_user.role != 'admin' and job.created_by != current_user.id:
+        return jsonify({'error': 'Permission denied'}), 403
+    return jsonify(job.to_dict())
+
+@bp.route('/jobs/rebuild-rollups', methods=['POST'])
+@login_required
+def rebuild_rollups_job_api():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Permission denied'}), 403
+
+    job_id = jobs.submit('rebuild_rollups', rebuild_rollups_job, created_by=current_user.id)
+    return jsonify({'job_id': job_id, 'status_url': url_for('main.job_status', job_id=job_id)}), 202
+
+def rebuild_rollups_job(progress):
+    count = rollup.rebuild(db.session, ProgramData, ProgramField, ProgramDailyRollup)
+    progress.update(count, total=count)
+    return {'rows': count}
+
+@bp.route('/cache/stats')
+@login_required
+def result_cache_stats():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Permission denied'}), 403
+    return jsonify({**result_cache.stats(), 'users': user_cache.stats()})
+
+@metrics.collector
+def cache_metrics():
+    results = result_cache.stats()
+    users = user_cache.stats()
+    return [
+        ('dms_cache_hits_total', 'counter', 'Cache lookups answered from the cache.',
+         [({'cache': 'results'}, results['hits']), ({'cache': 'users'}, users['hits'])]),
+        ('dms_cache_misses_total', 'counter', 'Cache lookups that had to compute or load.',
+         [({'cache': 'results'}, results['misses']), ({'cache': 'users'}, users['misses'])]),
+        ('dms_cache_entries', 'gauge', 'Entries currently held.',
+         [({'cache': 'results'}, results['entries']), ({'cache': 'users'}, users['entries'])]),
+    ]
+
+def bearer_token_matches(token):
+    """Whether the request sends `Authorization: Bearer <token>`; never when token is unset."""
+    if not token:
+        return False
+    authorization = request.headers.get('Authorization', '')
+    # compare_digest() rejects non-ASCII str with TypeError; bytes compare safely
+    return hmac.compare_digest(authorization.encode('utf-8'), f'Bearer {token}'.encode('utf-8'))
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    if not metrics.enabled:
+        return Response('Metrics are disabled; set METRICS_ENABLED=1\n', status=404, mimetype='text/plain')
+    if not bearer_token_matches(current_app.config['METRICS_TOKEN']):
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if current_user.role != 'admin':
+            return Response('Permission denied\n', status=403, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/user_management')
+@login_required
+def user_management():
+    if current_user.role != 'admin':
+        flash('You do not have permission to access this page.', 'danger')
+        return redirect(url_for('main.index'))
+    
+    users = User.query.all()
+    return render_template('user_management.html', users=users)
+
+@bp.route('/create_user', methods=['POST'])
+@login_required
+def create_user():
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Permission denied'}), 403
+    
+    username = request.form.get('username')
+    password = request.form.get('password')
+    role = request.form.get('role')
+    
+    if not all([username, password, role]):
+        flash('All fields are required', 'danger')
+        return redirect(url_for('main.user_management'))
+    
+    # Check if username already exists
+    if User.query.filter_by(username=username).first():
+        flash('Username already exists', 'danger')
+        return redirect(url_for('main.user_management'))
+    
+    try:
+        new_user = User(
+            username=username,
+            password=passwords.hash(password),
+            role=role
+        )
+        db.session.add(new_user)
+        db.session.commit()
+        flash('User created successfully', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error creating user: {str(e)}', 'danger')
+    
+    return redirect(url_for('main.user_management'))
+
+@bp.route('/reset_password/<int:user_id>', methods=['POST'])
+@login_required
+def reset_password(user_id):
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Permission denied'}), 403
+    
+    user = User.query.get_or_404(user_id)
+    try:
+        # Generate a random password
+        new_password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
+        user.password = passwords.hash(new_password)
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': f'Password reset successfully. New password: {new_password}'
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
+@bp.route('/delete_user/<int:user_id>', methods=['POST'])
+@login_required
+def delete_user(user_id):
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Permission denied'}), 403
+    
+    user = User.query.get_or_404(user_id)
+    
+    # Prevent deleting the admin user
+    if user.username == 'admin':
+        return jsonify({'success': False, 'message': 'Cannot delete the admin user'})
+    
+    try:
+        db.session.delete(user)
+        db.session.commit()
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
+@bp.route('/api/programs', methods=['POST'])
+def create_program_api():
+    try:
+        data = request.get_json()
+        
+        # Validate required fields
+        if not data or 'name' not in data:
+            return jsonify({'error': 'Program name is required'}), 400
+            
+        # Create new program
+        program = ProgramDefinition(
+            name=data['name'],
+            description=data.get('description', '')
+        )
+        db.session.add(program)
+        
+        # Add program fields if provided
+        if 'fields' in data and isinstance(data['fields'], list):
+            for field_data in data['fields']:
+                # Reject fields the schema registry could not compile
+                if field_data.get('field_type') not in FIELD_TYPES:
+                    db.session.rollback()
+                    return jsonify({'error': f"field_type must be one of: {', '.join(FIELD_TYPES)}"}), 400
+                try:
+                    compile_rules(field_data['field_type'], field_data.get('validation_rules'))
+                except ValueError as e:
+                    db.session.rollback()
+                    return jsonify({'error': f"{field_data.get('field_name')}: {e}"}), 400
+
+                field = ProgramField(
+                    program=program,
+                    field_name=field_data['field_name'],
+                    field_label=field_data['field_label'],
+                    field_type=field_data['field_type'],
+                    is_required=field_data.get('is_required', True),
+                    validation_rules=json.dumps(field_data.get('validation_rules', {}))
+                )
+                db.session.add(field)
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Program created successfully',
+            'program_id': program.id
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def requested_program_fields(default):
+    """Sparse fieldset from ?fields=a,b; raises ValueError naming unknown attributes."""
+    raw = request.args.get('fields', '').strip()
+    if not raw:
+        return default
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in PROGRAM_API_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}; choose from {', '.join(PROGRAM_API_FIELDS)}")
+    return fields
+
+def programs_fingerprint(program_id=None):
+    """Cheap summary of the program and field tables that changes with every committed write.
+
+    It is built from their DataVersion counters, not from counts or id
+    totals, which a delete followed by an insert reusing the id leaves
+    unchanged. For one program it also carries whether the program exists
+    and its field count, so the API can answer without loading rows.
+    """
+    fingerprint = {'versions': table_versions(db.session, DataVersion, PROGRAM_SCHEMA_TABLES)}
+    if program_id is not None:
+        fingerprint['program_exists'] = db.session.query(
+            ProgramDefinition.query.filter_by(id=program_id).exists()
+        ).scalar()
+        fingerprint['field_count'] = ProgramField.query.filter_by(program_id=program_id).count()
+    return fingerprint
+
+def program_field_definitions(fields):
+    return [{
+        'field_name': field.field_name,
+        'field_label': field.field_label,
+        'field_type': field.field_type,
+        'is_required': field.is_required,
+        'validation_rules': json.loads(field.validation_rules) if field.validation_rules else {}
+    } for field in sorted(fields, key=lambda f: (f.order or 0, f.id))]
+
+def program_api_payload(program, field_count, fields):
+    values = {
+        'id': lambda: program.id,
+        'name': lambda: program.name,
+        'description': lambda: program.description,
+        'created_at': lambda: program.created_at.isoformat(),
+        'field_count': lambda: field_count,
+        'fields': lambda: program_field_definitions(program.fields),
+    }
+    return {name: values[name]() for name in fields}
+
+@bp.route('/api/programs/<int:program_id>', methods=['GET'])
+@query_budget(6)
+def get_program_api(program_id):
+    try:
+        fields = requested_program_fields(['id', 'name', 'description', 'created_at', 'fields'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    fingerprint = programs_fingerprint(program_id)
+    if not fingerprint['program_exists']:
+        abort(404)
+    etag = compute_etag('program', program_id, fingerprint, fields)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    query = ProgramDefinition.query
+    if 'fields' in fields:
+        query = query.options(db.selectinload(ProgramDefinition.fields))
+    program = query.filter_by(id=program_id).first_or_404()
+    field_count = fingerprint['field_count']
+    return etag_json(program_api_payload(program, field_count, fields), etag)
+
+@bp.route('/api/programs/<int:program_id>/data', methods=['POST'])
+@csrf.exempt
+def ingest_program_data_api(program_id):
+    """Bulk submissions: a JSON array, or NDJSON sent as application/x-ndjson.
+
+    Sync clients authenticate with `Authorization: Bearer <SYNC_TOKEN>`;
+    their rows have no created_by. A signed-in session works too, without
+    a CSRF token: only JSON and NDJSON bodies are read, and a cross-site
+    form cannot send either without a CORS preflight.
+
+    Each batch of PROGRAM_DATA_BATCH_SIZE records commits on its own, so
+    a sync is partial and resumable, not atomic. If a batch fails, the
+    error response lists the committed records and `resume_from`, the
+    index of the first record to send again.
+    """
+    if bearer_token_matches(current_app.config['SYNC_TOKEN']):
+        created_by = None
+    elif current_user.is_authenticated:
+        created_by = current_user.id
+    else:
+        return jsonify({'error': 'Sign in or send the sync token as a bearer token'}), 401
+
+    schema = program_schemas.get(program_id)
+    if schema is None:
+        return jsonify({'error': 'Program not found'}), 404
+
+    if request.mimetype == 'application/x-ndjson':
+        records = ndjson_records(request.stream)
+    elif request.is_json:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, list):
+            return jsonify({'error': 'Expected a JSON array of records or an NDJSON body'}), 400
+        records = json_array_records(payload)
+    else:
+        return jsonify({'error': 'Send application/json or application/x-ndjson'}), 415
+
+    dry_run = request.args.get('dry_run') in ('1', 'true')
+    committed = {'result': None, 'inserted': 0, 'through': 0}
+
+    def on_batch(result):
+        db.session.commit()
+        # Every record read so far is settled: committed or rejected
+        committed.update(result=result, inserted=result.inserted, through=result.received)
+
+    try:
+        result = ingest_program_records(
+            records, db.session, schema, ProgramData.__table__, ProgramDailyRollup,
+            created_by=created_by,
+            batch_size=current_app.config['PROGRAM_DATA_BATCH_SIZE'],
+            dry_run=dry_run,
+            on_batch=on_batch
+        )
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Bulk ingest into program {program_id} failed: {e}")
+        settled = committed['result'].results[:committed['through']] if committed['result'] else []
+        return jsonify({
+            'error': str(e),
+            'partial': True,
+            'committed': committed['inserted'],
+            'resume_from': committed['through'],
+            'results': settled,
+        }), 500
+
+    return jsonify({'program_id': program_id, **result.to_dict()})
+
+@bp.route('/api/programs', methods=['GET'])
+@query_budget(6)
+def list_programs_api():
+    """Keyset-paginated programs; ?sort=, ?order=, ?per_page=, ?cursor= and ?fields=."""
+    try:
+        fields = requested_program_fields(['id', 'name', 'description', 'created_at', 'field_count'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    sort = request.args.get('sort', 'id')
+    if sort not in PROGRAMS_SORT_COLUMNS:
+        sort = 'id'
+    order = 'desc' if request.args.get('order') == 'desc' else 'asc'
+    per_page = request.args.get('per_page', type=int) or 50
+    per_page = max(1, min(per_page, MAX_PROGRAMS_PER_PAGE))
+    cursor = request.args.get('cursor')
+
+    etag = compute_etag('programs', programs_fingerprint(), fields, sort, order, per_page, cursor)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    # Field counts for the whole page in one aggregated subquery
+    field_counts = (
+        db.session.query(ProgramField.program_id, db.func.count(ProgramField.id).label('field_count'))
+        .group_by(ProgramField.program_id)
+        .subquery()
+    )
+    query = (
+        db.session.query(ProgramDefinition, db.func.coalesce(field_counts.c.field_count, 0))
+        .outerjoin(field_counts, field_counts.c.program_id == ProgramDefinition.id)
+    )
+    if 'fields' in fields:
+        query = query.options(db.selectinload(ProgramDefinition.fields))
+
+    sort_column = PROGRAMS_SORT_COLUMNS[sort]
+    try:
+        rows, next_cursor = keyset_page(
+            query, sort_column, ProgramDefinition.id,
+            cursor=cursor, per_page=per_page, descending=order == 'desc',
+            key=lambda row: (getattr(row[0], sort_column.key), row[0].id)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return etag_json({
+        'programs': [program_api_payload(program, field_count, fields) for program, field_count in rows],
+        'next_cursor': next_cursor,
+        'sort': sort,
+        'order': order,
+        'per_page': per_page,
+    }, etag)